@@ -9,11 +9,11 @@ with further trade execution or blockchain integration features.
 """
 
 import logging
-import requests
 from flask import Flask, jsonify, render_template_string
 from flask_socketio import SocketIO
 from dotenv import load_dotenv
 import os
+from top_traders import top_traders_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -23,9 +23,6 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev_key_123')  # Add a secret key
 socketio = SocketIO(app)
 
-# Hypothetical Dexscreener API endpoint for top traders
-DEXSCREENER_TOP_TRADERS_API_URL = "https://api.dexscreener.com/latest/traders"
-
 # -------------------------------------------------------------------
 # HTML Template: Phantom wallet integration and wallet tracker display
 # -------------------------------------------------------------------
@@ -138,25 +135,16 @@ def health_check():
 @app.route("/api/top-traders")
 def api_top_traders():
     """
-    API endpoint that fetches the top trader wallet data from Dexscreener.
-    In case of error, returns fallback dummy data.
+    API endpoint that serves the top trader wallet data from Dexscreener.
+    Data comes from the shared stale-while-revalidate cache; fallback dummy
+    data is only returned if the very first fetch fails.
     """
-    try:
-        response = requests.get(DEXSCREENER_TOP_TRADERS_API_URL, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        # Assuming the API returns a JSON object with a key "traders" containing a list.
-        traders = data.get("traders", [])
-        logging.info("Fetched top traders data from Dexscreener.")
-    except Exception as e:
-        logging.error("Error fetching top traders from Dexscreener: %s", e)
-        # Fallback dummy data if API call fails.
-        traders = [
-            {"wallet": "7Tz...dummy1", "volume": 1200},
-            {"wallet": "9Xf...dummy2", "volume": 950},
-            {"wallet": "3Ab...dummy3", "volume": 870}
-        ]
-    return jsonify({"traders": traders})
+    return jsonify({"traders": top_traders_cache.get()})
+
+@app.route("/api/top-traders/stats")
+def api_top_traders_stats():
+    """Cache hit/miss counters and upstream refresh latency."""
+    return jsonify(top_traders_cache.stats())
 
 # -------------------------------------------------------------------
 # Main
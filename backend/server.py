@@ -8,6 +8,7 @@ simulated tweets and whale activity events.
 """
 
 import os
+import sys
 import time
 import random
 from threading import Thread
@@ -17,12 +18,22 @@ from datetime import datetime
 import eventlet
 eventlet.monkey_patch()
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from dotenv import load_dotenv
 import logging
 
+# Shared modules (whale_store, broadcaster, topics, metrics, settings_store)
+# live at the repository root.
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+from whale_store import WhaleEventStore
+from broadcaster import Broadcaster
+from topics import TopicRouter
+from metrics import registry, PROMETHEUS_CONTENT_TYPE
+from settings_store import SettingsStore
+
 # Load environment variables
 load_dotenv()
 
@@ -33,14 +44,23 @@ app = Flask(__name__)
 CORS(app)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev_key')
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+# All socket output goes out as batched, rate-limited frames, and each client
+# only gets the topics it subscribed to.
+broadcaster = Broadcaster(socketio)
+topic_router = TopicRouter(broadcaster)
 
 # Global data
-whale_activity_data = []  # List to hold latest whale events
-bot_settings = {
+whale_store = WhaleEventStore()  # Ring buffer of whale events
+# Versioned, copy-on-write settings, persisted between runs (see settings_store.py)
+settings_store = SettingsStore({
     "tradeAmount": 0.5,
-    "stopLoss": 5,
-    "riskReward": 3
-}
+    "stopLoss": 5.0,
+    "riskReward": 3.0
+}, os.getenv("SETTINGS_PATH", os.path.join(ROOT_DIR, "data", "backend_settings.json")), {
+    "tradeAmount": (0.001, 1000.0),
+    "stopLoss": (0.1, 100.0),
+    "riskReward": (0.1, 100.0)
+})
 tracked_accounts = ["elonmusk", "cz_binance", "solana", "raydium_io"]
 
 # API Endpoints
@@ -58,19 +78,41 @@ def get_tracked_accounts():
 
 @app.route('/api/whale-activity')
 def get_whale_activity():
-    return jsonify({"activities": whale_activity_data})
+    # `since=<seq>` returns only newer events (the gap after a reconnect);
+    # otherwise the newest `limit` events, with `before=<seq>` to page back.
+    limit = min(request.args.get("limit", 50, type=int), whale_store.capacity)
+    body = whale_store.page_json(since=request.args.get("since", type=int), limit=limit,
+                                 before=request.args.get("before", type=int))
+    return app.response_class(body, mimetype="application/json")
+
+@app.route('/api/whale-activity/net-flow')
+def get_whale_net_flow():
+    minutes = request.args.get("minutes", 5, type=float)
+    return jsonify({"minutes": minutes, "net_flow": whale_store.net_flow(minutes * 60)})
+
+@app.route('/api/broadcast/stats')
+def get_broadcast_stats():
+    return jsonify(broadcaster.stats())
+
+@app.route('/metrics')
+def metrics():
+    return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/api/settings')
+def get_settings():
+    snapshot = settings_store.snapshot
+    return jsonify({"version": snapshot.version, "settings": snapshot.as_dict()})
 
 @app.route('/api/save-settings', methods=["POST"])
 def save_settings():
-    global bot_settings
     data = request.get_json()
     if not data:
         return jsonify({"message": "Invalid settings data"}), 400
     try:
-        bot_settings["tradeAmount"] = float(data.get("tradeAmount", 0.5))
-        bot_settings["stopLoss"] = float(data.get("stopLoss", 5))
-        bot_settings["riskReward"] = float(data.get("riskReward", 3))
-        return jsonify({"message": "Settings updated successfully."})
+        snapshot = settings_store.update({key: data[key] for key in settings_store.defaults if key in data})
+        return jsonify({"message": "Settings updated successfully.", "version": snapshot.version})
+    except (KeyError, ValueError) as e:
+        return jsonify({"message": f"Invalid settings: {e}"}), 400
     except Exception as e:
         return jsonify({"message": f"Error updating settings: {e}"}), 500
 
@@ -94,24 +136,20 @@ def simulate_tweets():
             }
         }
         logging.info(f"Emitting tweet: {tweet}")
-        socketio.emit("new_tweet", tweet)
+        topic_router.publish_tweet(tweet)
 
 def simulate_whale_activity():
     """Simulate whale activity events every 15 seconds."""
     while True:
         time.sleep(15)
-        event = {
-            "time": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-            "wallet": "0x" + ''.join(random.choices("abcdef0123456789", k=40)),
-            "amount": round(random.uniform(10, 200), 2),
-            "type": random.choice(["buy", "sell"])
-        }
-        whale_activity_data.append(event)
-        # Keep only the latest 50 events
-        if len(whale_activity_data) > 50:
-            whale_activity_data.pop(0)
+        seq = whale_store.append(
+            wallet="0x" + ''.join(random.choices("abcdef0123456789", k=40)),
+            amount=round(random.uniform(10, 200), 2),
+            side=random.choice(["buy", "sell"])
+        )
+        event = whale_store.get(seq)
         logging.info(f"New whale activity: {event}")
-        socketio.emit("new_whale_activity", event)
+        topic_router.publish_whale(event)
 
 def start_background_threads():
     tweet_thread = Thread(target=simulate_tweets)
@@ -123,6 +161,7 @@ def start_background_threads():
     whale_thread.start()
 
 if __name__ == "__main__":
+    topic_router.attach()
     start_background_threads()
     port = int(os.getenv("PORT", 5002))
     logging.info(f"Starting server on port {port}")
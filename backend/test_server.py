@@ -1,5 +1,11 @@
-import requests
+import os
+import sys
 import time
+import requests
+
+# Shared modules (http_client, ...) live at the repository root.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http_client import http
 
 def test_backend():
     url = "http://localhost:5002/health"
@@ -9,7 +15,7 @@ def test_backend():
     
     for attempt in range(max_attempts):
         try:
-            response = requests.get(url)
+            response = http.get(url, retries=0)
             if response.status_code == 200:
                 print("✅ Backend is running and healthy!")
                 print(f"Response: {response.json()}")
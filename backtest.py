@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+backtest.py
+
+Offline backtest of the tweet-signal strategy against historical prices.
+
+Tweets (a replay.py JSONL corpus) are parsed once with the bot's own
+parse_trading_signals_many. The trade signals are then merged with a tick
+file (see price_feed.read_ticks) on time and replayed through the same
+SignalDeduplicator cooldowns and TradeManager position logic the bot runs:
+each tick goes to on_prices() (take-profits, stops, moonbag exits) and each
+trade signal enters at the latest price seen for its token. Signals for a
+token with no price yet are skipped.
+
+    python backtest.py ticks corpus.jsonl ticks.csv     # synthetic ticks for a corpus
+    python backtest.py run corpus.jsonl ticks.csv --take-profit 3 --stop-loss 10
+    python backtest.py sweep corpus.jsonl ticks.csv \\
+        --take-profit 2,3,5,10 --moonbag 0,15,30 --stop-loss 5,10,20 --workers 8
+
+A run reports realized and open (marked at the last price) PnL, hit rate
+(closed positions that made money) and the maximum drawdown of realized
+PnL. A sweep runs every combination of the given TradeParameters values in
+a process pool; each worker receives the parsed signals and ticks once.
+Slippage draws are seeded, so a run is reproducible and every combination
+of a sweep sees the same draws.
+"""
+
+import os
+import sys
+import csv
+import json
+import math
+import random
+import logging
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from dedup import SignalDeduplicator, ACCEPT as DEDUP_ACCEPT
+from price_feed import read_ticks
+from trading import TradeManager, default_trade_parameters
+
+BACKTEST_SEED = 0
+
+# backtest parameter -> TradeParameters attribute
+SWEEP_PARAMETERS = {
+    "take_profit": "take_profit_multiplier",
+    "moonbag": "moonbag_percentage",
+    "stop_loss": "stop_loss_percent",
+}
+
+
+def _timestamp(created_at):
+    return datetime.fromisoformat(created_at.replace("Z", "+00:00")).timestamp()
+
+
+def parse_corpus(records):
+    """(ts, tweet_id, author_id, token, signals) for every tweet that would trade, by time."""
+    import integrated_bot as bot
+    texts = [record["text"] for record in records]
+    signals = []
+    for record, parsed in zip(records, bot.parse_trading_signals_many(texts)):
+        token = parsed.get('token_address') or parsed.get('token_symbol')
+        if parsed.get('should_trade') and token:
+            signals.append((_timestamp(record["created_at"]), record["id"],
+                            record.get("author_id"), token, parsed))
+    signals.sort(key=lambda signal: signal[0])
+    return signals
+
+
+def load_ticks(path):
+    """(ts, token, price) tuples from a tick file, by time."""
+    ticks = [(tick.ts, tick.token, tick.price) for tick in read_ticks(path)]
+    ticks.sort(key=lambda tick: tick[0])
+    return ticks
+
+
+def generate_ticks(signals, seed=BACKTEST_SEED, interval=1.0, volatility=0.02, lead=60.0,
+                   horizon=900.0):
+    """
+    Synthetic ticks for every signalled token: a random walk every `interval`
+    seconds from `lead` seconds before its first signal to `horizon` seconds
+    after its last, with a random jump at each signal (some pumps, some dumps).
+    """
+    rng = random.Random(seed)
+    mentions = {}
+    for ts, _, _, token, _ in signals:
+        mentions.setdefault(token, []).append(ts)
+    ticks = []
+    for token in sorted(mentions):
+        times = mentions[token]
+        price = math.exp(rng.uniform(-12, -4))
+        ts = times[0] - lead
+        pending = iter(times)
+        next_mention = next(pending, None)
+        while ts <= times[-1] + horizon:
+            price *= math.exp(rng.gauss(0, volatility))
+            while next_mention is not None and next_mention <= ts:
+                price *= math.exp(rng.gauss(0.05, 0.3))
+                next_mention = next(pending, None)
+            ticks.append((round(ts, 3), token, price))
+            ts += interval
+    ticks.sort(key=lambda tick: tick[0])
+    return ticks
+
+
+def save_ticks(ticks, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ts", "token", "price"])
+        for ts, token, price in ticks:
+            writer.writerow([ts, token, repr(price)])
+
+
+def trade_parameters(**overrides):
+    """default_trade_parameters() with sweep values applied (see SWEEP_PARAMETERS)."""
+    params = default_trade_parameters()
+    for name, value in overrides.items():
+        setattr(params, SWEEP_PARAMETERS.get(name, name), value)
+    return params
+
+
+def run_backtest(signals, ticks, params, seed=BACKTEST_SEED):
+    """Replay signals and ticks in time order through one TradeManager. Returns metrics."""
+    random.seed(seed)    # TradeOrder's slippage draws
+    last_price = {}
+    manager = TradeManager(params, price_source=last_price.get)
+    deduplicator = SignalDeduplicator()
+    costs = {}           # position id -> SOL spent
+    proceeds = {}        # position id -> SOL received so far
+    closed = []          # realized PnL per closed position
+    stats = {"signals": len(signals), "entries": 0, "no_price": 0, "suppressed": 0}
+    realized = peak = max_drawdown = 0.0
+
+    def settle(exits):
+        nonlocal realized, peak, max_drawdown
+        for event in exits:
+            position_id = event["position_id"]
+            proceeds[position_id] = proceeds.get(position_id, 0.0) + event["proceeds"]
+            if manager.get_position(position_id) is None:
+                pnl = proceeds.pop(position_id) - costs.pop(position_id)
+                closed.append(pnl)
+                realized += pnl
+                peak = max(peak, realized)
+                max_drawdown = max(max_drawdown, peak - realized)
+
+    tick_index = 0
+    for ts, tweet_id, author, token, parsed in signals:
+        while tick_index < len(ticks) and ticks[tick_index][0] <= ts:
+            _, tick_token, price = ticks[tick_index]
+            last_price[tick_token] = price
+            settle(manager.on_prices(((tick_token, price),)))
+            tick_index += 1
+        if deduplicator.seen_tweet(tweet_id, ts):
+            continue
+        if token not in last_price:
+            stats["no_price"] += 1
+            continue
+        if deduplicator.claim_trade(token, author, ts) != DEDUP_ACCEPT:
+            stats["suppressed"] += 1
+            continue
+        trade = manager.execute_trade(parsed)
+        if trade:
+            stats["entries"] += 1
+            costs[trade["position_id"]] = params.trade_amount + params.priority_fee
+        else:
+            deduplicator.release_trade(token, author, ts)
+    for _, tick_token, price in ticks[tick_index:]:
+        last_price[tick_token] = price
+        settle(manager.on_prices(((tick_token, price),)))
+
+    open_value = sum(position.remaining * last_price.get(position.token, 0.0)
+                     for position in manager.open_positions())
+    unrealized = open_value + sum(proceeds.values()) - sum(costs.values())
+    wins = sum(1 for pnl in closed if pnl > 0)
+    return dict(stats, **{
+        "closed": len(closed),
+        "open": len(costs),
+        "hit_rate": round(wins / len(closed), 4) if closed else None,
+        "realized_pnl": round(realized, 6),
+        "unrealized_pnl": round(unrealized, 6),
+        "total_pnl": round(realized + unrealized, 6),
+        "max_drawdown": round(max_drawdown, 6),
+        "invested": round(stats["entries"] * (params.trade_amount + params.priority_fee), 6),
+    })
+
+
+# ----------------------------------------------------------------------
+# Parameter sweeps
+# ----------------------------------------------------------------------
+_worker_data = None
+
+
+def _init_worker(signals, ticks, seed):
+    global _worker_data
+    logging.disable(logging.INFO)    # place_trade logs every entry
+    _worker_data = (signals, ticks, seed)
+
+
+def _run_combination(combination):
+    signals, ticks, seed = _worker_data
+    return dict(combination, **run_backtest(signals, ticks, trade_parameters(**combination), seed))
+
+
+def sweep(signals, ticks, grid, workers=None, seed=BACKTEST_SEED):
+    """
+    Backtest every combination of `grid` ({parameter: [values]}) across
+    `workers` processes. Returns results sorted by total PnL, best first.
+    """
+    names = list(grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    workers = min(workers or os.cpu_count() or 1, len(combinations))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(signals, ticks, seed)) as pool:
+        results = list(pool.map(_run_combination, combinations))
+    results.sort(key=lambda result: result["total_pnl"], reverse=True)
+    return results
+
+
+def _values(text):
+    return [float(value) for value in text.split(",") if value]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the tweet-signal strategy.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ticks_command = commands.add_parser("ticks", help="write synthetic ticks for a corpus")
+    ticks_command.add_argument("corpus")
+    ticks_command.add_argument("path")
+    ticks_command.add_argument("--seed", type=int, default=BACKTEST_SEED)
+    ticks_command.add_argument("--interval", type=float, default=1.0, help="seconds between ticks")
+
+    for name, help_text in (("run", "backtest one parameter set"),
+                            ("sweep", "backtest every combination of parameter values")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("corpus")
+        command.add_argument("ticks")
+        command.add_argument("--seed", type=int, default=BACKTEST_SEED)
+        for parameter in SWEEP_PARAMETERS:
+            flag = "--" + parameter.replace("_", "-")
+            if name == "run":
+                command.add_argument(flag, type=float)
+            else:
+                command.add_argument(flag, type=_values, help="comma-separated values")
+        if name == "sweep":
+            command.add_argument("--workers", type=int, help="processes (default: one per core)")
+            command.add_argument("--top", type=int, default=10, help="results to print")
+
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    from replay import load_corpus
+    signals = parse_corpus(load_corpus(args.corpus))
+
+    if args.command == "ticks":
+        ticks = generate_ticks(signals, args.seed, args.interval)
+        save_ticks(ticks, args.path)
+        print(f"Wrote {len(ticks)} ticks for {len({tick[1] for tick in ticks})} tokens to {args.path}")
+        return 0
+
+    ticks = load_ticks(args.ticks)
+    chosen = {parameter: getattr(args, parameter) for parameter in SWEEP_PARAMETERS
+              if getattr(args, parameter) is not None}
+    if args.command == "run":
+        report = run_backtest(signals, ticks, trade_parameters(**chosen), args.seed)
+        print(json.dumps(dict(chosen, **report), indent=2))
+        return 0
+
+    if not chosen:
+        parser.error("sweep needs at least one of " +
+                     ", ".join("--" + p.replace("_", "-") for p in SWEEP_PARAMETERS))
+    results = sweep(signals, ticks, chosen, args.workers, args.seed)
+    print(json.dumps(results[:args.top], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
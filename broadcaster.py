@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+broadcaster.py
+
+Batched, coalesced Socket.IO broadcasting with per-client rate limiting.
+
+Producers call publish() from any thread; nothing is emitted inline. Every
+`window` seconds a single background task flushes what was published. Each
+event targets one or more rooms and every client gets, in one "batch" frame,
+the events aimed at any room it is in (once, however many of its rooms
+match). Clients that would receive the same events share one emit, so the
+frame is serialized once per distinct selection rather than once per client:
+
+    socket.on('batch', frame => frame.events.forEach(({event, data}) => ...))
+
+Events published with the same `key` inside one window are merged (the last
+one wins). Each client has a token bucket of `max_client_rate` frames per
+second; a client that has used up its budget is left out of the frame
+and its events go to a bounded per-client outbox instead, where keyed
+updates replace older ones and the oldest unkeyed events are dropped when it
+is full. The outbox is delivered as soon as the client has budget again, so
+a slow client gets fewer, larger frames instead of an ever-growing buffer.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from itertools import count
+
+from flask import request
+
+from metrics import registry
+
+BROADCAST_WINDOW = float(os.getenv("BROADCAST_WINDOW_MS", "50")) / 1000
+MAX_CLIENT_RATE = float(os.getenv("BROADCAST_MAX_CLIENT_RATE", "20"))
+MAX_CLIENT_QUEUE = int(os.getenv("BROADCAST_MAX_CLIENT_QUEUE", "200"))
+
+BATCH_EVENT = "batch"
+ALL_CLIENTS = None   # room value meaning "every connected client"
+
+
+class _ClientState:
+    __slots__ = ("sid", "rooms", "tokens", "updated_at", "outbox",
+                 "frames_sent", "events_dropped", "events_merged", "throttled")
+
+    def __init__(self, sid, rate):
+        self.sid = sid
+        self.rooms = set()
+        self.tokens = rate
+        self.updated_at = time.monotonic()
+        self.outbox = OrderedDict()   # key -> (event, data)
+        self.frames_sent = 0
+        self.events_dropped = 0
+        self.events_merged = 0
+        self.throttled = 0
+
+    def take_token(self, rate, now):
+        self.tokens = min(rate, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class Broadcaster:
+    """Collects published events and emits them as batched frames."""
+
+    def __init__(self, socketio, window=BROADCAST_WINDOW, max_client_rate=MAX_CLIENT_RATE,
+                 max_client_queue=MAX_CLIENT_QUEUE, default_rooms=()):
+        self.socketio = socketio
+        # Rooms a client is put in when it connects.
+        self.default_rooms = tuple(default_rooms)
+        self.window = window
+        self.max_client_rate = max_client_rate
+        self.max_client_queue = max_client_queue
+        self._pending = OrderedDict()   # (rooms, key) -> (event, data, published at)
+        self._clients = {}
+        self._rooms = {}                # room -> set of sids
+        self._keys = count()
+        self._lock = threading.Lock()
+        self._started = False
+        self.frames_sent = 0
+        self.events_published = 0
+        # publish() -> emit, i.e. the cost of batching
+        self.queue_latency = registry.histogram(
+            "broadcast_queue_seconds", "Time events wait for the next batched socket frame.")
+
+    # ------------------------------------------------------------------
+    # Wiring
+    # ------------------------------------------------------------------
+    def attach(self):
+        """Track connecting/disconnecting clients and start the flush task."""
+        self.socketio.on_event("connect", self._on_connect)
+        self.socketio.on_event("disconnect", self._on_disconnect)
+        return self.start()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        self.socketio.start_background_task(self._run)
+        return self
+
+    def _on_connect(self, auth=None):
+        self.register(request.sid)
+
+    def _on_disconnect(self, *args):
+        self.unregister(request.sid)
+
+    def register(self, sid, rooms=None):
+        with self._lock:
+            client = self._clients[sid] = _ClientState(sid, self.max_client_rate)
+            for room in self.default_rooms if rooms is None else rooms:
+                client.rooms.add(room)
+                self._rooms.setdefault(room, set()).add(sid)
+
+    def unregister(self, sid):
+        with self._lock:
+            client = self._clients.pop(sid, None)
+            if client:
+                for room in client.rooms:
+                    members = self._rooms.get(room)
+                    if members is not None:
+                        members.discard(sid)
+                        if not members:
+                            del self._rooms[room]
+
+    def join(self, sid, room):
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None:
+                return False
+            client.rooms.add(room)
+            self._rooms.setdefault(room, set()).add(sid)
+        return True
+
+    def leave(self, sid, room):
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is not None:
+                client.rooms.discard(room)
+            members = self._rooms.get(room)
+            if members is not None:
+                members.discard(sid)
+                if not members:
+                    del self._rooms[room]
+
+    def rooms(self):
+        with self._lock:
+            return set(self._rooms)
+
+    def room_size(self, room):
+        with self._lock:
+            return len(self._rooms.get(room, ()))
+
+    def rooms_of(self, sid):
+        with self._lock:
+            client = self._clients.get(sid)
+            return set(client.rooms) if client else set()
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish(self, event, data, room=ALL_CLIENTS, key=None):
+        """
+        Queue an event for the next frame. `room` is a room name, a list of
+        room names, or ALL_CLIENTS. Events with the same (room, key) inside
+        one window are merged, keeping the newest.
+        """
+        if room is not ALL_CLIENTS:
+            room = (room,) if isinstance(room, str) else tuple(room)
+            if not room:
+                return
+        with self._lock:
+            self.events_published += 1
+            if key is None:
+                key = next(self._keys)
+            pending_key = (room, key)
+            if pending_key in self._pending:
+                del self._pending[pending_key]
+            self._pending[pending_key] = (event, data, time.monotonic())
+
+    def flush(self):
+        """Emit everything published since the last flush. Called by the loop."""
+        now = time.monotonic()
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            published = [(rooms, key, (event, data))
+                         for (rooms, key), (event, data, _) in pending.items()]
+
+            # Clients selecting the same events share one frame.
+            frames = OrderedDict()   # tuple of indexes into `published` -> [sid]
+            for client in self._clients.values() if published else ():
+                selected = tuple(i for i, (rooms, _, _) in enumerate(published)
+                                 if rooms is ALL_CLIENTS or not client.rooms.isdisjoint(rooms))
+                if not selected:
+                    continue
+                if client.outbox or not client.take_token(self.max_client_rate, now):
+                    client.throttled += 1
+                    self._enqueue(client, [published[i][1:] for i in selected])
+                else:
+                    client.frames_sent += 1
+                    frames.setdefault(selected, []).append(client.sid)
+
+            # Deliver backlogs to clients that have budget again.
+            backlogs = []
+            for client in self._clients.values():
+                if client.outbox and client.take_token(self.max_client_rate, now):
+                    backlogs.append((client.sid, list(client.outbox.values())))
+                    client.outbox.clear()
+                    client.frames_sent += 1
+
+        for selected, sids in frames.items():
+            self._emit([published[i][2] for i in selected], to=sids)
+        emitted_at = time.monotonic()
+        for _, _, published_at in pending.values():
+            self.queue_latency.observe((emitted_at - published_at) * 1000)
+        for sid, items in backlogs:
+            self._emit(items, to=sid)
+
+    def _enqueue(self, client, items):
+        outbox = client.outbox
+        for key, item in items:
+            if key in outbox:
+                del outbox[key]
+                client.events_merged += 1
+            outbox[key] = item
+        while len(outbox) > self.max_client_queue:
+            outbox.popitem(last=False)
+            client.events_dropped += 1
+
+    def _emit(self, items, **kwargs):
+        frame = {"events": [{"event": event, "data": data} for event, data in items]}
+        try:
+            self.socketio.emit(BATCH_EVENT, frame, **kwargs)
+            self.frames_sent += 1
+        except Exception as e:
+            logging.error(f"Broadcast emit failed: {e}")
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Broadcaster flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def stats(self):
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000,
+                "events_published": self.events_published,
+                "frames_sent": self.frames_sent,
+                "pending": len(self._pending),
+                "clients": {
+                    sid: {
+                        "queue_depth": len(client.outbox),
+                        "frames_sent": client.frames_sent,
+                        "throttled": client.throttled,
+                        "events_merged": client.events_merged,
+                        "events_dropped": client.events_dropped,
+                        "rooms": sorted(str(room) for room in client.rooms),
+                    }
+                    for sid, client in self._clients.items()
+                },
+            }
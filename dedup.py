@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+dedup.py
+
+Tweet deduplication and per-token / per-author trade debounce.
+
+Several tracked accounts often post the same mint within seconds, and one
+account may post it twice. Buying into the same illiquid pool repeatedly is
+pure loss, so every trade signal passes through a SignalDeduplicator:
+
+  - tweet IDs seen within `tweet_window` seconds are dropped outright
+    (stream reconnect backfill redelivers tweets);
+  - a mint traded within `mint_cooldown` seconds is not traded again;
+  - an author who triggered a trade within `author_cooldown` seconds does
+    not trigger another one.
+
+Cooldowns start when a trade is actually placed, not when its tweet is
+seen: check_trade() only looks, claim_trade() checks and starts them
+atomically right before the order goes out, and release_trade() takes a
+claim back if no trade came of it. A signal vetoed later on (no pool, fill
+risk, risk limits) therefore doesn't block the next one for the same mint.
+
+Each index is an insertion-ordered dict of key -> last timestamp. Because
+entries are refreshed by moving them to the end, the oldest entry is always
+first and expiry is an O(1) pop from the front. Every index is also capped at
+`max_entries`, so memory stays bounded under any burst.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+TWEET_DEDUP_WINDOW = float(os.getenv("TWEET_DEDUP_WINDOW", "600"))
+MINT_COOLDOWN = float(os.getenv("MINT_COOLDOWN_SECONDS", "300"))
+AUTHOR_COOLDOWN = float(os.getenv("AUTHOR_COOLDOWN_SECONDS", "30"))
+DEDUP_MAX_ENTRIES = int(os.getenv("DEDUP_MAX_ENTRIES", "50000"))
+
+# check() outcomes
+ACCEPT = "accept"
+DUPLICATE_TWEET = "duplicate_tweet"
+MINT_COOLDOWN_ACTIVE = "mint_cooldown"
+AUTHOR_COOLDOWN_ACTIVE = "author_cooldown"
+RELEASED = "released"
+
+
+class _WindowIndex:
+    """key -> last timestamp, oldest first, expiring after `window` seconds."""
+
+    __slots__ = ("window", "max_entries", "entries")
+
+    def __init__(self, window, max_entries):
+        self.window = window
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def active(self, key, now):
+        last = self.entries.get(key)
+        return last is not None and now - last < self.window
+
+    def discard(self, key, now):
+        """Forget key if it was last touched at `now`."""
+        if self.entries.get(key) == now:
+            del self.entries[key]
+
+    def touch(self, key, now):
+        self.entries[key] = now
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def expire(self, now):
+        entries = self.entries
+        while entries:
+            key, last = next(iter(entries.items()))
+            if now - last < self.window:
+                break
+            entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SignalDeduplicator:
+    """Decides whether a tweet, and the trade it signals, should go through."""
+
+    def __init__(self, tweet_window=TWEET_DEDUP_WINDOW, mint_cooldown=MINT_COOLDOWN,
+                 author_cooldown=AUTHOR_COOLDOWN, max_entries=DEDUP_MAX_ENTRIES):
+        self.tweets = _WindowIndex(tweet_window, max_entries)
+        self.mints = _WindowIndex(mint_cooldown, max_entries)
+        self.authors = _WindowIndex(author_cooldown, max_entries)
+        self.counts = {ACCEPT: 0, DUPLICATE_TWEET: 0,
+                       MINT_COOLDOWN_ACTIVE: 0, AUTHOR_COOLDOWN_ACTIVE: 0, RELEASED: 0}
+        self._lock = threading.Lock()
+
+    def seen_tweet(self, tweet_id, now=None):
+        """Record tweet_id; return True if it was already seen in the window."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.tweets.expire(now)
+            if self.tweets.active(tweet_id, now):
+                self.counts[DUPLICATE_TWEET] += 1
+                return True
+            self.tweets.touch(tweet_id, now)
+            return False
+
+    def check_trade(self, mint, author=None, now=None):
+        """
+        Return ACCEPT if a trade in `mint` triggered by `author` may go ahead,
+        otherwise the reason it is suppressed. Starts no cooldown.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            outcome = self._outcome(mint, author, now)
+            self.counts[outcome] += 1
+            return outcome
+
+    def claim_trade(self, mint, author=None, now=None):
+        """
+        Like check_trade(), but on ACCEPT also start the cooldowns, in one
+        step, so two concurrent signals for a mint can't both be placed.
+        Call right before placing the order; release_trade() if it isn't.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            outcome = self._outcome(mint, author, now)
+            if outcome == ACCEPT:
+                self.mints.touch(mint, now)
+                if author is not None:
+                    self.authors.touch(author, now)
+            else:
+                self.counts[outcome] += 1
+            return outcome
+
+    def release_trade(self, mint, author=None, now=None):
+        """Take back a claim_trade() made at `now` whose order wasn't placed."""
+        with self._lock:
+            self.mints.discard(mint, now)
+            if author is not None:
+                self.authors.discard(author, now)
+            self.counts[RELEASED] += 1
+
+    def _outcome(self, mint, author, now):
+        self.mints.expire(now)
+        self.authors.expire(now)
+        if self.mints.active(mint, now):
+            return MINT_COOLDOWN_ACTIVE
+        if author is not None and self.authors.active(author, now):
+            return AUTHOR_COOLDOWN_ACTIVE
+        return ACCEPT
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts, tweets_tracked=len(self.tweets),
+                        mints_cooling=len(self.mints), authors_cooling=len(self.authors))
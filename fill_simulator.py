@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+fill_simulator.py
+
+Vectorised Monte Carlo fill simulation for buys against a constant-product
+(Raydium-style x * y = k) pool.
+
+For a trade of `amount` SOL every scenario draws an adverse pre-trade price
+move from the order's slippage range (other buys landing first), applies it
+to the pool reserves with k held constant, then swaps `amount` less the pool
+fee through the moved pool. A scenario whose effective price ends up beyond
+`max_slippage` fails (the swap's minimum-out check), costing only the
+priority fee. Losses are measured against the quoted mid price, as a share
+of what the trade spends (amount + priority fee).
+
+The uniform draws are made once per simulator, sorted, and reused for every
+call (common random numbers), so candidate sizes are compared on identical
+scenarios and a call is a handful of array operations. Because a bigger
+adverse move always means fewer tokens, sorted draws give losses that are
+already in order, and the tail percentiles are index lookups rather than a
+sort (unless max_slippage makes some scenarios fail):
+
+    sim = FillSimulator()
+    pool = Pool(sol_reserve=80.0, token_reserve=2.4e7)
+    sim.simulate(0.5, pool, slippage_tolerance=(1, 3), priority_fee=0.01)
+    sim.optimal_size(pool, exit_price=pool.mid_price * 1.2, ...)
+
+Run `python fill_simulator.py` for timings.
+"""
+
+import os
+import time
+import argparse
+
+import numpy as np
+
+FILL_SCENARIOS = int(os.getenv("FILL_SCENARIOS", "2000"))
+POOL_FEE_BPS = float(os.getenv("POOL_FEE_BPS", "25"))
+FILL_SIZE_STEPS = int(os.getenv("FILL_SIZE_STEPS", "16"))
+
+TAIL_PERCENTILES = (50, 95, 99)
+
+
+class Pool:
+    """Reserves of a SOL-quoted constant-product pool."""
+
+    __slots__ = ("sol_reserve", "token_reserve", "fee_bps")
+
+    def __init__(self, sol_reserve, token_reserve, fee_bps=POOL_FEE_BPS):
+        self.sol_reserve = sol_reserve
+        self.token_reserve = token_reserve
+        self.fee_bps = fee_bps
+
+    @property
+    def mid_price(self):
+        return self.sol_reserve / self.token_reserve
+
+
+class FillEstimate:
+    """Summary of the scenarios for one trade size. Losses are fractions of the spend."""
+
+    __slots__ = ("amount", "expected_tokens", "expected_price", "fill_rate",
+                 "expected_loss", "loss_p50", "loss_p95", "loss_p99", "expected_profit")
+
+    def __init__(self, amount, expected_tokens, expected_price, fill_rate, expected_loss,
+                 loss_p50, loss_p95, loss_p99, expected_profit=None):
+        self.amount = amount
+        self.expected_tokens = expected_tokens
+        self.expected_price = expected_price
+        self.fill_rate = fill_rate
+        self.expected_loss = expected_loss
+        self.loss_p50 = loss_p50
+        self.loss_p95 = loss_p95
+        self.loss_p99 = loss_p99
+        self.expected_profit = expected_profit
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class FillSimulator:
+    def __init__(self, scenarios=FILL_SCENARIOS, seed=None):
+        self.scenarios = scenarios
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        self._draws = np.sort(np.random.default_rng(seed).random(self.scenarios))
+        # "lower" percentiles: the loss at these positions of the sorted scenarios
+        self._tail_index = [int(q / 100 * (self.scenarios - 1)) for q in TAIL_PERCENTILES]
+
+    def _fills(self, amounts, pool, slippage_tolerance, priority_fee, max_slippage):
+        """
+        tokens and spend per (size, scenario), and whether every scenario
+        filled (losses then rise with the sorted draws). amounts is a column.
+        """
+        low, high = slippage_tolerance
+        # Price moves up by (1 + s) with k fixed: x * sqrt(1 + s), y / sqrt(1 + s).
+        shift = np.sqrt(1 + (low + (high - low) * self._draws) / 100)
+        sol = pool.sol_reserve * shift
+        tokens_in_pool = pool.token_reserve / shift
+        amount_in = amounts * (1 - pool.fee_bps / 10000)
+        tokens = tokens_in_pool * amount_in / (sol + amount_in)
+        spend = np.broadcast_to(amounts + priority_fee, tokens.shape)
+        if max_slippage is not None:
+            limit = pool.mid_price * (1 + max_slippage / 100)
+            failed = amounts > tokens * limit
+            if failed.any():
+                tokens = np.where(failed, 0.0, tokens)
+                spend = np.where(failed, priority_fee, spend)
+                return tokens, spend, False
+        return tokens, spend, True
+
+    def _estimates(self, amounts, tokens, spend, ordered, pool, priority_fee, exit_price=None):
+        sizes = amounts[:, 0]
+        loss = (spend - tokens * pool.mid_price) / (amounts + priority_fee)
+        if ordered:
+            tails = loss[:, self._tail_index]
+        else:
+            # Failed scenarios cost only the fee, so the losses are out of order.
+            tails = np.partition(loss, self._tail_index, axis=1)[:, self._tail_index]
+        token_totals = tokens.sum(axis=1)
+        fills = np.count_nonzero(tokens, axis=1)
+        profit = None if exit_price is None else (tokens * exit_price - spend).mean(axis=1)
+        estimates = []
+        for i, amount in enumerate(sizes):
+            estimates.append(FillEstimate(
+                amount=float(amount),
+                expected_tokens=float(token_totals[i] / self.scenarios),
+                # Average price paid over the scenarios that filled.
+                expected_price=float(amount * fills[i] / token_totals[i]) if fills[i] else None,
+                fill_rate=float(fills[i] / self.scenarios),
+                expected_loss=float(loss[i].mean()),
+                loss_p50=float(tails[i, 0]),
+                loss_p95=float(tails[i, 1]),
+                loss_p99=float(tails[i, 2]),
+                expected_profit=None if profit is None else float(profit[i]),
+            ))
+        return estimates
+
+    def simulate(self, amount, pool, slippage_tolerance, priority_fee, max_slippage=None,
+                 exit_price=None):
+        """FillEstimate for buying `amount` SOL of the pool's token."""
+        return self.simulate_sizes([amount], pool, slippage_tolerance, priority_fee,
+                                   max_slippage, exit_price)[0]
+
+    def simulate_sizes(self, amounts, pool, slippage_tolerance, priority_fee, max_slippage=None,
+                       exit_price=None):
+        """One FillEstimate per candidate size, all sizes in one vectorised pass."""
+        amounts = np.asarray(amounts, dtype=float).reshape(-1, 1)
+        tokens, spend, ordered = self._fills(amounts, pool, slippage_tolerance, priority_fee,
+                                             max_slippage)
+        return self._estimates(amounts, tokens, spend, ordered, pool, priority_fee, exit_price)
+
+    def optimal_size(self, pool, exit_price, slippage_tolerance, priority_fee, min_amount=0.1,
+                     max_amount=1.0, steps=FILL_SIZE_STEPS, max_slippage=None, max_tail_loss=None):
+        """
+        The size in [min_amount, max_amount] with the highest expected profit
+        when the tokens are later sold at `exit_price`, among sizes that are
+        expected to make money and whose 99th-percentile loss is within
+        `max_tail_loss`. None if no size is.
+        """
+        amounts = np.linspace(min_amount, max_amount, steps)
+        estimates = self.simulate_sizes(amounts, pool, slippage_tolerance, priority_fee,
+                                        max_slippage, exit_price)
+        eligible = [estimate for estimate in estimates if estimate.expected_profit > 0
+                    and (max_tail_loss is None or estimate.loss_p99 <= max_tail_loss)]
+        if not eligible:
+            return None
+        return max(eligible, key=lambda estimate: estimate.expected_profit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the fill simulator.")
+    parser.add_argument("--scenarios", type=int, default=FILL_SCENARIOS)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args(argv)
+    sim = FillSimulator(args.scenarios, seed=7)
+    pool = Pool(sol_reserve=80.0, token_reserve=2.4e7)
+    for name, call in (
+        ("simulate", lambda: sim.simulate(0.5, pool, (1, 3), 0.01)),
+        ("optimal_size", lambda: sim.optimal_size(pool, pool.mid_price * 1.2, (1, 3), 0.01)),
+    ):
+        call()
+        started = time.perf_counter()
+        for _ in range(args.calls):
+            result = call()
+        elapsed = (time.perf_counter() - started) / args.calls
+        print(f"{name:>12}: {elapsed * 1e6:8.1f} us/call  {result.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 'use client';
 
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { io } from 'socket.io-client';
 
 const SOCKET_URL = process.env.NEXT_PUBLIC_SOCKET_URL || 'http://localhost:5002';
@@ -20,12 +20,25 @@ interface Tweet {
 }
 
 interface WhaleActivity {
+  seq: number;
   time: string;
   wallet: string;
   amount: number;
   type: 'buy' | 'sell';
 }
 
+interface WhalePage {
+  activities: WhaleActivity[];
+  cursor: number;
+  gap: boolean;
+  epoch: number;
+}
+
+// The server batches socket output: one 'batch' frame carries many events.
+interface SocketFrame {
+  events: { event: string; data: any }[];
+}
+
 interface BotSettings {
   tradeAmount: number;
   stopLoss: number;
@@ -44,17 +57,61 @@ export default function Dashboard() {
     stopLoss: 5,
     riskReward: 3,
   });
+  // Sequence number of the newest whale event we hold, and the server's
+  // epoch it belongs to (seq numbers start over when the server restarts).
+  const whaleCursor = useRef(0);
+  const whaleEpoch = useRef<number | null>(null);
+
+  const resetWhales = (epoch: number) => {
+    whaleEpoch.current = epoch;
+    whaleCursor.current = 0;
+    setWhaleActivity([]);
+  };
+
+  // Merge events (oldest first) newer than our cursor, newest on top.
+  const applyWhaleEvents = (events: WhaleActivity[]) => {
+    const fresh = events.filter(event => event.seq > whaleCursor.current);
+    if (fresh.length === 0) return;
+    whaleCursor.current = fresh[fresh.length - 1].seq;
+    setWhaleActivity(prev => [...fresh.reverse(), ...prev].slice(0, 50));
+  };
+
+  // Fetch only the events we missed (or the latest page on first load).
+  const fetchWhaleDelta = async (): Promise<void> => {
+    try {
+      const since = whaleCursor.current ? `?since=${whaleCursor.current}` : '';
+      const whaleRes = await fetch(`${API_URL}/api/whale-activity${since}`);
+      const page: WhalePage = await whaleRes.json();
+      if (since && (page.epoch !== whaleEpoch.current || page.cursor < whaleCursor.current)) {
+        // The server restarted: our cursor means nothing now. Start over.
+        resetWhales(page.epoch);
+        return fetchWhaleDelta();
+      }
+      if (page.gap) {
+        // Events after our cursor were already dropped; replace the list.
+        resetWhales(page.epoch);
+      }
+      whaleEpoch.current = page.epoch;
+      applyWhaleEvents(page.activities);
+    } catch (error) {
+      console.error('Error fetching whale activity:', error);
+    }
+  };
 
   useEffect(() => {
     // Connect to backend
     const socket = io(SOCKET_URL, {
       transports: ['websocket'],
-      reconnectionAttempts: 5
+      reconnectionAttempts: 5,
+      // Only the topics this page renders are sent to us.
+      auth: { topics: ['tweets', 'whales'] }
     });
 
     socket.on('connect', () => {
       console.log('Connected to backend');
       setSocketConnected(true);
+      // Covers both the initial load and the gap after a reconnect.
+      fetchWhaleDelta();
     });
 
     socket.on('disconnect', () => {
@@ -62,37 +119,31 @@ export default function Dashboard() {
       setSocketConnected(false);
     });
 
-    socket.on('new_tweet', (tweet: Tweet) => {
-      console.log('New tweet received:', tweet);
-      setTweets(prev => [tweet, ...prev].slice(0, 50));
-    });
+    const handlers: Record<string, (data: any) => void> = {
+      new_tweet: (tweet: Tweet) => {
+        console.log('New tweet received:', tweet);
+        setTweets(prev => [tweet, ...prev].slice(0, 50));
+      },
+      new_whale_activity: (activity: WhaleActivity) => {
+        console.log('New whale activity received:', activity);
+        if (activity.seq === whaleCursor.current + 1) {
+          applyWhaleEvents([activity]);
+        } else {
+          // We missed something in between; fetch just the gap.
+          fetchWhaleDelta();
+        }
+      },
+    };
 
-    socket.on('new_whale_activity', (activity: WhaleActivity) => {
-      console.log('New whale activity received:', activity);
-      setWhaleActivity(prev => [activity, ...prev].slice(0, 50));
+    socket.on('batch', (frame: SocketFrame) => {
+      frame.events.forEach(({ event, data }) => handlers[event]?.(data));
     });
 
-    // Fetch initial data
-    fetchData();
-
     return () => {
       socket.disconnect();
     };
   }, []);
 
-  const fetchData = async () => {
-    try {
-      const [whaleRes] = await Promise.all([
-        fetch(`${API_URL}/api/whale-activity`)
-      ]);
-
-      const whaleData = await whaleRes.json();
-      setWhaleActivity(whaleData.activities);
-    } catch (error) {
-      console.error('Error fetching data:', error);
-    }
-  };
-
   const connectWallet = async () => {
     try {
       if (typeof window !== 'undefined' && (window as any).phantom?.solana) {
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+http_client.py
+
+Shared HTTP client for every outbound call the bot makes.
+
+  - One requests.Session per host, each with its own keep-alive connection
+    pool, so repeat calls skip the TCP+TLS handshake.
+  - Explicit (connect, read) timeouts on every request.
+  - Retries with jittered exponential backoff on connection errors, 429 and
+    5xx responses, honouring Retry-After and Twitter's x-rate-limit-reset.
+  - Per-host latency histograms (see metrics.py), also for sessions owned by
+    third-party clients such as tweepy via instrument().
+  - TWITTER_API_BASE_URL sends every api.twitter.com request, ours and
+    tweepy's, to another base URL such as the local mock (mock_twitter.py).
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Histogram, registry
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+
+TWITTER_API_HOST = "api.twitter.com"
+TWITTER_API_BASE_URL = os.getenv("TWITTER_API_BASE_URL", "").rstrip("/")
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+
+def retry_after_seconds(response, now=None):
+    """
+    Seconds the server asked us to wait, from Retry-After (delta or HTTP date)
+    or Twitter's x-rate-limit-reset (epoch seconds). None if not present.
+    """
+    now = time.time() if now is None else now
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+    reset = response.headers.get("x-rate-limit-reset")
+    if reset and response.headers.get("x-rate-limit-remaining", "0") == "0":
+        try:
+            return max(0.0, float(reset) - now)
+        except ValueError:
+            pass
+    return None
+
+
+def default_redirects():
+    return {TWITTER_API_HOST: TWITTER_API_BASE_URL} if TWITTER_API_BASE_URL else {}
+
+
+class RedirectingAdapter(HTTPAdapter):
+    """HTTPAdapter that sends requests for some hosts to another base URL."""
+
+    def __init__(self, redirects=None, **kwargs):
+        self.redirects = redirects or {}
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if self.redirects:
+            parts = urlsplit(request.url)
+            base = self.redirects.get(parts.netloc)
+            if base:
+                request.url = base + parts.path + (f"?{parts.query}" if parts.query else "")
+        return super().send(request, **kwargs)
+
+
+class HttpClient:
+    """Pooled, instrumented HTTP client. Use the module-level `http` instance."""
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, backoff_base=0.25, backoff_cap=8.0,
+                 max_retry_wait=60.0, pool_maxsize=POOL_MAXSIZE, redirects=None):
+        self.timeout = (connect_timeout, read_timeout)
+        # host -> base URL, e.g. {"api.twitter.com": "http://127.0.0.1:5055"}
+        self.redirects = default_redirects() if redirects is None else redirects
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_wait = max_retry_wait
+        self.pool_maxsize = pool_maxsize
+        self._sessions = {}
+        self._histograms = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+    def request(self, method, url, retries=None, timeout=None, **kwargs):
+        """
+        Send a request through the host's pooled session. Retries idempotent
+        requests on connection errors, 429 and 5xx. Returns the last response
+        (even if it is an error status) or raises the last exception.
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        session = self.session_for(host)
+        retries = self.max_retries if retries is None else retries
+        if method not in IDEMPOTENT_METHODS:
+            retries = 0
+        timeout = timeout or self.timeout
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(host, started, error=True)
+                if attempt >= retries:
+                    raise
+                wait = self._backoff(attempt)
+                logging.warning(f"{method} {host} failed ({e}); retrying in {wait:.2f}s")
+            else:
+                self._record(host, started)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                wait = retry_after_seconds(response)
+                if wait is None:
+                    wait = self._backoff(attempt)
+                elif wait > self.max_retry_wait:
+                    logging.warning(f"{method} {host} rate limited for {wait:.0f}s, not retrying")
+                    return response
+                logging.warning(f"{method} {host} returned {response.status_code}; "
+                                f"retrying in {wait:.2f}s")
+                response.close()
+            time.sleep(wait)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    def session_for(self, host):
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._sessions[host] = self._new_session()
+        return session
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = RedirectingAdapter(self.redirects, pool_connections=1,
+                                     pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def instrument(self, session):
+        """
+        Give a session owned by another library (e.g. tweepy) a pooled adapter
+        and record its response latencies in our per-host histograms.
+        """
+        adapter = RedirectingAdapter(self.redirects, pool_connections=4,
+                                     pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        def record(response, *args, **kwargs):
+            host = urlsplit(response.url).netloc
+            self._histogram(host).observe(response.elapsed.total_seconds() * 1000)
+
+        session.hooks["response"].append(record)
+        return session
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def stats(self):
+        with self._lock:
+            hosts = list(self._histograms.items())
+            errors = dict(self._errors)
+        return {host: dict(histogram.as_dict(), errors=errors.get(host, 0))
+                for host, histogram in hosts}
+
+    def histograms(self):
+        with self._lock:
+            return dict(self._histograms)
+
+    def _histogram(self, host):
+        histogram = self._histograms.get(host)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(host, Histogram())
+        return histogram
+
+    def _record(self, host, started, error=False):
+        self._histogram(host).observe((time.perf_counter() - started) * 1000)
+        if error:
+            with self._lock:
+                self._errors[host] = self._errors.get(host, 0) + 1
+
+    def _backoff(self, attempt):
+        # "Full jitter" exponential backoff.
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Shared instance used by every module.
+http = HttpClient()
+
+
+@registry.collector
+def _host_histograms():
+    for host, histogram in http.histograms().items():
+        yield ("http_request_latency_seconds", "Outbound HTTP response latency per host.",
+               {"host": host}, histogram)
@@ -13,36 +13,59 @@ Develop and run this file on Cursor.
 """
 
 import os
-import re
+import copy
 import time
+_IMPORT_STARTED = time.perf_counter()
 import random
 import threading
 import logging
-import requests
-from datetime import datetime
-from flask import Flask, jsonify, render_template_string, request
+from contextlib import contextmanager
+from flask import Flask, Response, jsonify, render_template_string, request
 from dotenv import load_dotenv
-from flask_socketio import SocketIO, emit
-import eventlet
-from tweepy import StreamingClient, StreamRule, Client
-import tweepy
-from nltk.sentiment import SentimentIntensityAnalyzer
+from flask_socketio import SocketIO
 from flask_cors import CORS
+from signal_extractor import SignalExtractor
+from signal_extractor import addresses as extracted_addresses
+from signal_extractor import cashtags as extracted_cashtags
+from sentiment import SentimentScorer
+from pipeline import Pipeline, Stage, per_item
+from dedup import SignalDeduplicator, ACCEPT as DEDUP_ACCEPT
+from top_traders import top_traders_cache
+from http_client import http
+from metrics import registry, PROMETHEUS_CONTENT_TYPE, FINE_BUCKETS_MS, GEOMETRIC_BUCKETS_MS
+from stream_rules import StreamRuleManager
+from whale_store import WhaleEventStore
+from broadcaster import Broadcaster
+from topics import TopicRouter
+from topology import ProcessTopology, PROCESS_ROLE_ENV, DECISION_ROLE
+from scalping import ScalpingEngine
+from trade_journal import TradeJournal, TRADE_JOURNAL_PATH
+from risk_engine import RiskEngine, RiskLimits
+from settings_store import SettingsStore
+from price_feed import (PriceCache, DexscreenerPriceFeed, ReplayPriceFeed,
+                        SimulatedPriceFeed)
+from trading import TradeManager, default_trade_parameters
 
-# --- Flask & Web Dashboard Imports ---
-# (Flask is used for a simple web dashboard.)
-
-# --- Twitter Streaming & Sentiment Analysis Imports ---
-import tweepy
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-
-# Download the VADER lexicon if not already available.
-nltk.download('vader_lexicon', quiet=True)
+# tweepy, nltk and eventlet are imported by the subsystems that need them
+# (the stream listener, the sentiment analyzer and the socket server), not
+# here, so importing this module stays fast and never touches the network.
+# The VADER lexicon is read from local disk; see sentiment.py.
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 
+# Startup phases in milliseconds, logged before the server starts and served
+# at /api/startup.
+startup_timings = {}
+
+@contextmanager
+def startup_phase(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
 # --------------------------------------------------------------------
 # Configuration & Environment Variables
 # --------------------------------------------------------------------
@@ -59,28 +82,69 @@ TRACKED_TWITTER_ACCOUNTS = [
     "raydium_io"         # Raydium DEX account
 ]
 
-# Hypothetical Dexscreener API endpoint for top traders
-DEXSCREENER_TOP_TRADERS_API_URL = "https://api.dexscreener.com/latest/traders"
-
 # Add this near the top of the file, after the TRACKED_TWITTER_ACCOUNTS definition
 twitter_stream = None
 
+SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "eventlet")
+# The reloader imports and runs main() again in a child process: twice the
+# startup, and a second stream connection. Opt in with FLASK_RELOADER=1.
+USE_RELOADER = os.getenv("FLASK_RELOADER", "0") == "1"
+# "single" runs every pipeline stage on threads in this process;
+# "multiprocess" moves parsing and trading into worker processes (topology.py).
+BOT_TOPOLOGY = os.getenv("BOT_TOPOLOGY", "single")
+# Only the process that trades builds the position book: every process in
+# single mode, the decision process in multiprocess mode.
+OWNS_BOOK = BOT_TOPOLOGY != "multiprocess" or os.getenv(PROCESS_ROLE_ENV) == DECISION_ROLE
+
 # Add after existing global variables
-whale_activity_data = []
+whale_store = WhaleEventStore()
 
-# Add near your other global variables
-user_settings = {
+# User settings: read a consistent snapshot with settings_store.snapshot
+# (no lock), change them with settings_store.update() (see settings_store.py).
+SETTINGS_PATH = os.getenv("SETTINGS_PATH", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "settings.json"))
+DEFAULT_SETTINGS = {
     "trade_amount": 0.5,  # SOL
-    "stop_loss": 5,       # percent
-    "risk_reward": 3      # ratio
+    "stop_loss": 5.0,     # percent
+    "risk_reward": 3.0,   # ratio
+    # Risk limits (SOL, except max_open_positions); see risk_engine.py
+    **RiskLimits().as_dict()
+}
+# Dashboard field -> setting
+SETTINGS_FIELDS = {
+    "tradeAmount": "trade_amount",
+    "stopLoss": "stop_loss",
+    "riskReward": "risk_reward",
+    "capital": "capital",
+    "maxTotalExposure": "max_total_exposure",
+    "maxTokenExposure": "max_token_exposure",
+    "maxOpenPositions": "max_open_positions",
+    "maxDailyLoss": "max_daily_loss",
+}
+# Inclusive (minimum, maximum) per setting; anything else is rejected.
+SETTINGS_BOUNDS = {
+    "trade_amount": (0.001, 1000.0),
+    "stop_loss": (0.1, 100.0),
+    "risk_reward": (0.1, 100.0),
+    "capital": (0.001, 1e6),
+    "max_total_exposure": (0.0, 1e6),
+    "max_token_exposure": (0.0, 1e6),
+    "max_open_positions": (0, 10000),
+    "max_daily_loss": (0.0, 1e6),
 }
+settings_store = SettingsStore(DEFAULT_SETTINGS, SETTINGS_PATH, SETTINGS_BOUNDS)
 
 # --------------------------------------------------------------------
 # Flask Web Dashboard (Phantom Wallet & Dexscreener Tracker)
 # --------------------------------------------------------------------
 app = Flask(__name__)
 CORS(app)  # Enable CORS
-socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins="*")
+# Bound to the app in main(), which is when the async driver gets imported.
+socketio = SocketIO(cors_allowed_origins="*")
+# All socket output goes out as batched, rate-limited frames, and each client
+# only gets the topics it subscribed to.
+broadcaster = Broadcaster(socketio)
+topic_router = TopicRouter(broadcaster)
 
 # Update the INDEX_HTML template to include Bootstrap and new UI elements
 INDEX_HTML = """
@@ -219,6 +283,7 @@ INDEX_HTML = """
     <!-- JavaScript Libraries -->
     <script src="https://code.jquery.com/jquery-3.5.1.min.js"></script>
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@4.5.2/dist/js/bootstrap.bundle.min.js"></script>
+    <script src="https://cdn.socket.io/4.7.2/socket.io.min.js"></script>
 
     <script>
         // First, check if Phantom is available
@@ -328,6 +393,40 @@ INDEX_HTML = """
             }
         }
 
+        // Whale activity: keep the newest 50 rows, fetching only events
+        // newer than the last sequence number we rendered.
+        let whaleCursor = 0;
+        let whaleRows = [];
+
+        function applyWhaleEvents(events) {
+            const fresh = events.filter(event => event.seq > whaleCursor);
+            if (fresh.length === 0) return;
+            whaleCursor = fresh[fresh.length - 1].seq;
+            whaleRows = fresh.reverse().concat(whaleRows).slice(0, 50);
+            document.querySelector("#whaleActivityTable tbody").innerHTML = whaleRows.map(event => `<tr>
+                <td>${event.time}</td>
+                <td>${event.wallet}</td>
+                <td>${event.amount}</td>
+                <td>${event.type}</td>
+            </tr>`).join('');
+        }
+
+        async function fetchWhaleActivity() {
+            try {
+                const since = whaleCursor ? `?since=${whaleCursor}` : '';
+                const response = await fetch(`/api/whale-activity${since}`);
+                const data = await response.json();
+                applyWhaleEvents(data.activities);
+                if (whaleRows.length === 0) {
+                    document.querySelector("#whaleActivityTable tbody").innerHTML =
+                        "<tr><td colspan='4'>No whale activity yet</td></tr>";
+                }
+            } catch(err) {
+                console.error("Error fetching whale activity", err);
+            }
+        }
+        document.getElementById('refreshWhaleBtn').addEventListener('click', fetchWhaleActivity);
+
         // Auto-refresh data
         setInterval(fetchTopTraders, 30000);  // Every 30 seconds
         setInterval(fetchWhaleActivity, 30000);
@@ -409,9 +508,27 @@ INDEX_HTML = """
             }
         }
 
-        // WebSocket connection for real-time tweets
-        const socket = io();
-        socket.on('new_tweet', function(tweet) {
+        // WebSocket connection for real-time tweets; subscribe only to the
+        // topics this page renders.
+        const socket = io({auth: {topics: ['tweets', 'whales']}});
+        const socketHandlers = {};
+        // The server sends batched frames: {events: [{event, data}, ...]}
+        socket.on('batch', function(frame) {
+            frame.events.forEach(function(item) {
+                const handler = socketHandlers[item.event];
+                if (handler) handler(item.data);
+            });
+        });
+        // After a reconnect, fetch only the whale events we missed.
+        socket.on('connect', fetchWhaleActivity);
+        socketHandlers['new_whale_activity'] = function(event) {
+            if (event.seq === whaleCursor + 1) {
+                applyWhaleEvents([event]);
+            } else {
+                fetchWhaleActivity();
+            }
+        };
+        socketHandlers['new_tweet'] = function(tweet) {
             const tweetFeed = document.getElementById('tweetFeed');
             const tweetElement = document.createElement('div');
             tweetElement.className = 'alert alert-info mb-2';
@@ -434,7 +551,7 @@ INDEX_HTML = """
             if (tweetFeed.children.length > 50) {
                 tweetFeed.removeChild(tweetFeed.lastChild);
             }
-        });
+        };
 
         // Add event listeners
         document.getElementById('addTwitterAccount').addEventListener('click', addTwitterAccount);
@@ -457,198 +574,587 @@ def index():
 
 @app.route("/api/top-traders")
 def api_top_traders():
-    try:
-        response = requests.get(DEXSCREENER_TOP_TRADERS_API_URL, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        traders = data.get("traders", [])
-        logging.info("Fetched top traders data from Dexscreener.")
-    except Exception as e:
-        logging.error("Error fetching top traders: %s", e)
-        traders = [
-            {"wallet": "7Tz...dummy1", "volume": 1200},
-            {"wallet": "9Xf...dummy2", "volume": 950},
-            {"wallet": "3Ab...dummy3", "volume": 870}
-        ]
-    return jsonify({"traders": traders})
+    return jsonify({"traders": top_traders_cache.get()})
+
+@app.route("/api/top-traders/stats")
+def api_top_traders_stats():
+    return jsonify(top_traders_cache.stats())
+
+@app.route("/api/http/stats")
+def api_http_stats():
+    return jsonify(http.stats())
 
 # --------------------------------------------------------------------
-# Trade Simulation Module (Integrated with Raydium)
+# Prices (one cache for the book, scalping and dashboards; see price_feed.py)
 # --------------------------------------------------------------------
-class TradeParameters:
-    def __init__(self, trade_amount, slippage_tolerance, take_profit_multiplier,
-                 moonbag_percentage, priority_fee, stop_loss_percent=5,
-                 max_risk_percent=2, risk_reward_ratio=3):
-        self.trade_amount = trade_amount                # e.g., 0.5 SOL (0.1 to 1 SOL range)
-        self.slippage_tolerance = slippage_tolerance      # e.g., (15, 25) %
-        self.take_profit_multiplier = take_profit_multiplier  # e.g., 10x
-        self.moonbag_percentage = moonbag_percentage      # e.g., 15%
-        self.priority_fee = priority_fee                  # e.g., 0.01 SOL
-        # New risk management parameters
-        self.stop_loss_percent = stop_loss_percent
-        self.max_risk_percent = max_risk_percent
-        self.risk_reward_ratio = risk_reward_ratio
-
-class TradeOrder:
-    def __init__(self, token_symbol, entry_price, trade_params: TradeParameters):
-        self.token_symbol = token_symbol
-        self.entry_price = entry_price
-        self.trade_params = trade_params
-        self.target_price = entry_price * trade_params.take_profit_multiplier
-
-    def simulate_trade_execution(self):
-        applied_slippage = random.uniform(*self.trade_params.slippage_tolerance)
-        effective_price = self.entry_price * (1 + applied_slippage / 100)
-        tokens_acquired = self.trade_params.trade_amount / effective_price
-        logging.info(f"[{self.token_symbol}] Trade executed at effective price {effective_price:.4f} SOL "
-                     f"(entry {self.entry_price:.4f} SOL, slippage: {applied_slippage:.2f}%). "
-                     f"Tokens acquired: {tokens_acquired:.4f}")
-        return tokens_acquired, effective_price, applied_slippage
-
-class TradeManager:
-    def __init__(self):
-        pass
-
-    def place_trade(self, token_symbol, entry_price, trade_params: TradeParameters):
-        logging.info(f"Placing trade for {token_symbol}: Entry price = {entry_price} SOL, "
-                     f"Trade amount = {trade_params.trade_amount} SOL, Priority fee = {trade_params.priority_fee} SOL.")
-        order = TradeOrder(token_symbol, entry_price, trade_params)
-        tokens_acquired, effective_price, applied_slippage = order.simulate_trade_execution()
-        trade_details = {
-            "token": token_symbol,
-            "entry_price": entry_price,
-            "effective_price": effective_price,
-            "tokens_acquired": tokens_acquired,
-            "applied_slippage": applied_slippage,
-            "target_price": order.target_price,
-            "trade_amount": trade_params.trade_amount,
-            "priority_fee": trade_params.priority_fee,
-            "moonbag_percentage": trade_params.moonbag_percentage
-        }
-        logging.info(f"Trade details: {trade_details}")
-        return trade_details
-
-    def monitor_trade(self, trade_details, current_price):
-        target_price = trade_details["target_price"]
-        token = trade_details["token"]
-        if current_price >= target_price:
-            logging.info(f"[{token}] Target reached: Current price {current_price:.4f} SOL >= Target price {target_price:.4f} SOL.")
-            tokens_acquired = trade_details["tokens_acquired"]
-            retention_ratio = trade_details["moonbag_percentage"] / 100
-            tokens_to_sell = tokens_acquired * (1 - retention_ratio)
-            moonbag = tokens_acquired - tokens_to_sell
-            logging.info(f"[{token}] Executing take profit: Selling {tokens_to_sell:.4f} tokens, "
-                         f"retaining {moonbag:.4f} tokens as moonbag.")
-            return {
-                "take_profit_executed": True,
-                "tokens_sold": tokens_to_sell,
-                "moonbag": moonbag,
-                "current_price": current_price,
-                "target_price": target_price
-            }
-        else:
-            logging.info(f"[{token}] Trade active: Current price {current_price:.4f} SOL is below target {target_price:.4f} SOL.")
-            return {"take_profit_executed": False}
+PRICE_FEED = os.getenv("PRICE_FEED", "dexscreener")   # dexscreener | replay | simulated | none
+PRICE_REPLAY_FILE = os.getenv("PRICE_REPLAY_FILE")
+PRICE_REPLAY_SPEED = float(os.getenv("PRICE_REPLAY_SPEED", "1"))
+SIMULATED_PRICE_INTERVAL = float(os.getenv("SIMULATED_PRICE_INTERVAL_MS", "50")) / 1000
+# Tokens to price even without an open position.
+PRICE_WATCHLIST = [token for token in os.getenv("PRICE_WATCHLIST", "").split(",") if token]
+
+price_cache = PriceCache()
+price_feed = None
+
+def quote(token):
+    """
+    Entry price for token: the cached price, or on a miss (a mint nothing has
+    priced yet) one fetched from the feed right now. None if the configured
+    feed can't price it, so no position is opened that could never exit.
+    """
+    price = price_cache.price(token)
+    if price is None and price_feed is not None:
+        try:
+            price_cache.publish(price_feed.fetch([token]))
+        except Exception as e:
+            logging.warning(f"[{token}] Quote from {price_feed.name} failed: {e}")
+        price = price_cache.price(token)
+    return price
+
+# --------------------------------------------------------------------
+# Trade Execution (Integrated with Raydium, see trading.py)
+# --------------------------------------------------------------------
+# Every order is checked against these before it is placed.
+risk_engine = RiskEngine(RiskLimits.from_settings(settings_store.snapshot))
+# The single, long-lived trade manager that owns the position book (None in
+# the web and shard processes of the multiprocess topology).
+trade_manager = TradeManager(default_trade_parameters(), price_source=quote,
+                             risk_engine=risk_engine) if OWNS_BOOK else None
+# Opened by start_trading_tasks(), in the process that owns the book; set
+# TRADE_JOURNAL_PATH= (empty) to trade without one.
+trade_journal = None
+
+def open_trade_journal():
+    """Rebuild the book from the trade journal and journal to it from now on."""
+    global trade_journal
+    if not TRADE_JOURNAL_PATH:
+        return None
+    started = time.perf_counter()
+    trade_journal = TradeJournal(TRADE_JOURNAL_PATH)
+    replayed = trade_manager.recover(trade_journal)
+    logging.info(f"Trade journal {TRADE_JOURNAL_PATH}: replayed {replayed} records in "
+                 f"{(time.perf_counter() - started) * 1000:.1f} ms; {trade_manager.summary()}")
+    return trade_journal
 
 def execute_trade_on_raydium(token_symbol, entry_price):
     """
     Simulates executing a trade on the Raydium DEX.
     In a real implementation, you would integrate with Raydium's SDK/RPC.
+    The position then exits on ticks from the price cache.
     """
-    # Set trade parameters (you could adjust these or derive them from context)
-    params = TradeParameters(
-        trade_amount=0.5,              # between 0.1 and 1 SOL
-        slippage_tolerance=(15, 25),   # 15-25% slippage
-        take_profit_multiplier=10,     # 10x target
-        moonbag_percentage=15,         # keep 15% as moonbag
-        priority_fee=0.01              # example priority fee in SOL
-    )
-    manager = TradeManager()
-    trade_details = manager.place_trade(token_symbol, entry_price, params)
-    # For simulation, assume the current price reaches target immediately.
-    simulated_current_price = trade_details["target_price"]
-    result = manager.monitor_trade(trade_details, simulated_current_price)
-    logging.info(f"Raydium trade execution result: {result}")
-    return result
+    trade_details = trade_manager.place_trade(token_symbol, entry_price, trade_manager.trade_params)
+    if trade_details:
+        topic_router.publish_fill(trade_details)
+    return trade_details
+
+def apply_settings(settings):
+    """Trade with a settings snapshot from the next order on; runs wherever the book lives."""
+    risk_engine.update_limits(RiskLimits.from_settings(settings))
+    if trade_manager is None:
+        return
+    params = copy.copy(trade_manager.trade_params)
+    params.trade_amount = settings["trade_amount"]
+    params.stop_loss_percent = settings["stop_loss"]
+    params.risk_reward_ratio = settings["risk_reward"]
+    # Swapped whole, so an order never sees half of the new values.
+    trade_manager.trade_params = params
+
+@settings_store.subscribe
+def _on_settings_changed(settings):
+    # The decision process owns the book in multiprocess mode.
+    if process_topology is not None:
+        process_topology.update_settings(settings)
+    else:
+        apply_settings(settings)
+
+# Settings saved before a restart apply from the first trade.
+apply_settings(settings_store.snapshot)
+
+@app.route("/api/risk")
+def api_risk():
+    if process_topology is not None:
+        return jsonify(process_topology.decision_snapshot().get("risk"))
+    return jsonify(risk_engine.stats())
+
+@price_cache.subscribe
+def _apply_prices_to_book(ticks):
+    # Take-profits and stops fire off the shared cache; exits go out as fills.
+    for exit_event in trade_manager.on_prices([(tick.token, tick.price) for tick in ticks]):
+        topic_router.publish_fill(exit_event)
+
+@price_cache.subscribe
+def _broadcast_prices(ticks):
+    topic_router.publish_prices(ticks)
+
+def _priced_tokens():
+    tokens = {position.token for position in trade_manager.open_positions()}
+    tokens.update(PRICE_WATCHLIST)
+    if SCALPING_ENABLED:
+        tokens.update(SCALP_TOKENS)
+    return tokens
+
+def start_price_feed():
+    global price_feed
+    if PRICE_FEED == "dexscreener":
+        price_feed = DexscreenerPriceFeed(price_cache, _priced_tokens)
+    elif PRICE_FEED == "replay":
+        if not PRICE_REPLAY_FILE:
+            raise ValueError("PRICE_FEED=replay needs PRICE_REPLAY_FILE")
+        price_feed = ReplayPriceFeed(price_cache, PRICE_REPLAY_FILE, speed=PRICE_REPLAY_SPEED)
+    elif PRICE_FEED == "simulated":
+        price_feed = SimulatedPriceFeed(price_cache, _priced_tokens, interval=SIMULATED_PRICE_INTERVAL)
+    elif PRICE_FEED == "none":
+        return None
+    else:
+        raise ValueError(f"Unknown PRICE_FEED: {PRICE_FEED}")
+    logging.info(f"Price feed: {price_feed.name}")
+    return price_feed.start()
+
+@app.route("/api/prices")
+def api_prices():
+    tokens = request.args.get("tokens")
+    tokens = tokens.split(",") if tokens else None
+    if process_topology is not None:
+        snapshot = process_topology.decision_snapshot()
+        prices = snapshot.get("prices") or {}
+        if tokens is not None:
+            prices = {token: prices[token] for token in tokens if token in prices}
+        return jsonify({"prices": prices, "reported_at": snapshot.get("reported_at")})
+    return jsonify({
+        "prices": price_cache.snapshot(tokens),
+        "cache": price_cache.stats(),
+        "feed": price_feed.stats() if price_feed else None
+    })
+
+@app.route("/api/positions")
+def api_positions():
+    if process_topology is not None:
+        # The decision process owns the position book; serve its last report.
+        snapshot = process_topology.decision_snapshot()
+        return jsonify({"summary": snapshot.get("summary"),
+                        "positions": snapshot.get("positions", []),
+                        "journal": snapshot.get("journal"),
+                        "reported_at": snapshot.get("reported_at")})
+    positions = trade_manager.open_positions()
+    return jsonify({
+        "summary": trade_manager.summary(),
+        "positions": [position.as_dict() for position in positions],
+        "prices": price_cache.snapshot({position.token for position in positions}),
+        "journal": trade_journal.stats() if trade_journal else None
+    })
 
 # --------------------------------------------------------------------
 # Twitter Streaming & Real-Time Sentiment Analysis
 # --------------------------------------------------------------------
-# Initialize VADER sentiment analyzer.
-sia = SentimentIntensityAnalyzer()
+# VADER sentiment scorer (lazy analyzer, LRU cache on normalised text).
+sentiment_scorer = SentimentScorer()
 
-class TwitterStreamListener(StreamingClient):
-    def __init__(self, bearer_token, trade_manager):
-        super().__init__(bearer_token)
-        self.trade_manager = trade_manager
-        
-    def on_tweet(self, tweet):
-        if hasattr(tweet, 'text'):  # Ensure tweet has text content
-            # Parse tweet for trading signals
-            signals = self.parse_trading_signals(tweet.text)
-            
-            if signals:
-                # Emit to frontend via socketio
-                tweet_data = {
-                    "id": tweet.id,
-                    "text": tweet.text,
-                    "author": tweet.author_id,
-                    "created_at": tweet.created_at.isoformat(),
-                    "signals": signals
-                }
-                socketio.emit('new_tweet', tweet_data)
-                
-                # Execute trade if signals warrant it
-                if signals.get('should_trade', False):
-                    self.trade_manager.execute_trade(signals)
-    
-    def parse_trading_signals(self, text):
-        signals = {
-            'should_trade': False,
-            'token_address': None,
-            'token_symbol': None,
-            'sentiment': 0
-        }
-        
-        # Look for Solana token addresses
-        sol_address_match = re.search(r'[1-9A-HJ-NP-Za-km-z]{32,44}', text)
-        if sol_address_match:
-            signals['token_address'] = sol_address_match.group(0)
-            signals['should_trade'] = True
-            
-        # Look for cashtags or token symbols
-        token_matches = re.findall(r'\$([A-Za-z0-9]+)', text)
-        if token_matches:
-            signals['token_symbol'] = token_matches[0]
-            signals['should_trade'] = True
-            
-        return signals
+# Shared, precompiled extractor for mint addresses and cashtags.
+signal_extractor = SignalExtractor(scan_urls=os.getenv("SIGNAL_SCAN_URLS", "0") == "1")
 
-def start_twitter_stream():
-    # Create an instance of our stream listener using our bearer token.
-    stream = TwitterStreamListener(
-        bearer_token=TWITTER_BEARER_TOKEN,
-        trade_manager=trade_manager
-    )
-    
-    # Build a query rule to listen for tweets from our tracked accounts.
-    # Using Twitter API v2 syntax, we add rules like: "from:username"
-    # Note: You might need to convert usernames to user IDs in production.
-    rules = []
-    for username in TRACKED_TWITTER_ACCOUNTS:
-        rule_value = f"from:{username}"
-        rules.append(StreamRule(value=rule_value, tag=username))
+def parse_trading_signals_from_mentions(mentions):
+    signals = {
+        'should_trade': False,
+        'token_address': None,
+        'token_symbol': None,
+        'token_addresses': extracted_addresses(mentions),
+        'cashtags': extracted_cashtags(mentions),
+        'mentions': [mention._asdict() for mention in mentions],
+        'sentiment': 0
+    }
+
+    # Only base58-valid 32-byte mints are reported as addresses.
+    if signals['token_addresses']:
+        signals['token_address'] = signals['token_addresses'][0]
+        signals['should_trade'] = True
+
+    # Look for cashtags or token symbols
+    if signals['cashtags']:
+        signals['token_symbol'] = signals['cashtags'][0]
+        signals['should_trade'] = True
+
+    return signals
+
+def apply_sentiment(signals, sentiment):
+    signals['sentiment'] = sentiment
+    # Never trade into a tweet whose tone is at or below the threshold.
+    if signals['should_trade'] and not sentiment_scorer.passes(sentiment):
+        signals['should_trade'] = False
+    return signals
+
+def parse_trading_signals(text):
+    # One pass over the tweet for every mint address and cashtag.
+    signals = parse_trading_signals_from_mentions(signal_extractor.extract(text))
+    return apply_sentiment(signals, sentiment_scorer.score(text))
+
+def parse_trading_signals_many(texts):
+    """Parse and score a burst of tweet texts in one batch."""
+    return [
+        apply_sentiment(parse_trading_signals_from_mentions(mentions), sentiment)
+        for mentions, sentiment in zip(signal_extractor.extract_many(texts),
+                                       sentiment_scorer.score_many(texts))
+    ]
+
+_stream_listener_class = None
+
+def stream_listener_class():
+    """
+    The TwitterStreamListener class. It is defined on first use so tweepy is
+    only imported once streaming is actually started.
+    """
+    global _stream_listener_class
+    if _stream_listener_class is not None:
+        return _stream_listener_class
+
+    from tweepy import StreamingClient
+
+    class TwitterStreamListener(StreamingClient):
+        def __init__(self, bearer_token, trade_manager, pipeline=None):
+            super().__init__(bearer_token)
+            # Rule calls and the stream connection share the pooled, timed adapter.
+            http.instrument(self.session)
+            self.rule_manager = StreamRuleManager(self)
+            self.trade_manager = trade_manager
+            self.pipeline = pipeline or tweet_ingress()
+            self.malformed_lines = 0
+
+        def on_data(self, raw_data):
+            # tweepy ends the whole stream if one line fails to parse; skip it.
+            try:
+                super().on_data(raw_data)
+            except (ValueError, KeyError, TypeError) as e:
+                self.malformed_lines += 1
+                logging.warning(f"Skipping malformed stream payload ({e}): {raw_data[:200]!r}")
+
+        def on_tweet(self, tweet):
+            # Only enqueue here: parsing, trading and emits run on pipeline
+            # workers so a slow consumer never stalls the stream reader.
+            if hasattr(tweet, 'text'):  # Ensure tweet has text content
+                self.pipeline.submit({
+                    "tweet": tweet,
+                    "trade_manager": self.trade_manager,
+                    "received_at": time.time(),
+                    "stamps": [("received", time.perf_counter())]
+                })
+
+        parse_trading_signals = staticmethod(parse_trading_signals)
+        parse_trading_signals_many = staticmethod(parse_trading_signals_many)
+        parse_trading_signals_from_mentions = staticmethod(parse_trading_signals_from_mentions)
+        apply_sentiment = staticmethod(apply_sentiment)
+
+    _stream_listener_class = TwitterStreamListener
+    return _stream_listener_class
+
+def __getattr__(name):
+    # `integrated_bot.TwitterStreamListener` keeps working; it just loads tweepy.
+    if name == "TwitterStreamListener":
+        return stream_listener_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --------------------------------------------------------------------
+# Tweet-to-Trade Pipeline (parse -> score -> dedupe -> decide -> execute -> broadcast)
+# --------------------------------------------------------------------
+tweet_pipeline = None
+_tweet_pipeline_lock = threading.Lock()
+
+# Every tweet is stamped (perf_counter) on receipt, when parsing and scoring
+# are done, at the trade decision, at the simulated fill itself and when it
+# is enqueued with the broadcaster. Each segment between consecutive stamps,
+# plus created_at -> receipt and the totals below, is a histogram on /metrics.
+# The wait from enqueue to the socket emit is the broadcaster's own
+# broadcast_queue_seconds histogram.
+TWEET_LATENCY_METRIC = "tweet_latency_seconds"
+TWEET_LATENCY_HELP = "Latency of each segment of a tweet's path from created_at to fill and broadcast enqueue."
+_latency_histograms = {}
+
+def _latency_histogram(segment, buckets=FINE_BUCKETS_MS):
+    histogram = _latency_histograms.get(segment)
+    if histogram is None:
+        histogram = _latency_histograms[segment] = registry.histogram(
+            TWEET_LATENCY_METRIC, TWEET_LATENCY_HELP, buckets, segment=segment)
+    return histogram
+
+# The totals span sub-millisecond to seconds under load; bucket them finely
+# enough that their percentiles aren't just the nearest 1-2.5-5 bound.
+def _total_latency_histogram(segment):
+    return _latency_histogram(segment, GEOMETRIC_BUCKETS_MS)
+
+# Time from on_tweet to the broadcast enqueue, for every tweet that gets there.
+tweet_latency = _total_latency_histogram("received_to_enqueued")
+
+def latency_summary():
+    return {segment: histogram.as_dict() for segment, histogram in _latency_histograms.items()}
+
+def reset_latency():
+    for histogram in list(_latency_histograms.values()):
+        histogram.reset()
+
+def _stamp(event, name, wall_time=None):
+    """Stamp now, or at `wall_time` (time.time()) if the moment was taken elsewhere."""
+    stamped_at = time.perf_counter()
+    if wall_time is not None:
+        stamped_at -= time.time() - wall_time
+    event["stamps"].append((name, stamped_at))
+
+def _record_latency(event):
+    stamps = event["stamps"]
+    for (start, started), (end, ended) in zip(stamps, stamps[1:]):
+        _latency_histogram(f"{start}_to_{end}").observe((ended - started) * 1000)
+    received = stamps[0][1]
+    times = dict(stamps)
+    filled = times.get("filled")
+    if filled is not None:
+        _total_latency_histogram("received_to_filled").observe((filled - received) * 1000)
+    tweet_latency.observe((stamps[-1][1] - received) * 1000)
+
+    created_at = event["tweet"].created_at
+    if created_at is not None:
+        # Wall clock, so this includes Twitter's delivery delay and clock skew.
+        delivery = event["received_at"] - created_at.timestamp()
+        _total_latency_histogram("created_to_received").observe(delivery * 1000)
+        if filled is not None:
+            _total_latency_histogram("created_to_filled").observe((delivery + filled - received) * 1000)
+
+def _parse_stage(events):
+    texts = [event["tweet"].text for event in events]
+    for event, mentions in zip(events, signal_extractor.extract_many(texts)):
+        event["signals"] = parse_trading_signals_from_mentions(mentions)
+    return events
+
+def _score_stage(events):
+    scores = sentiment_scorer.score_many([event["tweet"].text for event in events])
+    for event, sentiment in zip(events, scores):
+        apply_sentiment(event["signals"], sentiment)
+        _stamp(event, "parsed")
+    return events
+
+# Drops redelivered tweets and debounces trades per mint and per author.
+signal_deduplicator = SignalDeduplicator()
+
+def _dedupe_stage(event):
+    tweet = event["tweet"]
+    if signal_deduplicator.seen_tweet(tweet.id, event["received_at"]):
+        return None
+    signals = event["signals"]
+    token = signals.get('token_address') or signals.get('token_symbol')
+    if signals.get('should_trade') and token:
+        outcome = signal_deduplicator.check_trade(token, tweet.author_id, event["received_at"])
+        if outcome != DEDUP_ACCEPT:
+            # Still broadcast the tweet, just don't buy the same pool again.
+            signals['should_trade'] = False
+            signals['suppressed'] = outcome
+            logging.info(f"[{token}] Trade suppressed: {outcome}")
+    return event
+
+# Trades are sized from simulated fills against the token's pool (see
+# fill_simulator.py); a token whose pool reserves can't be found isn't traded.
+# The expected return is the move off the pool's mid price a snipe is sized
+# for; it has to clear the slippage the orders allow to ever be worth buying.
+FILL_EXPECTED_RETURN = float(os.getenv("FILL_EXPECTED_RETURN", "0.5"))
+FILL_MAX_TAIL_LOSS = float(os.getenv("FILL_MAX_TAIL_LOSS", "0.35"))   # p99, share of spend
+FILL_MIN_TRADE_SOL = float(os.getenv("FILL_MIN_TRADE_SOL", "0.1"))
+FILL_MAX_TRADE_SOL = float(os.getenv("FILL_MAX_TRADE_SOL", "1.0"))
+_fill_simulator = None
+
+def get_fill_simulator():
+    # numpy is only imported once the first trade is sized.
+    global _fill_simulator
+    if _fill_simulator is None:
+        from fill_simulator import FillSimulator
+        _fill_simulator = FillSimulator()
+    return _fill_simulator
+
+def _veto(event, reason, message):
+    event["execute"] = False
+    event["signals"]['should_trade'] = False
+    event["signals"]['suppressed'] = reason
+    logging.info(message)
+
+def _size_trade(event):
+    """Pick the trade size that simulates best against the pool, or veto the trade."""
+    from fill_simulator import Pool
+    signals = event["signals"]
+    token = signals.get('token_address') or signals.get('token_symbol')
+    tick = price_cache.get(token)
+    if tick is None or not tick.sol_reserve or not tick.token_reserve:
+        # A new mint: fetch its pool now rather than buy it unsized.
+        quote(token)
+        tick = price_cache.get(token)
+    if tick is None or not tick.sol_reserve or not tick.token_reserve:
+        _veto(event, "no_pool", f"[{token}] Trade suppressed: no pool reserves to size it against")
+        return
+    params = event["trade_manager"].trade_params
+    pool = Pool(tick.sol_reserve, tick.token_reserve)
+    estimate = get_fill_simulator().optimal_size(
+        pool, pool.mid_price * (1 + FILL_EXPECTED_RETURN), params.slippage_tolerance,
+        params.priority_fee, min_amount=FILL_MIN_TRADE_SOL, max_amount=FILL_MAX_TRADE_SOL,
+        max_tail_loss=FILL_MAX_TAIL_LOSS)
+    if estimate is None:
+        _veto(event, "fill_risk", f"[{token}] Trade suppressed: no size expects a profit with "
+                                  f"p99 fill loss within {FILL_MAX_TAIL_LOSS:.0%}")
+        return
+    signals['fill_estimate'] = estimate.as_dict()
+    event["trade_params"] = copy.copy(params)
+    event["trade_params"].trade_amount = estimate.amount
+
+def _decide_stage(event):
+    signals = event["signals"]
+    event["execute"] = bool(signals.get('should_trade')) and event["trade_manager"] is not None
+    if event["execute"]:
+        _size_trade(event)
+    _stamp(event, "decided")
+    return event
+
+def _execute_stage(event):
+    # Execute trade if signals warrant it
+    if event["execute"]:
+        signals = event["signals"]
+        token = signals.get('token_address') or signals.get('token_symbol')
+        author = event["tweet"].author_id
+        now = event["received_at"]
+        # The cooldowns start only once an order is really going out.
+        outcome = signal_deduplicator.claim_trade(token, author, now)
+        if outcome != DEDUP_ACCEPT:
+            _veto(event, outcome, f"[{token}] Trade suppressed: {outcome}")
+            return event
+        event["trade_result"] = event["trade_manager"].execute_trade(signals, event.get("trade_params"))
+        if event["trade_result"]:
+            # When the order filled, not when place_trade finished logging it.
+            _stamp(event, "filled", event["trade_result"].get("filled_at"))
+            topic_router.publish_fill(event["trade_result"])
+        else:
+            signal_deduplicator.release_trade(token, author, now)
+    return event
+
+def _broadcast_stage(event):
+    tweet = event["tweet"]
+    created_at = tweet.created_at.isoformat() if tweet.created_at else None
+    # Queued for the next batched frame of every matching topic; the
+    # broadcaster emits it within its window.
+    topic_router.publish_tweet({
+        "id": tweet.id,
+        "text": tweet.text,
+        "author": tweet.author_id,
+        "created_at": created_at,
+        "signals": event["signals"]
+    })
+    _stamp(event, "enqueued")
+    _record_latency(event)
+    return None
+
+def ingest_stages(ingress_size):
+    """parse -> score. CPU-bound; these run in the shard processes in multiprocess mode."""
+    return [
+        # The ingress queue never blocks the stream reader; under
+        # overload the oldest tweets are dropped first.
+        Stage("parse", _parse_stage, maxsize=ingress_size,
+              policy="drop_oldest", batch_size=64),
+        Stage("score", _score_stage, maxsize=ingress_size, batch_size=64),
+    ]
+
+def decision_stages():
+    """dedupe -> decide -> execute. Always exactly one set of these, so no trade is doubled."""
+    return [
+        Stage("dedupe", per_item(_dedupe_stage), batch_size=64),
+        Stage("decide", per_item(_decide_stage), batch_size=64),
+        Stage("execute", per_item(_execute_stage), workers=2),
+    ]
+
+def build_tweet_pipeline(ingress_size=None):
+    """Create (but don't start) a tweet pipeline; also used by replay.py."""
+    if ingress_size is None:
+        ingress_size = int(os.getenv("TWEET_QUEUE_SIZE", "5000"))
+    return Pipeline(ingest_stages(ingress_size) + decision_stages() + [
+        Stage("broadcast", per_item(_broadcast_stage), maxsize=2000,
+              policy="drop_oldest", batch_size=64),
+    ])
+
+def get_tweet_pipeline():
+    """Return the process-wide tweet pipeline, starting it on first use."""
+    global tweet_pipeline
+    if tweet_pipeline is None:
+        with _tweet_pipeline_lock:
+            if tweet_pipeline is None:
+                tweet_pipeline = build_tweet_pipeline().start()
+    return tweet_pipeline
+
+# Set by main() when BOT_TOPOLOGY=multiprocess.
+process_topology = None
+
+def start_process_topology(shards=None):
+    """Run parsing and trading in worker processes; results are broadcast from here."""
+    global process_topology
+    kwargs = {} if shards is None else {"shards": shards}
+    process_topology = ProcessTopology(on_tweet=_broadcast_stage, on_fill=topic_router.publish_fill,
+                                       on_prices=topic_router.publish_prices, **kwargs).start()
+    process_topology.update_settings(settings_store.snapshot)
+    return process_topology
+
+def tweet_ingress():
+    """Where the stream listener hands tweets: the worker processes or the local pipeline."""
+    return process_topology or get_tweet_pipeline()
+
+@registry.collector
+def _pipeline_histograms():
+    if tweet_pipeline is None:
+        return
+    for stage in tweet_pipeline.stages:
+        yield ("pipeline_stage_lag_seconds", "Time tweets wait in each pipeline stage's queue.",
+               {"stage": stage.name}, stage.stats.lag_ms)
+        yield ("pipeline_stage_service_seconds", "Handler time per batch in each pipeline stage.",
+               {"stage": stage.name}, stage.stats.service_ms)
+
+@app.route("/metrics")
+def metrics():
+    return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route("/api/startup")
+def api_startup():
+    return jsonify(startup_timings)
+
+@app.route("/api/broadcast/stats")
+def api_broadcast_stats():
+    return jsonify(broadcaster.stats())
+
+@app.route("/api/pipeline/stats")
+def api_pipeline_stats():
+    if process_topology is not None:
+        return jsonify({"running": True, "topology": process_topology.stats(),
+                        "latency": latency_summary()})
+    if tweet_pipeline is None:
+        return jsonify({"running": False, "stages": {}, "dedup": signal_deduplicator.stats()})
+    return jsonify({"running": True, "stages": tweet_pipeline.stats(),
+                    "latency": latency_summary(),
+                    "dedup": signal_deduplicator.stats()})
+
+def sync_twitter_stream(bearer_token, accounts, stream=None):
+    """
+    Bring the account rules of `stream` in line with `accounts`, creating and
+    connecting the stream only if it isn't already running. Rule changes are
+    applied as a delta to the live stream; it is never reconnected for them.
+    """
+    if stream is None:
+        # Create an instance of our stream listener using our bearer token.
+        stream = stream_listener_class()(
+            bearer_token=bearer_token,
+            trade_manager=trade_manager
+        )
     
-    # Remove any preexisting rules, then add our new ones.
-    existing_rules = stream.get_rules().data
-    if existing_rules is not None:
-        rule_ids = [rule.id for rule in existing_rules]
-        stream.delete_rules(rule_ids)
-    stream.add_rules(rules)
-    logging.info(f"Twitter stream rules added: {rules}")
+    # Using Twitter API v2 syntax, accounts are packed into rules like
+    # "from:a OR from:b". Only added/removed accounts touch the API.
+    stream.rule_manager.sync(accounts)
     
-    # Start streaming (filtering mode).
-    stream.filter(threaded=True)  # Run in a separate thread
+    if not stream.running:
+        # Start streaming (filtering mode) in a separate thread.
+        stream.filter(tweet_fields=['author_id', 'created_at'], threaded=True)
+        logging.info(f"Twitter stream connected with {len(accounts)} accounts")
+    return stream
+
+def start_twitter_stream():
+    global twitter_stream
+    twitter_stream = sync_twitter_stream(TWITTER_BEARER_TOKEN, TRACKED_TWITTER_ACCOUNTS, twitter_stream)
+    return twitter_stream
 
 # --------------------------------------------------------------------
 # Main – Launch Flask App and Twitter Stream in Parallel
@@ -671,6 +1177,18 @@ def validate_twitter_credentials():
     
     return bearer_token
 
+_twitter_clients = {}
+
+def get_twitter_client(bearer_token):
+    """Return a cached tweepy Client whose session uses the shared HTTP pool."""
+    client = _twitter_clients.get(bearer_token)
+    if client is None:
+        from tweepy import Client
+        client = Client(bearer_token=bearer_token)
+        http.instrument(client.session)
+        _twitter_clients[bearer_token] = client
+    return client
+
 class TwitterManager:
     def __init__(self):
         load_dotenv()  # Load environment variables
@@ -679,7 +1197,7 @@ class TwitterManager:
             raise ValueError("Twitter Bearer Token not configured properly in .env file")
         
         # Initialize Twitter client
-        self.client = Client(bearer_token=self.bearer_token)
+        self.client = get_twitter_client(self.bearer_token)
         self.stream = None
     
     def test_connection(self):
@@ -696,28 +1214,14 @@ class TwitterManager:
             return False
 
     def start_stream(self, accounts_to_track):
-        """Start Twitter stream with specified accounts"""
+        """Start Twitter stream with specified accounts, or update its rules if running"""
+        global twitter_stream
         try:
-            if self.stream:
-                self.stream.disconnect()
-            
-            self.stream = TwitterStreamListener(
-                bearer_token=self.bearer_token,
-                trade_manager=trade_manager
-            )
-            
-            # Clear existing rules
-            existing_rules = self.stream.get_rules()
-            if existing_rules.data:
-                rule_ids = [rule.id for rule in existing_rules.data]
-                self.stream.delete_rules(rule_ids)
-            
-            # Add new rules
-            rules = [StreamRule(value=f"from:{username}") for username in accounts_to_track]
-            if rules:
-                self.stream.add_rules(rules)
-                self.stream.filter(tweet_fields=['author_id', 'created_at'], threaded=True)
-                logging.info(f"Started streaming {len(accounts_to_track)} accounts")
+            self.stream = sync_twitter_stream(self.bearer_token, accounts_to_track, self.stream)
+            # The track/untrack routes update this same stream.
+            twitter_stream = self.stream
+            if accounts_to_track:
+                logging.info(f"Streaming {len(accounts_to_track)} accounts")
                 return True
             
             logging.warning("No accounts to track")
@@ -738,19 +1242,39 @@ def initialize_twitter():
         logging.error(f"Twitter initialization failed: {e}")
         raise
 
+def _warm_up_sentiment():
+    with startup_phase("sentiment_lexicon"):
+        sentiment_scorer.warm_up()
+
 def main():
     try:
-        # Initialize Twitter
-        twitter_manager = initialize_twitter()
-        logging.info("Twitter API initialized successfully")
-        
-        # Start tracking configured accounts
-        if TRACKED_TWITTER_ACCOUNTS:
-            twitter_manager.start_stream(TRACKED_TWITTER_ACCOUNTS)
-        
-        # Start Flask app
+        with startup_phase("socket_server"):
+            socketio.init_app(app, async_mode=SOCKETIO_ASYNC_MODE)
+
+        if BOT_TOPOLOGY == "multiprocess":
+            with startup_phase("topology"):
+                start_process_topology()
+        else:
+            start_trading_tasks()
+            # Load the VADER lexicon while Twitter connects, so the first
+            # tweet doesn't pay for it.
+            threading.Thread(target=_warm_up_sentiment, name="sentiment-warm-up", daemon=True).start()
+
+        with startup_phase("twitter"):
+            # Initialize Twitter
+            twitter_manager = initialize_twitter()
+            logging.info("Twitter API initialized successfully")
+
+            # Start tracking configured accounts
+            if TRACKED_TWITTER_ACCOUNTS:
+                twitter_manager.start_stream(TRACKED_TWITTER_ACCOUNTS)
+
+        # Start batching socket output, then the Flask app
+        topic_router.attach()
+        startup_timings["ready"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+        logging.info(f"Startup timings (ms): {startup_timings}")
         logging.info("Starting web server on http://localhost:5002")
-        socketio.run(app, debug=True, port=5002, host='0.0.0.0')
+        socketio.run(app, debug=True, use_reloader=USE_RELOADER, port=5002, host='0.0.0.0')
         
     except Exception as e:
         logging.error(f"Application startup failed: {e}")
@@ -771,7 +1295,7 @@ def track_twitter_account():
         
     try:
         # Verify the account exists using Twitter API
-        user = tweepy.Client(bearer_token=TWITTER_BEARER_TOKEN).get_user(username=username)
+        user = get_twitter_client(TWITTER_BEARER_TOKEN).get_user(username=username)
         user_id = user.data.id
         
         if username not in TRACKED_TWITTER_ACCOUNTS:
@@ -804,92 +1328,115 @@ def untrack_twitter_account():
     return jsonify({"status": "error", "message": "Account not found"}), 404
 
 def restart_twitter_stream():
+    """Apply the current TRACKED_TWITTER_ACCOUNTS to the live stream's rules."""
     global twitter_stream
     try:
-        if twitter_stream:
-            twitter_stream.disconnect()
-        
-        # Validate token before creating new stream
+        # Validate token before creating a stream
         bearer_token = validate_twitter_credentials()
         
-        # Create new stream
-        twitter_stream = TwitterStreamListener(
-            bearer_token=bearer_token,
-            trade_manager=trade_manager
-        )
+        twitter_stream = sync_twitter_stream(bearer_token, TRACKED_TWITTER_ACCOUNTS, twitter_stream)
         
-        # Clear existing rules
-        existing_rules = twitter_stream.get_rules()
-        if existing_rules.data:
-            rule_ids = [rule.id for rule in existing_rules.data]
-            twitter_stream.delete_rules(rule_ids)
-        
-        # Add new rules for each tracked account
-        rules = [StreamRule(value=f"from:{username}") for username in TRACKED_TWITTER_ACCOUNTS]
-        if rules:  # Only add rules if we have accounts to track
-            twitter_stream.add_rules(rules)
-            
-            # Start streaming
-            twitter_stream.filter(tweet_fields=['author_id', 'created_at'], threaded=True)
-            
-            logging.info(f"Twitter stream restarted with {len(TRACKED_TWITTER_ACCOUNTS)} accounts")
+        if TRACKED_TWITTER_ACCOUNTS:
+            logging.info(f"Twitter stream rules updated for {len(TRACKED_TWITTER_ACCOUNTS)} accounts")
         else:
-            logging.info("No accounts to track. Stream ready but inactive.")
+            logging.info("No accounts to track. Stream connected but inactive.")
             
     except ValueError as ve:
         logging.error(f"Twitter configuration error: {ve}")
         raise
     except Exception as e:
-        logging.error(f"Error restarting Twitter stream: {str(e)}")
+        logging.error(f"Error updating Twitter stream rules: {str(e)}")
         raise
 
-# Add before main()
-def scalping_algorithm():
-    """
-    Simulates an automated sniping and scalping strategy.
-    """
-    while True:
-        time.sleep(5)  # Check every 5 seconds
-        token_symbol = "SCALP"
-        current_price = 1.0 * random.uniform(0.95, 1.05)
-        if random.random() < 0.3:  # 30% chance of trigger
-            logging.info(f"Scalping trigger: Rapid move for {token_symbol} at {current_price:.4f} SOL.")
-            execute_trade_on_raydium(token_symbol, current_price)
+# --------------------------------------------------------------------
+# Scalping (event-driven, see scalping.py)
+# --------------------------------------------------------------------
+SCALPING_ENABLED = os.getenv("SCALPING_ENABLED", "0") == "1"
+# Kept priced while scalping; with PRICE_FEED=dexscreener these must be mints.
+SCALP_TOKENS = [token for token in os.getenv("SCALP_TOKENS", "SCALP").split(",") if token]
+
+def _publish_scalp_event(event):
+    # Looked up per call: the decision process swaps topic_router for a relay.
+    topic_router.publish_fill(event)
+
+# The price cache already applies every tick to the book.
+scalping_engine = ScalpingEngine(trade_manager, on_event=_publish_scalp_event, apply_ticks=False)
+
+def scalping_algorithm(ticks):
+    """Hand price ticks to the scalping engine, which reacts to each one."""
+    for tick in ticks:
+        scalping_engine.submit(tick.token, tick.price, tick.volume or 1.0, tick.ts)
+
+def start_trading_tasks():
+    """Start what trades through trade_manager; runs wherever the book lives."""
+    # Positions from before a restart have to be back before any tick or trade.
+    with startup_phase("trade_journal"):
+        open_trade_journal()
+    # Import numpy now rather than while the first trade waits for sizing.
+    threading.Thread(target=get_fill_simulator, name="fill-simulator-warm-up", daemon=True).start()
+    if SCALPING_ENABLED:
+        scalping_engine.start()
+        price_cache.subscribe(scalping_algorithm)
+        logging.info(f"Scalping {len(SCALP_TOKENS)} token(s)")
+    start_price_feed()
+
+@app.route("/api/scalping")
+def api_scalping():
+    if process_topology is not None:
+        return jsonify(process_topology.decision_snapshot().get("scalping"))
+    return jsonify(scalping_engine.stats())
 
 def monitor_whale_activity():
     """
     Simulates monitoring on-chain data for whale activity.
     """
-    global whale_activity_data
     while True:
         time.sleep(10)
         if random.random() < 0.2:  # 20% chance of whale event
-            event = {
-                "time": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-                "wallet": f"0x{random.randint(10**39, 10**40-1):x}"[:42],
-                "amount": round(random.uniform(50, 200), 2),
-                "type": random.choice(["buy", "sell"])
-            }
-            whale_activity_data.append(event)
+            seq = whale_store.append(
+                wallet=f"0x{random.randint(10**39, 10**40-1):x}"[:42],
+                amount=round(random.uniform(50, 200), 2),
+                side=random.choice(["buy", "sell"])
+            )
+            event = whale_store.get(seq)
             logging.info(f"Whale event detected: {event}")
-        whale_activity_data = whale_activity_data[-50:]  # Keep last 50 events
+            # Carries `seq`, so clients can fetch any gap via ?since=<seq>.
+            topic_router.publish_whale(event)
 
 @app.route("/api/whale-activity")
 def api_whale_activity():
-    return jsonify({"activities": whale_activity_data})
+    # `since=<seq>` returns only newer events (the gap after a reconnect);
+    # otherwise the newest `limit` events, with `before=<seq>` to page back.
+    limit = min(request.args.get("limit", 50, type=int), whale_store.capacity)
+    body = whale_store.page_json(since=request.args.get("since", type=int), limit=limit,
+                                 before=request.args.get("before", type=int))
+    return app.response_class(body, mimetype="application/json")
+
+@app.route("/api/whale-activity/net-flow")
+def api_whale_net_flow():
+    minutes = request.args.get("minutes", 5, type=float)
+    return jsonify({"minutes": minutes, "net_flow": whale_store.net_flow(minutes * 60)})
 
 # Add near your other routes
 @app.route("/api/save-settings", methods=["POST"])
 def save_settings():
-    global user_settings
     data = request.get_json()
     if data:
-        user_settings["trade_amount"] = float(data.get("tradeAmount", 0.5))
-        user_settings["stop_loss"] = float(data.get("stopLoss", 5))
-        user_settings["risk_reward"] = float(data.get("riskReward", 3))
-        return jsonify({"message": "Settings updated successfully."})
+        changes = {name: data[field] for field, name in SETTINGS_FIELDS.items() if field in data}
+        try:
+            snapshot = settings_store.update(changes)
+        except (KeyError, ValueError) as e:
+            return jsonify({"message": f"Invalid settings: {e}"}), 400
+        return jsonify({"message": "Settings updated successfully.", "version": snapshot.version})
     return jsonify({"message": "Invalid settings."}), 400
 
+@app.route("/api/settings")
+def get_settings():
+    snapshot = settings_store.snapshot
+    return jsonify({"version": snapshot.version, "settings": snapshot.as_dict()})
+
+startup_timings["import"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+
 if __name__ == "__main__":
     try:
         main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+metrics.py
+
+Lightweight, thread-safe latency histograms with fixed buckets.
+Recording a sample is a bisect plus two additions under a lock, so it is
+cheap enough for the trade hot path.
+
+Histograms that should be scraped are kept in a Registry (the module-level
+`registry`), which renders them in the Prometheus text exposition format for
+a /metrics endpoint. Values are recorded in milliseconds and exported in
+seconds, as Prometheus expects.
+"""
+
+import threading
+from bisect import bisect_left
+
+# Upper bounds in milliseconds; the last bucket is +Inf.
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Sub-millisecond resolution for in-process work (pipeline stages, parsing).
+FINE_BUCKETS_MS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5) + DEFAULT_BUCKETS_MS
+# Bounds 25% apart from 0.01 ms to 10 s, for end-to-end latencies whose
+# percentiles are reported: any percentile is within 25% of the true value.
+GEOMETRIC_BUCKETS_MS = tuple(float(f"{0.01 * 1.25 ** step:.6g}") for step in range(63))
+
+
+class Histogram:
+    """Cumulative-friendly latency histogram (values in milliseconds)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms, count=1):
+        """Record `count` samples of value_ms."""
+        index = bisect_left(self.buckets, value_ms)
+        with self._lock:
+            self._counts[index] += count
+            self._count += count
+            self._sum += value_ms * count
+            if value_ms > self._max:
+                self._max = value_ms
+
+    def snapshot(self):
+        """Return (bucket counts, count, sum, max) captured under the lock."""
+        with self._lock:
+            return list(self._counts), self._count, self._sum, self._max
+
+    def percentile(self, fraction, snapshot=None):
+        """Approximate percentile: the upper bound of the bucket holding it."""
+        counts, count, _, maximum = snapshot or self.snapshot()
+        if not count:
+            return 0.0
+        rank = fraction * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else maximum
+        return maximum
+
+    def as_dict(self):
+        snapshot = self.snapshot()
+        counts, count, total, maximum = snapshot
+        return {
+            "count": count,
+            "avg_ms": round(total / count, 3) if count else 0.0,
+            "max_ms": round(maximum, 3),
+            "p50_ms": self.percentile(0.50, snapshot),
+            "p90_ms": self.percentile(0.90, snapshot),
+            "p99_ms": self.percentile(0.99, snapshot),
+            "buckets": {
+                (str(bound) if index < len(self.buckets) else "+Inf"): bucket_count
+                for index, (bound, bucket_count) in enumerate(
+                    zip(list(self.buckets) + [None], counts))
+            },
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+def _format_seconds(value_ms):
+    return repr(value_ms / 1000)
+
+
+class Registry:
+    """
+    Named histogram families for export. Histograms are created with
+    histogram(); collectors registered with collector() are called at render
+    time and may yield (name, help, labels, Histogram) for histograms owned
+    elsewhere (pipeline stages, HTTP hosts).
+    """
+
+    def __init__(self):
+        self._families = {}    # name -> (help, {label tuple: Histogram})
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, buckets=FINE_BUCKETS_MS, **labels):
+        """Get or create the histogram `name` with these label values."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            _, series = self._families.setdefault(name, (help_text, {}))
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            return histogram
+
+    def collector(self, collect):
+        with self._lock:
+            self._collectors.append(collect)
+        return collect
+
+    def render(self):
+        """All histograms in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            families = {name: (help_text, [(dict(key), histogram) for key, histogram in series.items()])
+                        for name, (help_text, series) in self._families.items()}
+            collectors = list(self._collectors)
+        for collect in collectors:
+            for name, help_text, labels, histogram in collect():
+                families.setdefault(name, (help_text, []))[1].append((labels, histogram))
+
+        lines = []
+        for name, (help_text, series) in sorted(families.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series:
+                counts, count, total, _ = histogram.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, counts):
+                    cumulative += bucket_count
+                    le = ("le", _format_seconds(bound))
+                    lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_seconds(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry = Registry()
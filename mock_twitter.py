@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+mock_twitter.py
+
+Local stand-in for the Twitter v2 endpoints the bot uses, for offline load
+and reconnect testing without API quota or network access:
+
+  GET  /2/tweets/search/stream          filtered stream (newline-delimited JSON)
+  GET  /2/tweets/search/stream/rules    list rules
+  POST /2/tweets/search/stream/rules    add / delete rules
+  GET  /2/users/by?usernames=a,b        bulk user lookup
+  GET  /2/users/by/username/<username>  single user lookup
+
+Point the bot at it with TWITTER_API_BASE_URL (see http_client.py); every
+api.twitter.com request, including tweepy's StreamingClient and Client, is
+then sent here:
+
+    python mock_twitter.py --port 5055 --rate 20
+    TWITTER_API_BASE_URL=http://127.0.0.1:5055 TWITTER_BEARER_TOKEN=x python integrated_bot.py
+
+The stream only carries tweets from accounts in the current from: rules, at
+`--rate` tweets/sec. Faults are injected through the control API:
+
+  POST /mock/burst       {"count": 500}               emit tweets right now
+  POST /mock/disconnect  {"operational": true}        drop every stream
+  POST /mock/rate-limit  {"count": 3, "reset": 15, "path": "/2/users"}
+                                                      next 3 matching requests get 429
+  POST /mock/malformed   {"count": 5, "kind": "truncated" | "garbage" | "no_text"}
+                                                      next 5 stream lines are broken
+  POST /mock/rate        {"rate": 200}                change the sustained rate
+  GET  /mock/stats                                    counters and live connections
+
+Like the real stream, only `--max-connections` concurrent connections are
+accepted and a client that falls `--buffer` lines behind is disconnected.
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime, timezone
+from itertools import count
+
+from flask import Flask, Response, jsonify, request
+
+from replay import generate_corpus
+from stream_rules import parse_rule_accounts
+
+MOCK_TWITTER_PORT = int(os.getenv("MOCK_TWITTER_PORT", "5055"))
+RATE_LIMIT_WINDOW = 15 * 60
+RATE_LIMIT_LIMIT = 450
+HEARTBEAT_SECONDS = 20    # the real stream sends "\r\n" every 20s when idle
+
+_DEFAULT_TWEET_FIELDS = ("id", "text", "edit_history_tweet_ids")
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+
+def user_id_for(username):
+    """Stable numeric id for a username (case-insensitive, like the API)."""
+    digest = hashlib.sha1(username.lower().encode()).hexdigest()
+    return str(10**17 + int(digest[:15], 16) % (9 * 10**17))
+
+
+def _problem(status, title, detail, problem_type="about:blank", **extra):
+    body = dict({"title": title, "detail": detail, "type": problem_type, "status": status}, **extra)
+    return jsonify(body), status
+
+
+class _Connection:
+    __slots__ = ("id", "lines", "tweet_fields", "opened_at", "sent")
+
+    def __init__(self, connection_id, buffer, tweet_fields):
+        self.id = connection_id
+        self.lines = queue.Queue(maxsize=buffer)
+        self.tweet_fields = tweet_fields
+        self.opened_at = time.time()
+        self.sent = 0
+
+
+class MockTwitter:
+    """State of the mock API: rules, connections, generator and faults."""
+
+    def __init__(self, rate=5.0, seed=0, max_connections=1, buffer=10000,
+                 heartbeat=HEARTBEAT_SECONDS):
+        self.rate = rate
+        self.max_connections = max_connections
+        self.buffer = buffer
+        self.heartbeat = heartbeat
+        self._rng = random.Random(seed)
+        self._texts = [tweet["text"] for tweet in generate_corpus(2000, seed)]
+        self._rules = {}            # rule id -> (value, tag)
+        self._rule_ids = count(1_600_000_000_000_000_000)
+        self._tweet_ids = count(1_700_000_000_000_000_000, 7919)
+        self._connections = {}
+        self._connection_ids = count(1)
+        self._rate_limits = []      # [path prefix, remaining count, reset seconds]
+        self._malformed = []        # pending malformed kinds, oldest first
+        self._lock = threading.Lock()
+        self.counters = {"tweets_generated": 0, "lines_sent": 0, "malformed_sent": 0,
+                         "slow_disconnects": 0, "forced_disconnects": 0,
+                         "rate_limited": 0, "connections_refused": 0, "connections_opened": 0}
+
+    # ------------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------------
+    def rules(self):
+        with self._lock:
+            return [{"id": rule_id, "value": value, "tag": tag}
+                    for rule_id, (value, tag) in self._rules.items()]
+
+    def add_rules(self, rules):
+        created, errors = [], []
+        with self._lock:
+            values = {value for value, _ in self._rules.values()}
+            for rule in rules:
+                value, tag = rule.get("value", ""), rule.get("tag")
+                if value in values:
+                    errors.append({"value": value, "title": "DuplicateRule",
+                                   "type": "https://api.twitter.com/2/problems/duplicate-rules"})
+                    continue
+                rule_id = str(next(self._rule_ids))
+                self._rules[rule_id] = (value, tag)
+                values.add(value)
+                created.append(dict({"id": rule_id, "value": value}, **({"tag": tag} if tag else {})))
+        return created, errors
+
+    def delete_rules(self, ids):
+        deleted, errors = 0, []
+        with self._lock:
+            for rule_id in ids:
+                if self._rules.pop(str(rule_id), None) is None:
+                    errors.append({"id": str(rule_id), "title": "Not Found Error",
+                                   "type": "https://api.twitter.com/2/problems/resource-not-found"})
+                else:
+                    deleted += 1
+        return deleted, errors
+
+    def _accounts(self):
+        """username -> matching (rule id, tag) for every account in a from: rule."""
+        accounts = {}
+        with self._lock:
+            for rule_id, (value, tag) in self._rules.items():
+                for account in parse_rule_accounts(value) or []:
+                    accounts.setdefault(account, []).append({"id": rule_id, "tag": tag or ""})
+        return accounts
+
+    # ------------------------------------------------------------------
+    # Stream
+    # ------------------------------------------------------------------
+    def open_connection(self, tweet_fields):
+        with self._lock:
+            if len(self._connections) >= self.max_connections:
+                self.counters["connections_refused"] += 1
+                return None
+            connection = _Connection(next(self._connection_ids), self.buffer, tweet_fields)
+            self._connections[connection.id] = connection
+            self.counters["connections_opened"] += 1
+            return connection
+
+    def close_connection(self, connection):
+        with self._lock:
+            self._connections.pop(connection.id, None)
+
+    def stream_lines(self, connection):
+        """Generator behind the streaming response for one connection."""
+        try:
+            while True:
+                try:
+                    line = connection.lines.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    line = ""
+                if line is None:    # disconnect requested
+                    return
+                connection.sent += 1
+                yield line + "\r\n"
+        finally:
+            self.close_connection(connection)
+
+    def emit(self, count_):
+        """Generate `count_` tweets from ruled accounts and fan them out."""
+        accounts = self._accounts()
+        if not accounts:
+            return 0
+        usernames = sorted(accounts)
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+        payloads = []
+        for _ in range(count_):
+            username = self._rng.choice(usernames)
+            tweet_id = str(next(self._tweet_ids))
+            payloads.append(({
+                "id": tweet_id,
+                "text": self._rng.choice(self._texts),
+                "author_id": user_id_for(username),
+                "created_at": now,
+                "edit_history_tweet_ids": [tweet_id],
+            }, accounts[username]))
+        with self._lock:
+            connections = list(self._connections.values())
+            self.counters["tweets_generated"] += len(payloads)
+        for connection in connections:
+            for tweet, matching_rules in payloads:
+                self._send(connection, self._render(connection, tweet, matching_rules))
+        return len(payloads)
+
+    def disconnect(self, operational=False):
+        with self._lock:
+            connections = list(self._connections.values())
+            self.counters["forced_disconnects"] += len(connections)
+        for connection in connections:
+            if operational:
+                self._put(connection, json.dumps({"errors": [{
+                    "title": "operational-disconnect",
+                    "disconnect_type": "OperationalDisconnect",
+                    "detail": "This stream has been disconnected for operational reasons.",
+                    "type": "https://api.twitter.com/2/problems/operational-disconnect"}]}),
+                          evict=True)
+            self._put(connection, None, evict=True)
+        return len(connections)
+
+    def _render(self, connection, tweet, matching_rules):
+        with self._lock:
+            kind = self._malformed.pop(0) if self._malformed else None
+            if kind:
+                self.counters["malformed_sent"] += 1
+        data = {key: value for key, value in tweet.items()
+                if key in _DEFAULT_TWEET_FIELDS or key in connection.tweet_fields}
+        if kind == "no_text":
+            data.pop("text")
+        line = json.dumps({"data": data, "matching_rules": matching_rules}, separators=(",", ":"))
+        if kind == "truncated":
+            return line[:len(line) // 2]
+        if kind == "garbage":
+            return "<html><body>502 Bad Gateway</body></html>"
+        return line
+
+    def _send(self, connection, line):
+        if not self._put(connection, line):
+            # The real stream disconnects consumers that fall too far behind.
+            with self._lock:
+                self.counters["slow_disconnects"] += 1
+            self._drain(connection)
+            self._put(connection, None, evict=True)
+
+    def _put(self, connection, line, evict=False):
+        """
+        Queue a line without blocking. On a full queue, either give up or -
+        for disconnect notices and the end-of-stream sentinel, which must
+        always arrive - drop the oldest queued lines to make room.
+        """
+        while True:
+            try:
+                connection.lines.put_nowait(line)
+                break
+            except queue.Full:
+                if not evict:
+                    return False
+            try:
+                connection.lines.get_nowait()
+            except queue.Empty:
+                pass
+        if line is not None:
+            with self._lock:
+                self.counters["lines_sent"] += 1
+        return True
+
+    @staticmethod
+    def _drain(connection):
+        while True:
+            try:
+                connection.lines.get_nowait()
+            except queue.Empty:
+                return
+
+    def run_generator(self, tick=0.01):
+        """Emit tweets at `self.rate` per second, forever."""
+        owed = 0.0
+        last = time.monotonic()
+        while True:
+            time.sleep(tick)
+            now = time.monotonic()
+            owed += (now - last) * self.rate
+            last = now
+            if owed >= 1:
+                whole = int(owed)
+                owed -= whole
+                self.emit(whole)
+
+    # ------------------------------------------------------------------
+    # Faults
+    # ------------------------------------------------------------------
+    def inject_rate_limit(self, count_, reset, path=""):
+        with self._lock:
+            self._rate_limits.append([path, count_, reset])
+
+    def inject_malformed(self, count_, kind="truncated"):
+        with self._lock:
+            self._malformed.extend([kind] * count_)
+
+    def take_rate_limit(self, path):
+        """Reset seconds if this request should get a 429, else None."""
+        with self._lock:
+            for entry in self._rate_limits:
+                prefix, remaining, reset = entry
+                if path.startswith(prefix) and remaining > 0:
+                    entry[1] -= 1
+                    if entry[1] == 0:
+                        self._rate_limits.remove(entry)
+                    self.counters["rate_limited"] += 1
+                    return reset
+        return None
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, rate=self.rate, rules=len(self._rules),
+                        pending_malformed=len(self._malformed),
+                        pending_rate_limits=[list(entry) for entry in self._rate_limits],
+                        connections=[{"id": c.id, "backlog": c.lines.qsize(), "sent": c.sent,
+                                      "age_seconds": round(time.time() - c.opened_at, 1)}
+                                     for c in self._connections.values()])
+
+
+def create_app(mock):
+    app = Flask(__name__)
+
+    @app.before_request
+    def check_request():
+        if request.path.startswith("/2/"):
+            if not request.headers.get("Authorization", "").startswith("Bearer "):
+                return _problem(401, "Unauthorized", "Unauthorized")
+            reset = mock.take_rate_limit(request.path)
+            if reset is not None:
+                response, status = _problem(429, "Too Many Requests", "Too Many Requests")
+                response.headers["x-rate-limit-limit"] = str(RATE_LIMIT_LIMIT)
+                response.headers["x-rate-limit-remaining"] = "0"
+                response.headers["x-rate-limit-reset"] = str(int(time.time() + reset))
+                return response, status
+        return None
+
+    @app.after_request
+    def rate_limit_headers(response):
+        if request.path.startswith("/2/") and "x-rate-limit-limit" not in response.headers:
+            response.headers["x-rate-limit-limit"] = str(RATE_LIMIT_LIMIT)
+            response.headers["x-rate-limit-remaining"] = str(RATE_LIMIT_LIMIT - 1)
+            response.headers["x-rate-limit-reset"] = str(int(time.time()) + RATE_LIMIT_WINDOW)
+        return response
+
+    # --- Filtered stream ------------------------------------------------
+    @app.route("/2/tweets/search/stream")
+    def stream():
+        tweet_fields = set(filter(None, request.args.get("tweet.fields", "").split(",")))
+        connection = mock.open_connection(tweet_fields)
+        if connection is None:
+            return _problem(429, "ConnectionException",
+                            "This stream is currently at the maximum allowed connection limit.",
+                            "https://api.twitter.com/2/problems/streaming-connection",
+                            connection_issue="TooManyConnections")
+        return Response(mock.stream_lines(connection), mimetype="application/json")
+
+    @app.route("/2/tweets/search/stream/rules", methods=["GET"])
+    def get_rules():
+        rules = mock.rules()
+        meta = {"sent": datetime.now(timezone.utc).isoformat(), "result_count": len(rules)}
+        return jsonify(dict({"meta": meta}, **({"data": rules} if rules else {})))
+
+    @app.route("/2/tweets/search/stream/rules", methods=["POST"])
+    def post_rules():
+        body = request.get_json(silent=True) or {}
+        sent = datetime.now(timezone.utc).isoformat()
+        if "add" in body:
+            created, errors = mock.add_rules(body["add"])
+            response = {"meta": {"sent": sent, "summary": {
+                "created": len(created), "not_created": len(errors),
+                "valid": len(created), "invalid": len(errors)}}}
+        elif "delete" in body:
+            deleted, errors = mock.delete_rules((body["delete"] or {}).get("ids", []))
+            created = []
+            response = {"meta": {"sent": sent, "summary": {
+                "deleted": deleted, "not_deleted": len(errors)}}}
+        else:
+            return _problem(400, "Invalid Request", "One of add or delete is required.")
+        if created:
+            response["data"] = created
+        if errors:
+            response["errors"] = errors
+        return jsonify(response)
+
+    # --- Users ----------------------------------------------------------
+    def _user(username):
+        return {"id": user_id_for(username), "name": username.title(), "username": username,
+                "verified": False, "protected": False, "created_at": "2021-01-01T00:00:00.000Z",
+                "public_metrics": {"followers_count": 1000, "following_count": 100,
+                                   "tweet_count": 5000, "listed_count": 10}}
+
+    def _lookup(usernames):
+        found, errors = [], []
+        for username in usernames:
+            # Names starting with "missing" behave like unknown accounts.
+            if username.lower().startswith("missing"):
+                errors.append({"value": username, "detail": f"Could not find user with usernames: [{username}].",
+                               "title": "Not Found Error", "resource_type": "user",
+                               "parameter": "usernames", "resource_id": username,
+                               "type": "https://api.twitter.com/2/problems/resource-not-found"})
+            else:
+                found.append(_user(username))
+        return found, errors
+
+    @app.route("/2/users/by")
+    def users_by():
+        usernames = [name for name in request.args.get("usernames", "").split(",") if name]
+        if not usernames or len(usernames) > 100:
+            return _problem(400, "Invalid Request", "The `usernames` query parameter must hold 1-100 names.")
+        found, errors = _lookup(usernames)
+        return jsonify(dict({"data": found} if found else {}, **({"errors": errors} if errors else {})))
+
+    @app.route("/2/users/by/username/<username>")
+    def user_by_username(username):
+        found, errors = _lookup([username])
+        return jsonify({"data": found[0]} if found else {"errors": errors})
+
+    # --- Control API ----------------------------------------------------
+    @app.route("/mock/burst", methods=["POST"])
+    def burst():
+        body = request.get_json(silent=True) or {}
+        return jsonify({"emitted": mock.emit(int(body.get("count", 100)))})
+
+    @app.route("/mock/disconnect", methods=["POST"])
+    def disconnect():
+        body = request.get_json(silent=True) or {}
+        return jsonify({"disconnected": mock.disconnect(bool(body.get("operational")))})
+
+    @app.route("/mock/rate-limit", methods=["POST"])
+    def rate_limit():
+        body = request.get_json(silent=True) or {}
+        mock.inject_rate_limit(int(body.get("count", 1)), float(body.get("reset", 15)),
+                               body.get("path", ""))
+        return jsonify(mock.stats()["pending_rate_limits"])
+
+    @app.route("/mock/malformed", methods=["POST"])
+    def malformed():
+        body = request.get_json(silent=True) or {}
+        kind = body.get("kind", "truncated")
+        if kind not in ("truncated", "garbage", "no_text"):
+            return jsonify({"message": f"Unknown kind: {kind}"}), 400
+        mock.inject_malformed(int(body.get("count", 1)), kind)
+        return jsonify({"pending": mock.stats()["pending_malformed"]})
+
+    @app.route("/mock/rate", methods=["POST"])
+    def set_rate():
+        body = request.get_json(silent=True) or {}
+        mock.rate = max(0.0, float(body.get("rate", mock.rate)))
+        return jsonify({"rate": mock.rate})
+
+    @app.route("/mock/stats")
+    def stats():
+        return jsonify(mock.stats())
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local mock of the Twitter v2 stream, rules and users API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MOCK_TWITTER_PORT)
+    parser.add_argument("--rate", type=float, default=5.0, help="sustained tweets/sec")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-connections", type=int, default=1)
+    parser.add_argument("--buffer", type=int, default=10000,
+                        help="lines a client may fall behind before it is disconnected")
+    args = parser.parse_args(argv)
+
+    mock = MockTwitter(rate=args.rate, seed=args.seed, max_connections=args.max_connections,
+                       buffer=args.buffer)
+    threading.Thread(target=mock.run_generator, name="mock-twitter-generator", daemon=True).start()
+    logging.info(f"Mock Twitter API on http://{args.host}:{args.port} "
+                 f"(set TWITTER_API_BASE_URL=http://{args.host}:{args.port})")
+    create_app(mock).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
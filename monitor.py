@@ -1,10 +1,11 @@
 # Optional: Create a simple monitoring script
-import requests
 import time
+from http_client import http
 
 def check_endpoint(url):
     try:
-        response = requests.get(url)
+        # No retries: a failed health check should be reported, not hidden.
+        response = http.get(url, retries=0, timeout=(2, 5))
         return response.status_code == 200
     except:
         return False
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { Inter } from "next/font/google";
 import Head from 'next/head';
 import { io } from 'socket.io-client';
@@ -17,13 +17,26 @@ interface Tweet {
   };
 }
 
+// The server batches socket output: one 'batch' frame carries many events.
+interface SocketFrame {
+  events: { event: string; data: any }[];
+}
+
 interface WhaleActivity {
+  seq: number;
   time: string;
   wallet: string;
   amount: number;
   type: 'buy' | 'sell';
 }
 
+interface WhalePage {
+  activities: WhaleActivity[];
+  cursor: number;
+  gap: boolean;
+  epoch: number;
+}
+
 export default function Dashboard() {
   const [tweets, setTweets] = useState<Tweet[]>([]);
   const [trackedAccounts, setTrackedAccounts] = useState<string[]>([]);
@@ -36,11 +49,17 @@ export default function Dashboard() {
     stopLoss: 5,
     riskReward: 3
   });
+  // Sequence number of the newest whale event we hold, and the server's
+  // epoch it belongs to (seq numbers start over when the server restarts).
+  const whaleCursor = useRef(0);
+  const whaleEpoch = useRef<number | null>(null);
 
   useEffect(() => {
     // Initialize socket connection
     const socket = io('http://localhost:5002', {
       transports: ['websocket'],
+      // Only the topics this page renders are sent to us.
+      auth: { topics: ['tweets', 'whales'] },
       cors: {
         origin: "http://localhost:3000"
       }
@@ -48,15 +67,30 @@ export default function Dashboard() {
 
     socket.on('connect', () => {
       console.log('Connected to backend');
+      // Covers both the initial load and the gap after a reconnect.
+      fetchWhaleActivity();
     });
 
-    socket.on('new_tweet', (tweet: Tweet) => {
-      setTweets(prev => [tweet, ...prev].slice(0, 50));
+    const handlers: Record<string, (data: any) => void> = {
+      new_whale_activity: (activity: WhaleActivity) => {
+        if (activity.seq === whaleCursor.current + 1) {
+          applyWhaleEvents([activity]);
+        } else {
+          // We missed something in between; fetch just the gap.
+          fetchWhaleActivity();
+        }
+      },
+      new_tweet: (tweet: Tweet) => {
+        setTweets(prev => [tweet, ...prev].slice(0, 50));
+      },
+    };
+
+    socket.on('batch', (frame: SocketFrame) => {
+      frame.events.forEach(({ event, data }) => handlers[event]?.(data));
     });
 
     // Load initial data
     fetchTrackedAccounts();
-    fetchWhaleActivity();
 
     return () => {
       socket.disconnect();
@@ -73,11 +107,37 @@ export default function Dashboard() {
     }
   };
 
-  const fetchWhaleActivity = async () => {
+  // Append events (oldest first) newer than our cursor.
+  const applyWhaleEvents = (events: WhaleActivity[]) => {
+    const fresh = events.filter(event => event.seq > whaleCursor.current);
+    if (fresh.length === 0) return;
+    whaleCursor.current = fresh[fresh.length - 1].seq;
+    setWhaleActivity(prev => [...prev, ...fresh].slice(-50));
+  };
+
+  const resetWhales = (epoch: number) => {
+    whaleEpoch.current = epoch;
+    whaleCursor.current = 0;
+    setWhaleActivity([]);
+  };
+
+  const fetchWhaleActivity = async (): Promise<void> => {
     try {
-      const response = await fetch('http://localhost:5002/api/whale-activity');
-      const data = await response.json();
-      setWhaleActivity(data.activities);
+      // Only fetch events newer than the ones we already have.
+      const since = whaleCursor.current ? `?since=${whaleCursor.current}` : '';
+      const response = await fetch(`http://localhost:5002/api/whale-activity${since}`);
+      const page: WhalePage = await response.json();
+      if (since && (page.epoch !== whaleEpoch.current || page.cursor < whaleCursor.current)) {
+        // The server restarted: our cursor means nothing now. Start over.
+        resetWhales(page.epoch);
+        return fetchWhaleActivity();
+      }
+      if (page.gap) {
+        // Events after our cursor were already dropped; replace the list.
+        resetWhales(page.epoch);
+      }
+      whaleEpoch.current = page.epoch;
+      applyWhaleEvents(page.activities);
     } catch (error) {
       console.error('Error fetching whale activity:', error);
     }
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+
+A small staged pipeline with bounded queues, used to decouple the tweepy
+streaming callback from everything downstream of it (parsing, scoring,
+dedupe, trade decisions, execution and socket broadcasts).
+
+Each stage owns a bounded queue and one or more worker threads. Workers drain
+up to `batch_size` items at a time so batch-aware handlers (e.g. extracting
+signals from a burst of tweets) see the whole burst. What happens when a
+queue is full is decided by the stage's backpressure policy:
+
+  - "drop_oldest": evict the oldest queued item to make room (freshest wins)
+  - "drop_newest": reject the incoming item
+  - "block":       wait up to `block_timeout` seconds, then drop the item
+
+Every stage keeps counters for enqueued, processed, dropped and failed items,
+and latency histograms for queue lag (time spent waiting in the queue) and
+service time (time spent in the handler, per batch).
+"""
+
+import time
+import queue
+import logging
+import threading
+
+from metrics import Histogram, FINE_BUCKETS_MS
+
+BACKPRESSURE_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class StageStats:
+    """Counters for one pipeline stage."""
+
+    __slots__ = ("enqueued", "processed", "dropped", "errors",
+                 "lag_last", "lag_max", "lag_total", "lag_ms", "service_ms", "_lock")
+
+    def __init__(self):
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+        self.lag_ms = Histogram(FINE_BUCKETS_MS)
+        self.service_ms = Histogram(FINE_BUCKETS_MS)
+        self._lock = threading.Lock()
+
+    def record_lag(self, lags):
+        with self._lock:
+            self.processed += len(lags)
+            for lag in lags:
+                self.lag_total += lag
+                if lag > self.lag_max:
+                    self.lag_max = lag
+            self.lag_last = lags[-1]
+        for lag in lags:
+            self.lag_ms.observe(lag * 1000)
+
+    def record_service(self, seconds, items):
+        # Every item of a batch waits for the whole batch.
+        self.service_ms.observe(seconds * 1000, items)
+
+    def as_dict(self):
+        with self._lock:
+            average = self.lag_total / self.processed if self.processed else 0.0
+            return {
+                "enqueued": self.enqueued,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "lag_ms_last": round(self.lag_last * 1000, 3),
+                "lag_ms_avg": round(average * 1000, 3),
+                "lag_ms_max": round(self.lag_max * 1000, 3),
+                "lag_ms_p99": self.lag_ms.percentile(0.99),
+                "service_ms_p50": self.service_ms.percentile(0.50),
+                "service_ms_p99": self.service_ms.percentile(0.99),
+            }
+
+
+class Stage:
+    """
+    One pipeline stage. `handler` receives a list of payloads and returns a
+    list of results for the next stage; a result of None is filtered out.
+    """
+
+    def __init__(self, name, handler, maxsize=1000, policy="block", workers=1,
+                 batch_size=1, block_timeout=0.5):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.name = name
+        self.handler = handler
+        self.policy = policy
+        self.workers = workers
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = StageStats()
+        self.next_stage = None
+        self.busy = 0    # workers currently between drain and hand-off
+        self._threads = []
+        self._running = threading.Event()
+
+    def put(self, payload):
+        """Enqueue a payload according to the stage's backpressure policy."""
+        item = (time.perf_counter(), payload)
+        try:
+            if self.policy == "block":
+                self.queue.put(item, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(item)
+        except queue.Full:
+            if self.policy != "drop_oldest":
+                self._count_drop()
+                return False
+            try:
+                self.queue.get_nowait()
+                self._count_drop()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self._count_drop()
+                return False
+        with self.stats._lock:
+            self.stats.enqueued += 1
+        return True
+
+    def start(self):
+        self._running.set()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"pipeline-{self.name}-{index}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._running.clear()
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def _count_drop(self):
+        with self.stats._lock:
+            self.stats.dropped += 1
+        if self.stats.dropped % 100 == 1:
+            logging.warning(f"Pipeline stage '{self.name}' is dropping items "
+                            f"({self.stats.dropped} dropped so far)")
+
+    def _drain(self):
+        try:
+            batch = [self.queue.get(timeout=0.25)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while self._running.is_set():
+            batch = self._drain()
+            if not batch:
+                continue
+            with self.stats._lock:
+                self.busy += 1
+            try:
+                self._process(batch)
+            finally:
+                with self.stats._lock:
+                    self.busy -= 1
+
+    def _process(self, batch):
+        now = time.perf_counter()
+        self.stats.record_lag([now - enqueued_at for enqueued_at, _ in batch])
+        try:
+            results = self.handler([payload for _, payload in batch])
+        except Exception as e:
+            with self.stats._lock:
+                self.stats.errors += len(batch)
+            logging.error(f"Pipeline stage '{self.name}' failed: {e}")
+            return
+        finally:
+            self.stats.record_service(time.perf_counter() - now, len(batch))
+        if self.next_stage is None:
+            return
+        for result in results:
+            if result is not None:
+                self.next_stage.put(result)
+
+
+class Pipeline:
+    """A chain of stages; submit() feeds the first stage."""
+
+    def __init__(self, stages):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = list(stages)
+        for current, following in zip(self.stages, self.stages[1:]):
+            current.next_stage = following
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if not self._started:
+                for stage in self.stages:
+                    stage.start()
+                self._started = True
+        return self
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        self._started = False
+
+    def submit(self, payload):
+        """Hand a payload to the first stage. Never blocks on a drop_* policy."""
+        return self.stages[0].put(payload)
+
+    def idle(self):
+        return all(stage.depth() == 0 and stage.busy == 0 for stage in self.stages)
+
+    def join(self, timeout=None, poll=0.005):
+        """
+        Wait until every queue is empty and no worker is mid-batch. Returns
+        False on timeout. Meant for replays and shutdown, not the hot path.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # A worker may have taken an item without having marked itself
+            # busy yet; require two idle scans with nothing enqueued between.
+            enqueued = sum(stage.stats.enqueued for stage in self.stages)
+            if self.idle():
+                time.sleep(poll)
+                if self.idle() and enqueued == sum(stage.stats.enqueued for stage in self.stages):
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+
+    def stats(self):
+        return {
+            stage.name: dict(stage.stats.as_dict(), depth=stage.depth(),
+                             capacity=stage.queue.maxsize, policy=stage.policy)
+            for stage in self.stages
+        }
+
+
+def per_item(func):
+    """Adapt a one-payload handler to the list-in/list-out stage interface."""
+    def handler(payloads):
+        return [func(payload) for payload in payloads]
+    handler.__name__ = getattr(func, "__name__", "handler")
+    return handler
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+price_feed.py
+
+One place prices come from. A feed backend produces batches of ticks and
+publishes them to a PriceCache, which keeps the latest tick per token and
+fans every batch out to its subscribers (the position book, the scalping
+engine, the dashboards). Nothing else fetches prices; it reads the cache.
+
+Backends:
+
+  DexscreenerPriceFeed   polls the Dexscreener tokens endpoint every
+                         `interval` seconds, up to 30 mints per request.
+  ReplayPriceFeed        replays a recorded tick file (CSV, or Parquet if
+                         pyarrow is installed) at `speed`x; 0 = flat out.
+  SimulatedPriceFeed     a random walk per token, for running without data.
+
+The polled and simulated feeds ask a `tokens()` callable what to price on
+every round, so the set follows the open positions without any bookkeeping.
+fetch(tokens) prices tokens on demand (a mint about to be bought, before any
+round has seen it); it returns no tick for a token the feed can't price,
+such as a cashtag on Dexscreener or anything at all on a replay.
+
+Tick files have a header row with ts, token and price columns and optional
+volume, sol_reserve and token_reserve columns; ts is epoch seconds or an
+ISO-8601 timestamp.
+"""
+
+import os
+import csv
+import math
+import time
+import random
+import logging
+import threading
+from datetime import datetime
+
+from http_client import http
+from signal_extractor import is_valid_mint
+
+DEXSCREENER_TOKENS_API_URL = "https://api.dexscreener.com/latest/dex/tokens/{addresses}"
+DEXSCREENER_BATCH_SIZE = 30   # addresses per request, the endpoint's limit
+
+PRICE_POLL_INTERVAL = float(os.getenv("PRICE_POLL_INTERVAL", "2"))
+PRICE_MAX_AGE = float(os.getenv("PRICE_MAX_AGE", "60"))
+# SOL side of the pools the simulated feed makes up, for fill simulation.
+SIMULATED_POOL_SOL = float(os.getenv("SIMULATED_POOL_SOL", "80"))
+
+
+class PriceTick:
+    # Reserves are the pool's, when the source knows them (for fill simulation).
+    __slots__ = ("token", "price", "volume", "ts", "source", "sol_reserve", "token_reserve")
+
+    def __init__(self, token, price, volume=0.0, ts=None, source=None, sol_reserve=None,
+                 token_reserve=None):
+        self.token = token
+        self.price = price
+        self.volume = volume
+        self.ts = time.time() if ts is None else ts
+        self.source = source
+        self.sol_reserve = sol_reserve
+        self.token_reserve = token_reserve
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class PriceCache:
+    """Latest tick per token, plus fan-out of every published batch."""
+
+    def __init__(self, max_age=PRICE_MAX_AGE):
+        self.max_age = max_age
+        self._latest = {}         # token -> PriceTick
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.subscriber_errors = 0
+
+    def subscribe(self, callback):
+        """callback(ticks) is called on the feed's thread with every batch; keep it quick."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def publish(self, ticks):
+        if not ticks:
+            return
+        with self._lock:
+            latest = self._latest
+            for tick in ticks:
+                current = latest.get(tick.token)
+                if current is None or tick.ts >= current.ts:
+                    latest[tick.token] = tick
+            self.ticks += len(ticks)
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(ticks)
+            except Exception as e:
+                self.subscriber_errors += 1
+                logging.error(f"Price subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+    def get(self, token):
+        return self._latest.get(token)
+
+    def price(self, token, max_age=None):
+        """Latest price of token, or None if there is none younger than max_age."""
+        tick = self._latest.get(token)
+        if tick is None:
+            return None
+        if time.time() - tick.ts > (self.max_age if max_age is None else max_age):
+            return None
+        return tick.price
+
+    def snapshot(self, tokens=None):
+        with self._lock:
+            if tokens is None:
+                return {token: tick.as_dict() for token, tick in self._latest.items()}
+            return {token: self._latest[token].as_dict() for token in tokens if token in self._latest}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tokens": len(self._latest),
+                "ticks": self.ticks,
+                "subscribers": len(self._subscribers),
+                "subscriber_errors": self.subscriber_errors,
+            }
+
+
+class PriceFeed:
+    """Base backend: a daemon thread that publishes poll() results every `interval`."""
+
+    name = "price-feed"
+
+    def __init__(self, cache, interval=PRICE_POLL_INTERVAL):
+        self.cache = cache
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.errors = 0
+        self.ticks = 0
+        self.poll_ms_last = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def poll(self):
+        raise NotImplementedError
+
+    def fetch(self, tokens):
+        """Ticks for `tokens` now, for those this feed can price."""
+        return []
+
+    def _run(self):
+        while not self._stopped.is_set():
+            started = time.perf_counter()
+            try:
+                ticks = self.poll()
+                self.cache.publish(ticks)
+                self.ticks += len(ticks)
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"{self.name} poll failed: {e}")
+            self.polls += 1
+            self.poll_ms_last = (time.perf_counter() - started) * 1000
+            self._stopped.wait(max(0.0, self.interval - self.poll_ms_last / 1000))
+
+    def stats(self):
+        return {
+            "feed": self.name,
+            "polls": self.polls,
+            "ticks": self.ticks,
+            "errors": self.errors,
+            "poll_ms_last": round(self.poll_ms_last, 3),
+        }
+
+
+class DexscreenerPriceFeed(PriceFeed):
+    """Polls SOL-quoted prices for every mint `tokens()` returns, batched per request."""
+
+    name = "dexscreener-prices"
+
+    def __init__(self, cache, tokens, interval=PRICE_POLL_INTERVAL, batch_size=DEXSCREENER_BATCH_SIZE):
+        super().__init__(cache, interval)
+        self.tokens = tokens
+        self.batch_size = batch_size
+
+    def poll(self):
+        return self.fetch(self.tokens())
+
+    def fetch(self, tokens):
+        # Cashtags and symbols can't be priced by address; skip them.
+        mints = sorted(token for token in tokens if is_valid_mint(token))
+        ticks = []
+        for start in range(0, len(mints), self.batch_size):
+            chunk = mints[start:start + self.batch_size]
+            response = http.get(DEXSCREENER_TOKENS_API_URL.format(addresses=",".join(chunk)))
+            response.raise_for_status()
+            ticks.extend(self._parse(response.json(), set(chunk)))
+        return ticks
+
+    def _parse(self, data, wanted):
+        # Several pools per mint: price each one off its deepest SOL pool.
+        best = {}
+        for pair in data.get("pairs") or ():
+            token = (pair.get("baseToken") or {}).get("address")
+            if token not in wanted or (pair.get("quoteToken") or {}).get("symbol") not in ("SOL", "WSOL"):
+                continue
+            liquidity = (pair.get("liquidity") or {}).get("usd") or 0
+            if token not in best or liquidity > best[token][0]:
+                best[token] = (liquidity, pair)
+        now = time.time()
+        ticks = []
+        for token, (_, pair) in best.items():
+            try:
+                price = float(pair["priceNative"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            volume = float((pair.get("volume") or {}).get("m5") or 0)
+            liquidity = pair.get("liquidity") or {}
+            ticks.append(PriceTick(token, price, volume, now, "dexscreener",
+                                   sol_reserve=liquidity.get("quote"),
+                                   token_reserve=liquidity.get("base")))
+        return ticks
+
+
+class SimulatedPriceFeed(PriceFeed):
+    """
+    A geometric random walk for each token in `tokens()`, starting at 1 SOL,
+    quoted from a pool holding `pool_sol` SOL.
+    """
+
+    name = "simulated-prices"
+
+    def __init__(self, cache, tokens, interval=0.05, volatility=0.004, pool_sol=SIMULATED_POOL_SOL):
+        super().__init__(cache, interval)
+        self.tokens = tokens
+        self.volatility = volatility
+        self.pool_sol = pool_sol
+        self._prices = {}
+
+    def poll(self):
+        return self.fetch(self.tokens())
+
+    def fetch(self, tokens):
+        now = time.time()
+        ticks = []
+        for token in tokens:
+            price = self._prices.get(token, 1.0) * math.exp(random.gauss(0, self.volatility))
+            self._prices[token] = price
+            ticks.append(PriceTick(token, price, random.uniform(1, 10), now, "simulated",
+                                   sol_reserve=self.pool_sol, token_reserve=self.pool_sol / price))
+        return ticks
+
+
+def _parse_ts(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def _optional_float(value):
+    return float(value) if value not in (None, "") else None
+
+
+def _tick(row):
+    return PriceTick(row["token"], float(row["price"]), float(row.get("volume") or 0),
+                     _parse_ts(row["ts"]), "replay",
+                     sol_reserve=_optional_float(row.get("sol_reserve")),
+                     token_reserve=_optional_float(row.get("token_reserve")))
+
+
+def read_ticks(path):
+    """Yield PriceTicks from a CSV or Parquet tick file, in file order."""
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Replaying Parquet tick files needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches():
+            for row in batch.to_pylist():
+                yield _tick(row)
+        return
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield _tick(row)
+
+
+class ReplayPriceFeed(PriceFeed):
+    """
+    Replays a tick file, keeping the recorded gaps divided by `speed`. Ticks
+    sharing a timestamp are published as one batch. With rebase=True (the
+    default) tick times are moved to the replay clock so the cache treats
+    them as fresh.
+    """
+
+    name = "replay-prices"
+
+    def __init__(self, cache, path, speed=1.0, loop=False, rebase=True):
+        super().__init__(cache, interval=0)
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.rebase = rebase
+        self.finished = threading.Event()
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                self._replay_once()
+                if not self.loop:
+                    break
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"{self.name} failed on {self.path}: {e}")
+        finally:
+            self.finished.set()
+
+    def _replay_once(self):
+        started = time.time()
+        first_ts = None
+        batch = []
+        for tick in read_ticks(self.path):
+            if self._stopped.is_set():
+                return
+            if batch and tick.ts != batch[0].ts:
+                self._publish(batch, started, first_ts)
+                batch = []
+            if first_ts is None:
+                first_ts = tick.ts
+            batch.append(tick)
+        if batch:
+            self._publish(batch, started, first_ts)
+
+    def _publish(self, batch, started, first_ts):
+        offset = batch[0].ts - first_ts
+        if self.speed > 0:
+            delay = started + offset / self.speed - time.time()
+            if delay > 0:
+                self._stopped.wait(delay)
+        if self.rebase:
+            now = time.time()
+            for tick in batch:
+                tick.ts = now
+        self.cache.publish(batch)
+        self.polls += 1
+        self.ticks += len(batch)
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+replay.py
+
+Deterministic tweet replay and throughput benchmark for the signal pipeline.
+
+Feeds a JSONL corpus of tweets (one Twitter API v2 tweet object per line:
+id, text, author_id, created_at) through the real listener code -
+TwitterStreamListener.on_tweet and the tweet pipeline behind it, down to
+trade execution and the broadcast stage - without Twitter credentials.
+Mints get simulated pools and prices (SimulatedPriceFeed) on first sight, so
+trades are sized, filled, exited and broadcast as they would be live.
+
+    python replay.py generate corpus.jsonl --count 5000 --seed 7
+    python replay.py run corpus.jsonl                 # as fast as possible
+    python replay.py run corpus.jsonl --rate 200      # 200 tweets/sec
+    python replay.py run corpus.jsonl --speed 10      # recorded timing, 10x
+    python replay.py bench                            # compare with baseline
+    python replay.py bench --update-baseline
+
+The synthetic corpus is a pure function of (count, seed), so two runs with the
+same arguments replay byte-identical input. `run` reports tweets/sec plus
+queue lag and service time percentiles per stage and end to end.
+
+`bench` runs a fixed set of scenarios over a generated corpus and times a
+fixed calibration loop (plain Python: string joins, a regex, dict updates)
+in the same process. Each scenario's throughput is normalised to tweets per
+calibration loop, which cancels most of the difference between machines, and
+every scenario - extraction included - is compared with the checked-in
+baseline (benchmarks/replay_baseline.json). The command exits non-zero if any
+normalised throughput dropped by more than the tolerance, if a scenario has no
+baseline, or if the baseline was recorded with a different sentiment setup
+(VADER lexicon present or not). Re-record it with --update-baseline.
+"""
+
+import os
+import sys
+import json
+import time
+import re
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from signal_extractor import BASE58_ALPHABET, MINT_BYTE_LENGTH
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "benchmarks", "replay_baseline.json")
+BENCH_CORPUS_SIZE = 5000
+BENCH_SEED = 1337
+BENCH_TOLERANCE = 0.25    # fail if normalised throughput drops by more than 25%
+BENCH_REPEATS = 3
+BENCH_MIN_SECONDS = 1.0   # per micro-benchmark repeat
+
+_HYPE = ["LFG", "aping in", "this one is going to send", "early", "CA below",
+         "dev is based", "moon soon", "just bought a bag", "don't fade this"]
+_CHATTER = ["gm", "market looks choppy today", "who is still up?", "taking profits, be careful",
+            "rugs everywhere this week", "new week new coins", "thread on risk management below"]
+_SYMBOLS = ["BONK", "WIF", "POPCAT", "MEW", "BOME", "SLERF", "MYRO", "SAMO", "PONKE", "GIGA"]
+
+
+def _b58encode(raw):
+    number = int.from_bytes(raw, "big")
+    encoded = ""
+    while number:
+        number, digit = divmod(number, 58)
+        encoded = BASE58_ALPHABET[digit] + encoded
+    leading_zeros = len(raw) - len(raw.lstrip(b"\0"))
+    return "1" * leading_zeros + encoded
+
+
+def generate_corpus(count, seed=0, rate=20.0, start=None):
+    """
+    Build `count` synthetic tweets. Roughly: a third carry a mint address
+    (drawn from a small pool, so cooldowns trigger), a fifth a cashtag, some
+    hide a mint inside a link and a few are stream redeliveries of an
+    earlier tweet. Arrival times follow a Poisson process at `rate`/sec.
+    """
+    rng = random.Random(seed)
+    mints = [_b58encode(bytes(rng.getrandbits(8) for _ in range(MINT_BYTE_LENGTH)))
+             for _ in range(200)]
+    authors = [str(10**17 + rng.randrange(10**17)) for _ in range(50)]
+    created = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    next_id = 1_700_000_000_000_000_000
+    tweets = []
+    for _ in range(count):
+        created += timedelta(seconds=rng.expovariate(rate))
+        if tweets and rng.random() < 0.03:
+            # Reconnect backfill redelivers a recent tweet verbatim.
+            tweets.append(dict(rng.choice(tweets[-50:])))
+            continue
+        roll = rng.random()
+        if roll < 0.35:
+            text = f"{rng.choice(_HYPE)} {rng.choice(mints)}"
+        elif roll < 0.55:
+            text = f"{rng.choice(_HYPE)} ${rng.choice(_SYMBOLS)}"
+        elif roll < 0.65:
+            text = f"{rng.choice(_CHATTER)} https://dexscreener.com/solana/{rng.choice(mints)}"
+        else:
+            text = rng.choice(_CHATTER)
+        next_id += rng.randrange(1, 10**6)
+        tweets.append({
+            "id": str(next_id),
+            "text": text,
+            "author_id": rng.choice(authors),
+            "created_at": created.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z",
+            "edit_history_tweet_ids": [str(next_id)],
+        })
+    return tweets
+
+
+def load_corpus(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_corpus(tweets, path):
+    with open(path, "w") as f:
+        for tweet in tweets:
+            f.write(json.dumps(tweet, separators=(",", ":")) + "\n")
+
+
+def _schedule(records, rate=0.0, speed=None):
+    """Offsets in seconds from the start of the replay, one per record."""
+    if speed:
+        times = [datetime.fromisoformat(record["created_at"].replace("Z", "+00:00"))
+                 for record in records]
+        first = times[0] if times else None
+        return [(moment - first).total_seconds() / speed for moment in times]
+    if rate:
+        return [index / rate for index in range(len(records))]
+    return [0.0] * len(records)
+
+
+def _percentiles(samples_ms):
+    if not samples_ms:
+        return {"p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(samples_ms)
+    pick = lambda fraction: round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 4)
+    return {"p50_ms": pick(0.50), "p90_ms": pick(0.90), "p99_ms": pick(0.99),
+            "max_ms": round(ordered[-1], 4)}
+
+
+def _histogram_summary(histogram):
+    snapshot = histogram.snapshot()
+    return {"p50_ms": histogram.percentile(0.50, snapshot),
+            "p99_ms": histogram.percentile(0.99, snapshot)}
+
+
+# ----------------------------------------------------------------------
+# Replay through the real listener and pipeline
+# ----------------------------------------------------------------------
+def _load_bot():
+    """Import integrated_bot with its logging turned down to warnings."""
+    import integrated_bot
+    logging.getLogger().setLevel(logging.WARNING)
+    return integrated_bot
+
+
+def replay(records, rate=0.0, speed=None, queue_size=None, seed=0, timeout=120):
+    """
+    Push `records` through TwitterStreamListener.on_tweet at the requested
+    pace and wait for the pipeline to drain. Returns the report dict.
+    """
+    import tweepy
+    from dedup import SignalDeduplicator
+    from price_feed import PriceCache, SimulatedPriceFeed
+    from trading import TradeManager, default_trade_parameters
+
+    bot = _load_bot()
+    random.seed(seed)    # simulated pools, prices and slippage
+    # Fresh per-run state, so runs don't see each other's cooldowns/caches.
+    bot.signal_deduplicator = SignalDeduplicator()
+    bot.sentiment_scorer.clear_cache()
+    bot.reset_latency()
+    # Every mint the corpus trades gets a simulated pool on first sight, as a
+    # live feed would price it, so trades are sized, filled and broadcast.
+    saved_prices = bot.price_cache, bot.price_feed
+    trade_manager = TradeManager(default_trade_parameters(), price_source=bot.quote)
+    bot.price_cache = PriceCache()
+    bot.price_feed = SimulatedPriceFeed(
+        bot.price_cache, lambda: {position.token for position in trade_manager.open_positions()})
+
+    @bot.price_cache.subscribe
+    def _apply_prices(ticks):
+        for exit_event in trade_manager.on_prices([(tick.token, tick.price) for tick in ticks]):
+            bot.topic_router.publish_fill(exit_event)
+    pipeline = bot.build_tweet_pipeline(ingress_size=queue_size).start()
+    listener = bot.TwitterStreamListener("replay", trade_manager, pipeline=pipeline)
+
+    tweets = [tweepy.Tweet(record) for record in records]
+    offsets = _schedule(records, rate, speed)
+    behind = 0
+    started = time.perf_counter()
+    wall_started = time.time()
+    try:
+        for index, (offset, tweet) in enumerate(zip(offsets, tweets)):
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif offset and delay < -0.01:
+                behind += 1
+            # As if the tweet had been posted at its scheduled send time.
+            tweet.created_at = datetime.fromtimestamp(wall_started + offset, timezone.utc)
+            listener.on_tweet(tweet)
+            if index % 256 == 255:
+                # A round of the price feed, so open positions can exit.
+                bot.price_cache.publish(bot.price_feed.poll())
+                bot.broadcaster.flush()
+        submitted_in = time.perf_counter() - started
+        drained = pipeline.join(timeout=timeout)
+        elapsed = time.perf_counter() - started
+    finally:
+        pipeline.stop()
+        bot.broadcaster.flush()
+        bot.price_cache, bot.price_feed = saved_prices
+
+    stages = {}
+    for stage in pipeline.stages:
+        stats = stage.stats
+        stages[stage.name] = {
+            "processed": stats.processed,
+            "dropped": stats.dropped,
+            "errors": stats.errors,
+            "lag": _histogram_summary(stats.lag_ms),
+            "service": _histogram_summary(stats.service_ms),
+        }
+    delivered = bot.tweet_latency.snapshot()[1]
+    return {
+        "tweets": len(tweets),
+        "pace": f"{speed}x recorded" if speed else (f"{rate}/s" if rate else "max"),
+        "drained": drained,
+        "elapsed_s": round(elapsed, 4),
+        "submit_s": round(submitted_in, 4),
+        "tweets_per_sec": round(len(tweets) / elapsed, 1) if elapsed else 0.0,
+        "delivered": delivered,
+        "behind_schedule": behind,
+        "trades": trade_manager.summary(),
+        "dedup": bot.signal_deduplicator.stats(),
+        "end_to_end": dict(_histogram_summary(bot.tweet_latency),
+                           avg_ms=bot.tweet_latency.as_dict()["avg_ms"]),
+        "segments": {segment: {key: summary[key] for key in ("count", "avg_ms", "p50_ms", "p99_ms")}
+                     for segment, summary in bot.latency_summary().items()},
+        "stages": stages,
+    }
+
+
+# ----------------------------------------------------------------------
+# Benchmark suite
+# ----------------------------------------------------------------------
+def _bench_batches(records, func, reset, batch_size=64, min_seconds=BENCH_MIN_SECONDS):
+    """
+    Time `func` over the corpus in batches, repeating whole passes (each from
+    cold caches, see `reset`) until at least `min_seconds` were measured.
+    """
+    texts = [record["text"] for record in records]
+    batch_ms = []
+    elapsed = 0.0
+    processed = 0
+    while elapsed < min_seconds:
+        reset()
+        for index in range(0, len(texts), batch_size):
+            batch_started = time.perf_counter()
+            func(texts[index:index + batch_size])
+            batch_elapsed = time.perf_counter() - batch_started
+            batch_ms.append(batch_elapsed * 1000)
+            elapsed += batch_elapsed
+        processed += len(texts)
+    return dict({"tweets_per_sec": round(processed / elapsed, 1)}, **_percentiles(batch_ms))
+
+
+def bench_extract(records):
+    """Regex extraction and mint validation only, 64-tweet batches."""
+    from signal_extractor import is_valid_mint
+    bot = _load_bot()
+    return _bench_batches(records, bot.signal_extractor.extract_many, is_valid_mint.cache_clear)
+
+
+def bench_parse(records):
+    """parse_trading_signals_many: extraction plus sentiment, 64-tweet batches."""
+    from signal_extractor import is_valid_mint
+    bot = _load_bot()
+
+    def reset():
+        is_valid_mint.cache_clear()
+        bot.sentiment_scorer.clear_cache()
+    return _bench_batches(records, bot.parse_trading_signals_many, reset)
+
+
+def bench_pipeline(records):
+    """The whole pipeline at maximum rate, with an ingress queue that never drops."""
+    report = replay(records, queue_size=len(records) + 1, seed=BENCH_SEED)
+    return dict({"tweets_per_sec": report["tweets_per_sec"]}, **report["end_to_end"])
+
+
+BENCHMARKS = {
+    "extract": bench_extract,
+    "parse_signals": bench_parse,
+    "pipeline": bench_pipeline,
+}
+
+
+_CALIBRATION_TOKEN = re.compile(r"[1-9A-HJ-NP-Za-km-z]{8,}")
+
+
+def _calibration_loop():
+    """A fixed, code-independent workload in the same style as the hot path."""
+    rng = random.Random(0)
+    words = ["".join(rng.choice(BASE58_ALPHABET) for _ in range(rng.randrange(4, 16)))
+             for _ in range(2000)]
+    counts = {}
+    for _ in range(10):
+        for index in range(0, len(words), 8):
+            text = " ".join(words[index:index + 8])
+            for token in _CALIBRATION_TOKEN.findall(text):
+                counts[token.lower()] = counts.get(token.lower(), 0) + 1
+    return counts
+
+
+def calibrate(min_seconds=BENCH_MIN_SECONDS):
+    """
+    Mean wall time of the calibration loop, in seconds, over at least
+    `min_seconds` - measured the same way as the benchmarks themselves.
+    """
+    loops = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < min_seconds:
+        _calibration_loop()
+        loops += 1
+    return (time.perf_counter() - started) / loops
+
+
+def _calibrated(bench, records):
+    """
+    One run of `bench`, normalised by calibration loops timed right before and
+    after it, so a machine that slows down or speeds up between scenarios is
+    not mistaken for a code change.
+    """
+    before = calibrate()
+    result = bench(records)
+    calibration_s = (before + calibrate()) / 2
+    result["calibration_ms"] = round(calibration_s * 1000, 3)
+    result["normalized"] = round(result["tweets_per_sec"] * calibration_s, 3)
+    return result
+
+
+def run_benchmarks(count=BENCH_CORPUS_SIZE, seed=BENCH_SEED, repeats=BENCH_REPEATS):
+    """
+    Best-of-`repeats` result for every benchmark, each with `normalized`: its
+    throughput in tweets per calibration loop.
+    """
+    bot = _load_bot()
+    records = generate_corpus(count, seed)
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        runs = [_calibrated(bench, records) for _ in range(repeats)]
+        results[name] = max(runs, key=lambda run: run["normalized"])
+    return {"corpus": {"count": count, "seed": seed},
+            "sentiment_lexicon": bot.sentiment_scorer.warm_up(),
+            "results": results}
+
+
+def compare(current, baseline, tolerance=BENCH_TOLERANCE):
+    """Return a list of regression messages (empty if none)."""
+    if current.get("sentiment_lexicon") != baseline.get("sentiment_lexicon"):
+        return [f"baseline recorded with sentiment_lexicon={baseline.get('sentiment_lexicon')}, "
+                f"this run has {current.get('sentiment_lexicon')}; re-record it"]
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("normalized"):
+            regressions.append(f"{name}: no baseline")
+            continue
+        floor = base["normalized"] * (1 - tolerance)
+        if result["normalized"] < floor:
+            regressions.append(f"{name}: {result['normalized']} tweets/calibration, baseline "
+                               f"{base['normalized']} (floor {round(floor, 3)})")
+    return regressions
+
+
+def _print_bench(current, baseline):
+    print(f"sentiment lexicon: {current['sentiment_lexicon']}")
+    for name, result in current["results"].items():
+        base = (baseline or {}).get("results", {}).get(name)
+        line = (f"{name:>14}: {result['tweets_per_sec']:>10} tweets/sec  "
+                f"{result['normalized']:>9} /calibration ({result['calibration_ms']} ms)  "
+                f"p99 {result['p99_ms']} ms")
+        if base and base.get("normalized"):
+            change = (result["normalized"] / base["normalized"] - 1) * 100
+            line += f"  ({change:+.1f}% vs baseline {base['normalized']})"
+        print(line)
+
+
+def _write_baseline(current, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(current, f, indent=2)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay tweets through the signal pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a synthetic corpus")
+    generate.add_argument("path")
+    generate.add_argument("--count", type=int, default=BENCH_CORPUS_SIZE)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--rate", type=float, default=20.0, help="mean tweets/sec of created_at")
+
+    run = commands.add_parser("run", help="replay a corpus and report latency")
+    run.add_argument("path", nargs="?", help="JSONL corpus (default: synthetic)")
+    run.add_argument("--count", type=int, default=BENCH_CORPUS_SIZE)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--rate", type=float, default=0.0, help="tweets/sec, 0 = as fast as possible")
+    run.add_argument("--speed", type=float, help="replay recorded created_at timing at this multiple")
+    run.add_argument("--queue-size", type=int, help="ingress queue size (default TWEET_QUEUE_SIZE)")
+
+    bench = commands.add_parser("bench", help="run the benchmark suite against the baseline")
+    bench.add_argument("--baseline", default=BASELINE_PATH)
+    bench.add_argument("--update-baseline", action="store_true")
+    bench.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE)
+    bench.add_argument("--repeats", type=int, default=BENCH_REPEATS)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        save_corpus(generate_corpus(args.count, args.seed, args.rate), args.path)
+        print(f"Wrote {args.count} tweets to {args.path}")
+        return 0
+
+    if args.command == "run":
+        records = load_corpus(args.path) if args.path else generate_corpus(args.count, args.seed)
+        report = replay(records, rate=args.rate, speed=args.speed,
+                        queue_size=args.queue_size, seed=args.seed)
+        print(json.dumps(report, indent=2, default=str))
+        return 0 if report["drained"] else 1
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif not args.update_baseline:
+        print(f"No baseline at {args.baseline}; record one with --update-baseline")
+        return 1
+    current = run_benchmarks(repeats=args.repeats)
+    _print_bench(current, baseline)
+    if args.update_baseline:
+        _write_baseline(current, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    regressions = compare(current, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+risk_engine.py
+
+Pre-trade risk checks for the TradeManager.
+
+Every order is checked against two kinds of limits before it is placed:
+
+  - the order's own TradeParameters: it must have a stop, its loss at the
+    stop (plus the priority fee) must be within max_risk_percent of the
+    capital, and the move to its target must be at least risk_reward_ratio
+    times the move to its stop;
+  - the book's aggregates against RiskLimits: open positions, total and
+    per-token exposure (SOL cost of what is still held), and today's (UTC)
+    realized loss.
+
+The aggregates are kept incrementally. The TradeManager reports each entry
+and exit under its book lock, so a check is a handful of dict lookups and
+comparisons, independent of the book's size. Limits are an immutable
+RiskLimits swapped in whole by update_limits(); check() reads the attribute
+once and never takes a lock.
+"""
+
+import os
+import time
+
+RISK_CAPITAL_SOL = float(os.getenv("RISK_CAPITAL_SOL", "10"))
+RISK_MAX_TOTAL_EXPOSURE_SOL = float(os.getenv("RISK_MAX_TOTAL_EXPOSURE_SOL", "5"))
+RISK_MAX_TOKEN_EXPOSURE_SOL = float(os.getenv("RISK_MAX_TOKEN_EXPOSURE_SOL", "1.5"))
+RISK_MAX_OPEN_POSITIONS = int(os.getenv("RISK_MAX_OPEN_POSITIONS", "20"))
+RISK_MAX_DAILY_LOSS_SOL = float(os.getenv("RISK_MAX_DAILY_LOSS_SOL", "2"))
+
+# check() outcomes
+APPROVE = "approve"
+NO_STOP_LOSS = "no_stop_loss"
+MAX_RISK = "max_risk_percent"
+RISK_REWARD = "risk_reward_ratio"
+MAX_OPEN_POSITIONS = "max_open_positions"
+MAX_TOTAL_EXPOSURE = "max_total_exposure"
+MAX_TOKEN_EXPOSURE = "max_token_exposure"
+DAILY_LOSS = "daily_loss_limit"
+
+_DAY = 86400
+
+
+class RiskLimits:
+    """One consistent set of limits. Replace it rather than changing it."""
+
+    __slots__ = ("capital", "max_total_exposure", "max_token_exposure", "max_open_positions",
+                 "max_daily_loss")
+
+    def __init__(self, capital=RISK_CAPITAL_SOL, max_total_exposure=RISK_MAX_TOTAL_EXPOSURE_SOL,
+                 max_token_exposure=RISK_MAX_TOKEN_EXPOSURE_SOL,
+                 max_open_positions=RISK_MAX_OPEN_POSITIONS, max_daily_loss=RISK_MAX_DAILY_LOSS_SOL):
+        self.capital = capital                          # SOL the max_risk_percent applies to
+        self.max_total_exposure = max_total_exposure    # SOL
+        self.max_token_exposure = max_token_exposure    # SOL
+        self.max_open_positions = max_open_positions
+        self.max_daily_loss = max_daily_loss            # SOL
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Limits from a settings dict (keys as in __slots__); missing keys keep the defaults."""
+        return cls(**{name: settings[name] for name in cls.__slots__ if name in settings})
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class RiskEngine:
+    def __init__(self, limits=None):
+        self.limits = limits or RiskLimits()
+        self.open_positions = 0
+        self.total_exposure = 0.0
+        self._token_exposure = {}     # token -> [SOL exposure, open positions]
+        self._day = int(time.time() // _DAY)
+        self.realized_today = 0.0
+        self.counts = {APPROVE: 0, NO_STOP_LOSS: 0, MAX_RISK: 0, RISK_REWARD: 0,
+                       MAX_OPEN_POSITIONS: 0, MAX_TOTAL_EXPOSURE: 0, MAX_TOKEN_EXPOSURE: 0,
+                       DAILY_LOSS: 0}
+
+    def update_limits(self, limits):
+        """Swap in new limits; checks already running finish on the old ones."""
+        self.limits = limits
+
+    # ------------------------------------------------------------------
+    # Checks
+    # ------------------------------------------------------------------
+    def check(self, token, trade_params, now=None):
+        """APPROVE, or the first limit the order would break."""
+        verdict = self._verdict(token, trade_params, time.time() if now is None else now)
+        self.counts[verdict] += 1
+        return verdict
+
+    def _verdict(self, token, trade_params, now):
+        limits = self.limits
+        stop_loss = trade_params.stop_loss_percent
+        if not stop_loss or stop_loss <= 0:
+            return NO_STOP_LOSS
+        loss_at_stop = trade_params.trade_amount * stop_loss / 100 + trade_params.priority_fee
+        if loss_at_stop > limits.capital * trade_params.max_risk_percent / 100:
+            return MAX_RISK
+        # Reward:risk as price distances: the target's gain over the stop's loss.
+        if (trade_params.take_profit_multiplier - 1) * 100 < trade_params.risk_reward_ratio * stop_loss:
+            return RISK_REWARD
+        if self.open_positions >= limits.max_open_positions:
+            return MAX_OPEN_POSITIONS
+        cost = trade_params.trade_amount + trade_params.priority_fee
+        if self.total_exposure + cost > limits.max_total_exposure:
+            return MAX_TOTAL_EXPOSURE
+        held = self._token_exposure.get(token)
+        if (held[0] if held else 0.0) + cost > limits.max_token_exposure:
+            return MAX_TOKEN_EXPOSURE
+        if int(now // _DAY) == self._day and -self.realized_today >= limits.max_daily_loss:
+            return DAILY_LOSS
+        return APPROVE
+
+    # ------------------------------------------------------------------
+    # Aggregates (called by the TradeManager under its lock)
+    # ------------------------------------------------------------------
+    def on_entry(self, position):
+        self.open_positions += 1
+        self.total_exposure += position.cost
+        held = self._token_exposure.get(position.token)
+        if held is None:
+            self._token_exposure[position.token] = [position.cost, 1]
+        else:
+            held[0] += position.cost
+            held[1] += 1
+
+    def on_exit(self, position, tokens_sold, proceeds, closed, now=None):
+        """A sale of tokens_sold for proceeds; closed if nothing is left."""
+        released = position.cost * tokens_sold / position.tokens if position.tokens else position.cost
+        day = int((time.time() if now is None else now) // _DAY)
+        if day != self._day:
+            self._day = day
+            self.realized_today = 0.0
+        self.realized_today += proceeds - released
+        held = self._token_exposure.get(position.token)
+        if closed:
+            self.open_positions -= 1
+            if held is not None:
+                held[1] -= 1
+                if held[1] <= 0:
+                    # Drop the entry rather than keep float residue.
+                    del self._token_exposure[position.token]
+                    held = None
+            if self.open_positions <= 0:
+                self.open_positions = 0
+                self.total_exposure = 0.0
+                return
+        self.total_exposure -= released
+        if held is not None:
+            held[0] -= released
+
+    def token_exposure(self, token):
+        held = self._token_exposure.get(token)
+        return held[0] if held else 0.0
+
+    def stats(self):
+        today = int(time.time() // _DAY) == self._day
+        return {
+            "limits": self.limits.as_dict(),
+            "open_positions": self.open_positions,
+            "total_exposure": round(self.total_exposure, 9),
+            "tokens": len(self._token_exposure),
+            "realized_today": round(self.realized_today, 9) if today else 0.0,
+            "checks": dict(self.counts),
+        }
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+scalping.py
+
+Event-driven scalping on a stream of price ticks for many tokens.
+
+Producers call submit(token, price, volume) from any thread. A single worker
+drains the ticks in batches and runs on_tick() for each, which updates the
+token's indicators in O(1) and enters or exits through the TradeManager:
+
+  - fast and slow EMAs of price;
+  - an exponentially weighted VWAP (decayed sums of price * volume and
+    volume, so there's no window to slide);
+  - EWMA volatility of log returns (per tick).
+
+Indicator state lives in flat arrays indexed by a per-token slot rather than
+in per-token objects, so a tick is a dict lookup and a few float updates.
+
+A token becomes tradable after `warmup` ticks. A scalp is entered when the
+fast EMA crosses above the slow one with the price above VWAP and volatility
+inside [min_volatility, max_volatility]. Take-profit and stop distances are
+multiples of the current volatility, and no moonbag is kept. Every tick is
+also applied to the book (so tweet-driven positions in the same token exit
+on it too) unless apply_ticks=False, for when the price cache already feeds
+the book; either way the scalp is closed early when the fast EMA crosses back
+below the slow one. After any exit the token cools down for
+`cooldown_seconds`.
+"""
+
+import os
+import math
+import time
+import logging
+from array import array
+
+from pipeline import Pipeline, Stage
+from trading import TradeParameters
+
+MAX_SCALP_TOKENS = int(os.getenv("MAX_SCALP_TOKENS", "5000"))
+SCALP_TICK_QUEUE = int(os.getenv("SCALP_TICK_QUEUE", "20000"))
+
+
+class ScalpParameters:
+    def __init__(self, fast_span=12, slow_span=48, vwap_span=100, volatility_span=50,
+                 warmup=50, min_volatility=0.001, max_volatility=0.05,
+                 take_profit_sigmas=3.0, stop_loss_sigmas=2.0, min_take_profit_percent=0.5,
+                 min_stop_loss_percent=0.3, trade_amount=0.1, slippage_tolerance=(0.1, 0.5),
+                 priority_fee=0.001, cooldown_seconds=30, min_risk_reward=1.0):
+        self.fast_span = fast_span
+        self.slow_span = slow_span
+        self.vwap_span = vwap_span
+        self.volatility_span = volatility_span
+        self.warmup = warmup                          # ticks before a token can be traded
+        self.min_volatility = min_volatility          # per-tick stdev of log returns
+        self.max_volatility = max_volatility
+        self.take_profit_sigmas = take_profit_sigmas
+        self.stop_loss_sigmas = stop_loss_sigmas
+        self.min_take_profit_percent = min_take_profit_percent
+        self.min_stop_loss_percent = min_stop_loss_percent
+        self.trade_amount = trade_amount              # SOL per scalp
+        self.slippage_tolerance = slippage_tolerance  # %
+        self.priority_fee = priority_fee              # SOL
+        self.cooldown_seconds = cooldown_seconds
+        self.min_risk_reward = min_risk_reward        # for the risk engine's check
+
+    def trade_parameters(self, volatility):
+        """TradeParameters for one entry, with exits scaled to volatility."""
+        take_profit = max(self.min_take_profit_percent, self.take_profit_sigmas * volatility * 100)
+        stop_loss = max(self.min_stop_loss_percent, self.stop_loss_sigmas * volatility * 100)
+        return TradeParameters(
+            trade_amount=self.trade_amount,
+            slippage_tolerance=self.slippage_tolerance,
+            take_profit_multiplier=1 + take_profit / 100,
+            moonbag_percentage=0,
+            priority_fee=self.priority_fee,
+            stop_loss_percent=stop_loss,
+            risk_reward_ratio=self.min_risk_reward
+        )
+
+
+def _alpha(span):
+    return 2.0 / (span + 1)
+
+
+class ScalpingEngine:
+    """Per-token rolling indicators plus entry/exit rules over a TradeManager."""
+
+    def __init__(self, trade_manager, params=None, on_event=None, max_tokens=MAX_SCALP_TOKENS,
+                 tick_queue=SCALP_TICK_QUEUE, apply_ticks=True):
+        self.trade_manager = trade_manager
+        self.apply_ticks = apply_ticks
+        self.params = params or ScalpParameters()
+        # Called with every entry (trade details) and exit event.
+        self.on_event = on_event
+        self.max_tokens = max_tokens
+        self._fast_alpha = _alpha(self.params.fast_span)
+        self._slow_alpha = _alpha(self.params.slow_span)
+        self._vwap_alpha = _alpha(self.params.vwap_span)
+        self._volatility_alpha = _alpha(self.params.volatility_span)
+
+        self._slots = {}              # token -> index into the arrays below
+        self._tokens = []
+        self._last = array("d")
+        self._fast = array("d")
+        self._slow = array("d")
+        self._price_volume = array("d")
+        self._volume = array("d")
+        self._variance = array("d")
+        self._ticks = array("q")
+        self._position = array("q")   # open scalp position id, 0 if none
+        self._cooldown_until = array("d")
+
+        self.ticks = 0
+        self.entries = 0
+        self.exits = 0
+        self.rejected_tokens = 0
+        self._pipeline = Pipeline([
+            Stage("scalp", self._on_batch, maxsize=tick_queue, policy="drop_oldest", batch_size=256),
+        ])
+
+    # ------------------------------------------------------------------
+    # Tick stream
+    # ------------------------------------------------------------------
+    def start(self):
+        self._pipeline.start()
+        return self
+
+    def stop(self):
+        self._pipeline.stop()
+
+    def submit(self, token, price, volume=1.0, ts=None):
+        """Queue a tick for the engine's worker. Never blocks; the oldest ticks go first."""
+        return self._pipeline.submit((token, price, volume, time.time() if ts is None else ts))
+
+    def join(self, timeout=None):
+        return self._pipeline.join(timeout)
+
+    def _on_batch(self, ticks):
+        for token, price, volume, ts in ticks:
+            try:
+                self.on_tick(token, price, volume, ts)
+            except Exception as e:
+                logging.error(f"[{token}] Scalping tick failed: {e}")
+        return []
+
+    # ------------------------------------------------------------------
+    # Indicators and rules (one thread only: the worker, or a replay)
+    # ------------------------------------------------------------------
+    def on_tick(self, token, price, volume=1.0, ts=None):
+        """Apply one tick. Returns the entry and exit events it caused."""
+        if not price or price <= 0:
+            return []
+        slot = self._slots.get(token)
+        if slot is None:
+            slot = self._add_token(token)
+            if slot is None:
+                return []
+        self.ticks += 1
+        ticks = self._ticks[slot]
+        self._ticks[slot] = ticks + 1
+        if ticks == 0:
+            self._last[slot] = self._fast[slot] = self._slow[slot] = price
+            self._price_volume[slot] = price * volume
+            self._volume[slot] = volume
+            return []
+
+        returns = math.log(price / self._last[slot])
+        self._last[slot] = price
+        variance = self._variance[slot]
+        variance += self._volatility_alpha * (returns * returns - variance)
+        self._variance[slot] = variance
+        fast = self._fast[slot]
+        slow = self._slow[slot]
+        previous_spread = fast - slow
+        fast += self._fast_alpha * (price - fast)
+        slow += self._slow_alpha * (price - slow)
+        self._fast[slot] = fast
+        self._slow[slot] = slow
+        price_volume = self._price_volume[slot]
+        price_volume += self._vwap_alpha * (price * volume - price_volume)
+        self._price_volume[slot] = price_volume
+        total_volume = self._volume[slot]
+        total_volume += self._vwap_alpha * (volume - total_volume)
+        self._volume[slot] = total_volume
+
+        if ts is None:
+            ts = time.time()
+        events = self.trade_manager.on_prices(((token, price),)) if self.apply_ticks else []
+        position_id = self._position[slot]
+        if position_id:
+            if previous_spread > 0 >= fast - slow:
+                exit_event = self.trade_manager.close_position(position_id, price, "scalp_exit")
+                if exit_event:
+                    events.append(exit_event)
+            if self.trade_manager.get_position(position_id) is None:
+                self._position[slot] = 0
+                self._cooldown_until[slot] = ts + self.params.cooldown_seconds
+        self.exits += len(events)
+
+        enter = (
+            not self._position[slot]
+            and ticks + 1 >= self.params.warmup
+            and ts >= self._cooldown_until[slot]
+            and previous_spread <= 0 < fast - slow
+            and total_volume > 0 and price > price_volume / total_volume
+        )
+        if enter:
+            volatility = math.sqrt(variance)
+            if self.params.min_volatility <= volatility <= self.params.max_volatility:
+                logging.info(f"[{token}] Scalp entry: EMA cross at {price:.6f} SOL, "
+                             f"volatility {volatility:.4%}")
+                entry = self.trade_manager.place_trade(token, price, self.params.trade_parameters(volatility))
+                if entry is not None:
+                    entry["reason"] = "scalp_entry"
+                    self._position[slot] = entry["position_id"]
+                    self.entries += 1
+                    events.append(entry)
+
+        if self.on_event is not None:
+            for event in events:
+                self.on_event(event)
+        return events
+
+    def _add_token(self, token):
+        if len(self._tokens) >= self.max_tokens:
+            self.rejected_tokens += 1
+            if self.rejected_tokens % 100 == 1:
+                logging.warning(f"Scalping engine is full ({self.max_tokens} tokens); ignoring {token}")
+            return None
+        slot = self._slots[token] = len(self._tokens)
+        self._tokens.append(token)
+        for column in (self._last, self._fast, self._slow, self._price_volume,
+                       self._volume, self._variance, self._cooldown_until):
+            column.append(0.0)
+        self._ticks.append(0)
+        self._position.append(0)
+        return slot
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def indicators(self, token):
+        slot = self._slots.get(token)
+        if slot is None:
+            return None
+        volume = self._volume[slot]
+        return {
+            "price": self._last[slot],
+            "ema_fast": self._fast[slot],
+            "ema_slow": self._slow[slot],
+            "vwap": self._price_volume[slot] / volume if volume else None,
+            "volatility": math.sqrt(self._variance[slot]),
+            "ticks": self._ticks[slot],
+            "position_id": self._position[slot] or None,
+        }
+
+    def stats(self):
+        return {
+            "tokens": len(self._tokens),
+            "ticks": self.ticks,
+            "entries": self.entries,
+            "exits": self.exits,
+            "open_scalps": sum(1 for position_id in self._position if position_id),
+            "rejected_tokens": self.rejected_tokens,
+            "queue": self._pipeline.stats()["scalp"],
+        }
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+sentiment.py
+
+Cached VADER sentiment scoring for the tweet hot path.
+
+Retweets and quote-tweets repeat the same text many times during a burst, so
+scores are memoised in an LRU cache keyed on normalised text. score_many()
+scores a whole burst at once, running cache misses in a worker pool (real OS
+threads via eventlet.tpool when the eventlet hub is active) so the streaming
+thread and the hub are never blocked by VADER.
+
+The VADER lexicon is only ever read from local disk, never downloaded at
+runtime. It is looked up in VADER_LEXICON_PATH (a vader_lexicon.txt) if set,
+then in NLTK_CACHE_DIR (.cache/nltk_data by default), then on nltk's usual
+data path. Fill the cache once with:
+
+    python sentiment.py --download
+"""
+
+import os
+import re
+import sys
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# VADER's own convention: compound <= -0.05 is negative. A tweet passes the
+# gate only if it scores above the threshold.
+DEFAULT_SENTIMENT_THRESHOLD = float(os.getenv("SENTIMENT_THRESHOLD", "-0.05"))
+DEFAULT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "8192"))
+DEFAULT_MAX_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "4"))
+
+VADER_LEXICON_PATH = os.getenv("VADER_LEXICON_PATH")
+NLTK_CACHE_DIR = os.getenv("NLTK_CACHE_DIR", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "nltk_data"))
+
+_RETWEET_PREFIX = re.compile(r"^RT @\w+:\s*")
+_URL = re.compile(r"https?://\S+")
+_WHITESPACE = re.compile(r"\s+")
+
+_MISSING = object()
+
+
+def normalize_text(text):
+    """Normalise tweet text so retweets and link variants share a cache key."""
+    text = _RETWEET_PREFIX.sub("", text or "")
+    text = _URL.sub("", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _green_threads_active():
+    """True when eventlet has monkey-patched threading in this process."""
+    patcher = sys.modules.get("eventlet.patcher")
+    return patcher is not None and patcher.is_monkey_patched("thread")
+
+
+def _default_analyzer():
+    import nltk.data
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    if VADER_LEXICON_PATH:
+        return SentimentIntensityAnalyzer(lexicon_file=f"file:{os.path.abspath(VADER_LEXICON_PATH)}")
+    if NLTK_CACHE_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_CACHE_DIR)
+    return SentimentIntensityAnalyzer()
+
+
+class SentimentScorer:
+    """
+    Scores tweet text with VADER and gates trades on a compound-score threshold.
+
+    The analyzer is created on first use. If the VADER lexicon is not
+    available the scorer logs once, scores everything as neutral (0.0) so the
+    stream keeps flowing, and fails closed: passes() refuses every trade.
+    """
+
+    def __init__(self, threshold=DEFAULT_SENTIMENT_THRESHOLD, cache_size=DEFAULT_CACHE_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS, analyzer_factory=_default_analyzer):
+        self.threshold = threshold
+        self.max_workers = max_workers
+        self._analyzer_factory = analyzer_factory
+        self._analyzer = None
+        self._analyzer_failed = False
+        self._analyzer_lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # LRU of normalised text -> compound score.
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+    def score(self, text):
+        """Return the VADER compound score (-1.0 to 1.0) for text."""
+        key = normalize_text(text)
+        score = self._cached(key)
+        return self._score_miss(key) if score is _MISSING else score
+
+    def score_many(self, texts):
+        """
+        Score a burst of texts. Duplicates inside the burst and texts already
+        in the cache are resolved without touching VADER; the remaining misses
+        are scored in the worker pool. Returns scores in input order.
+        """
+        keys = [normalize_text(text) for text in texts]
+        scores = {}
+        misses = []
+        for key in dict.fromkeys(keys):
+            score = self._cached(key)
+            if score is _MISSING:
+                misses.append(key)
+            else:
+                scores[key] = score
+        if len(misses) == 1:
+            scores[misses[0]] = self._score_miss(misses[0])
+        elif misses:
+            scores.update(zip(misses, self._run_in_pool(misses)))
+        return [scores[key] for key in keys]
+
+    def warm_up(self):
+        """Load the analyzer now (e.g. at startup) rather than on the first tweet."""
+        return self._get_analyzer() is not None
+
+    def passes(self, compound):
+        """True if a compound score is above the trade threshold and VADER produced it."""
+        if self._get_analyzer() is None:
+            # A missing lexicon must not silently turn the gate off.
+            return False
+        return compound > self.threshold
+
+    def cache_stats(self):
+        with self._cache_lock:
+            return {"hits": self._hits, "misses": self._misses,
+                    "size": len(self._cache), "max_size": self.cache_size}
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self._hits = self._misses = 0
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _cached(self, key):
+        """The cached score for a normalised text, or _MISSING."""
+        with self._cache_lock:
+            score = self._cache.get(key, _MISSING)
+            if score is _MISSING:
+                self._misses += 1
+            else:
+                self._cache.move_to_end(key)
+                self._hits += 1
+            return score
+
+    def _score_miss(self, key):
+        score = self._polarity(key)
+        with self._cache_lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return score
+
+    def _run_in_pool(self, keys):
+        # Only cache misses get here; hits never wait on the pool.
+        if _green_threads_active():
+            from eventlet import tpool
+            return tpool.execute(lambda: [self._score_miss(key) for key in keys])
+        return list(self._get_executor().map(self._score_miss, keys))
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="sentiment")
+        return self._executor
+
+    def _get_analyzer(self):
+        if self._analyzer is None and not self._analyzer_failed:
+            with self._analyzer_lock:
+                if self._analyzer is None and not self._analyzer_failed:
+                    try:
+                        self._analyzer = self._analyzer_factory()
+                    except LookupError as e:
+                        self._analyzer_failed = True
+                        logging.error(f"VADER lexicon unavailable, refusing all trades until it is "
+                                      f"installed (python sentiment.py --download): {e}")
+        return self._analyzer
+
+    def _polarity(self, normalized_text):
+        analyzer = self._get_analyzer()
+        if analyzer is None or not normalized_text:
+            return 0.0
+        return analyzer.polarity_scores(normalized_text)["compound"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local VADER lexicon.")
+    parser.add_argument("--download", action="store_true",
+                        help=f"download vader_lexicon into {NLTK_CACHE_DIR}")
+    args = parser.parse_args(argv)
+    if args.download:
+        import nltk
+        os.makedirs(NLTK_CACHE_DIR, exist_ok=True)
+        return 0 if nltk.download("vader_lexicon", download_dir=NLTK_CACHE_DIR) else 1
+    loaded = SentimentScorer().warm_up()
+    print("VADER lexicon found" if loaded else "VADER lexicon missing; run with --download")
+    return 0 if loaded else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
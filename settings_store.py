@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+settings_store.py
+
+Versioned, copy-on-write settings shared between request handlers and the
+trading threads.
+
+A SettingsStore holds one immutable Settings snapshot. update() builds a new
+snapshot with the changes applied and the version bumped, writes it to disk
+and swaps it in with a single attribute assignment, so a reader does
+
+    settings = store.snapshot
+    settings["trade_amount"], settings["stop_loss"]
+
+without a lock and always sees one consistent version, however many updates
+land meanwhile. Writers serialize on a lock. Subscribers are called after
+the lock is released, so a slow one never holds up the next update. One
+thread notifies at a time and always hands out the newest snapshot, so a
+subscriber sees versions in increasing order but may skip any that were
+superseded before it was called. The trade engine thereby reacts to a change
+instead of polling for it.
+
+Only keys present in the defaults are accepted. Values are coerced to the
+type of their default, numbers must be finite and, for keys in `bounds`,
+within that key's (minimum, maximum). The file is JSON ({"version": n,
+"settings": {...}}) replaced atomically on every update; on start it is read
+back over the defaults, ignoring keys the defaults don't have and keeping the
+default for any value that is no longer valid.
+"""
+
+import os
+import json
+import math
+import time
+import logging
+import threading
+from collections.abc import Mapping
+
+
+class Settings(Mapping):
+    """One immutable version of the settings."""
+
+    __slots__ = ("_values", "version", "updated_at")
+
+    def __init__(self, values, version=0, updated_at=None):
+        self._values = dict(values)
+        self.version = version
+        self.updated_at = time.time() if updated_at is None else updated_at
+
+    def __getitem__(self, key):
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def as_dict(self):
+        return dict(self._values)
+
+    def __repr__(self):
+        return f"Settings(v{self.version}, {self._values!r})"
+
+
+def _coerce(default, value, bounds=None):
+    if isinstance(default, bool):
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+    if isinstance(default, int):
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError("not a finite number")
+        value = int(number)
+    elif isinstance(default, float):
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError("not a finite number")
+    else:
+        return value
+    if bounds is not None:
+        minimum, maximum = bounds
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            raise ValueError(f"outside [{minimum}, {maximum}]")
+    return value
+
+
+class SettingsStore:
+    """
+    bounds, if given, maps a numeric key to an inclusive (minimum, maximum);
+    either end may be None.
+    """
+
+    def __init__(self, defaults, path=None, bounds=None):
+        self.defaults = dict(defaults)
+        self.bounds = dict(bounds or {})
+        self.path = path
+        self._lock = threading.Lock()              # writers only
+        self._notify_lock = threading.Lock()       # one notifying thread at a time
+        self._subscribers = []
+        self._notified_version = None
+        self.updates = 0
+        self.subscriber_errors = 0
+        self.snapshot = self._load()
+        self._notified_version = self.snapshot.version
+
+    # ------------------------------------------------------------------
+    # Reading (any thread, no lock)
+    # ------------------------------------------------------------------
+    def get(self, key, default=None):
+        return self.snapshot.get(key, default)
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def subscribe(self, callback):
+        """callback(snapshot) is called on an updating thread after every change."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def update(self, changes):
+        """
+        Apply changes ({key: value}) as one new version and return it. Raises
+        KeyError for an unknown key and ValueError for a value of the wrong
+        type, a non-finite number or one outside its bounds; nothing is applied
+        then. A no-op update keeps the version.
+        """
+        with self._lock:
+            current = self.snapshot
+            values = current.as_dict()
+            for key, value in changes.items():
+                if key not in self.defaults:
+                    raise KeyError(f"Unknown setting: {key}")
+                try:
+                    values[key] = _coerce(self.defaults[key], value, self.bounds.get(key))
+                except (TypeError, ValueError, OverflowError) as e:
+                    raise ValueError(f"Invalid value for {key}: {value!r} ({e})")
+            if values == current.as_dict():
+                return current
+            snapshot = Settings(values, current.version + 1)
+            self._save(snapshot)
+            self.snapshot = snapshot
+            self.updates += 1
+        self._notify()
+        return snapshot
+
+    def _notify(self):
+        # Whoever holds the notify lock delivers the newest snapshot; a thread
+        # that finds it taken leaves its version to that one, which checks
+        # again after releasing the lock. A subscriber calling update()
+        # lands here too and is picked up the same way.
+        while self.snapshot.version != self._notified_version:
+            if not self._notify_lock.acquire(blocking=False):
+                return
+            try:
+                snapshot = self.snapshot
+                if snapshot.version == self._notified_version:
+                    continue
+                self._notified_version = snapshot.version
+                for callback in list(self._subscribers):
+                    try:
+                        callback(snapshot)
+                    except Exception as e:
+                        self.subscriber_errors += 1
+                        logging.error(f"Settings subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+            finally:
+                self._notify_lock.release()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return Settings(self.defaults)
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            values = dict(self.defaults)
+            for key, value in saved.get("settings", {}).items():
+                if key not in self.defaults:
+                    continue
+                try:
+                    values[key] = _coerce(self.defaults[key], value, self.bounds.get(key))
+                except (TypeError, ValueError, OverflowError) as e:
+                    logging.warning(f"Ignoring saved {key}={value!r} from {self.path}: {e}")
+            return Settings(values, int(saved.get("version", 0)), saved.get("updated_at"))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logging.warning(f"Could not read settings from {self.path}, using defaults: {e}")
+            return Settings(self.defaults)
+
+    def _save(self, snapshot):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"version": snapshot.version, "updated_at": snapshot.updated_at,
+                       "settings": snapshot.as_dict()}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    def stats(self):
+        return {
+            "version": self.snapshot.version,
+            "updated_at": self.snapshot.updated_at,
+            "path": self.path,
+            "updates": self.updates,
+            "subscribers": len(self._subscribers),
+            "subscriber_errors": self.subscriber_errors,
+        }
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+signal_extractor.py
+
+Single-pass extraction of trading signals (Solana mint addresses and cashtags)
+from tweet text. All patterns are compiled once into one alternation, so each
+tweet is scanned exactly once regardless of how many signal kinds we look for.
+Candidate addresses are base58-decoded and must be exactly 32 bytes before
+they are reported as a mint.
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, NamedTuple
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {char: index for index, char in enumerate(BASE58_ALPHABET)}
+
+# Solana public keys (and therefore token mints) are 32-byte ed25519 keys.
+MINT_BYTE_LENGTH = 32
+
+# Separator used when scanning a batch of texts in one regex pass. It is not a
+# base58 or cashtag character, so no match can straddle two texts.
+_BATCH_SEPARATOR = "\x00"
+
+# One combined pattern, scanned left to right:
+#   - URLs are consumed first so base58-looking path segments and query
+#     strings inside links are not mistaken for mints.
+#   - Addresses must be a standalone 32-44 char base58 run.
+#   - Cashtags must start with a letter, so "$100" is not a token.
+_SIGNAL_PATTERN = re.compile(
+    r"(?P<url>https?://[^\s\x00]+)"
+    r"|(?<![1-9A-HJ-NP-Za-km-z])(?P<address>[1-9A-HJ-NP-Za-km-z]{32,44})(?![1-9A-HJ-NP-Za-km-z])"
+    r"|(?<![\w$])\$(?P<cashtag>[A-Za-z][A-Za-z0-9]{0,11})(?![A-Za-z0-9])"
+)
+_ADDRESS_PATTERN = re.compile(
+    r"(?<![1-9A-HJ-NP-Za-km-z])[1-9A-HJ-NP-Za-km-z]{32,44}(?![1-9A-HJ-NP-Za-km-z])"
+)
+
+
+class Mention(NamedTuple):
+    """A signal found in a text: kind is "address" or "cashtag"."""
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+@lru_cache(maxsize=4096)
+def is_valid_mint(candidate):
+    """Return True if candidate base58-decodes to exactly 32 bytes."""
+    number = 0
+    for char in candidate:
+        digit = _BASE58_INDEX.get(char)
+        if digit is None:
+            return False
+        number = number * 58 + digit
+    # Every leading '1' encodes a leading zero byte.
+    leading_zeros = len(candidate) - len(candidate.lstrip("1"))
+    byte_length = leading_zeros + (number.bit_length() + 7) // 8
+    return byte_length == MINT_BYTE_LENGTH
+
+
+class SignalExtractor:
+    """
+    Extracts every mint address and cashtag from tweet text, with positions.
+
+    Set scan_urls=True to also report mints found inside links
+    (e.g. dexscreener/pump.fun URLs); by default links are skipped.
+    """
+
+    def __init__(self, scan_urls=False):
+        self.scan_urls = scan_urls
+
+    def extract(self, text):
+        """Return the list of Mention tuples found in a single text."""
+        if not text:
+            return []
+        return self._collect(_SIGNAL_PATTERN.finditer(text))
+
+    def extract_many(self, texts):
+        """
+        Extract mentions from a list of texts with one regex pass over the
+        whole batch. Returns one list of mentions per input text, with
+        positions relative to that text.
+        """
+        texts = [text or "" for text in texts]
+        results: List[List[Mention]] = [[] for _ in texts]
+        if not texts:
+            return results
+
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + len(_BATCH_SEPARATOR)
+        joined = _BATCH_SEPARATOR.join(texts)
+
+        for mention in self._collect(_SIGNAL_PATTERN.finditer(joined)):
+            index = bisect_right(offsets, mention.start) - 1
+            base = offsets[index]
+            results[index].append(mention._replace(start=mention.start - base,
+                                                   end=mention.end - base))
+        return results
+
+    def _collect(self, matches):
+        mentions = []
+        for match in matches:
+            kind = match.lastgroup
+            if kind == "address":
+                value = match.group("address")
+                if is_valid_mint(value):
+                    mentions.append(Mention("address", value, match.start(), match.end()))
+            elif kind == "cashtag":
+                mentions.append(Mention("cashtag", match.group("cashtag"),
+                                        match.start(), match.end()))
+            elif self.scan_urls:
+                url_start = match.start()
+                for inner in _ADDRESS_PATTERN.finditer(match.group("url")):
+                    value = inner.group(0)
+                    if is_valid_mint(value):
+                        mentions.append(Mention("address", value,
+                                                url_start + inner.start(),
+                                                url_start + inner.end()))
+        return mentions
+
+
+def addresses(mentions):
+    """Return the unique mint addresses in mentions, in order of appearance."""
+    return list(dict.fromkeys(m.value for m in mentions if m.kind == "address"))
+
+
+def cashtags(mentions):
+    """Return the unique cashtags in mentions, in order of appearance."""
+    return list(dict.fromkeys(m.value for m in mentions if m.kind == "cashtag"))
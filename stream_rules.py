@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+stream_rules.py
+
+Incremental management of Twitter filtered-stream rules for tracked accounts.
+
+Instead of deleting every rule and re-adding one "from:" rule per account,
+the manager diffs the desired account set against the live rules and only
+touches the delta. Accounts are packed into OR-combined rules up to the rule
+length limit. New rules are added before obsolete ones are deleted, so an
+account being re-packed is covered by its old rule until its new one is
+live; only when adding first would go over the plan's rule cap (max_rules)
+are just enough obsolete rules deleted up front. Rules a repack would
+recreate verbatim are kept, so a new rule never collides with an identical
+live one (the API rejects duplicates). The stream connection itself is never
+restarted: rule changes apply to a connected stream immediately.
+"""
+
+import os
+import re
+import logging
+import threading
+
+# 512 characters for Essential/Elevated access, 1024 for Pro/Academic.
+MAX_RULE_LENGTH = int(os.getenv("TWITTER_RULE_MAX_LENGTH", "512"))
+# Rules per stream: 25 for Basic, 1000 for Pro.
+MAX_RULES = int(os.getenv("TWITTER_MAX_RULES", "25"))
+RULE_TAG = "tracked-accounts"
+# How many rules above the packed minimum we tolerate before repacking.
+COMPACT_SLACK = 3
+
+_FROM_TERM = re.compile(r"^from:(\w{1,15})$")
+
+
+def pack_accounts(accounts, max_length=MAX_RULE_LENGTH):
+    """Pack accounts into as few "from:a OR from:b" rule values as fit max_length."""
+    rules = []
+    current = ""
+    for account in accounts:
+        term = f"from:{account}"
+        candidate = f"{current} OR {term}" if current else term
+        if len(candidate) > max_length and current:
+            rules.append(current)
+            candidate = term
+        current = candidate
+    if current:
+        rules.append(current)
+    return rules
+
+
+def parse_rule_accounts(value):
+    """Return the accounts of a rule made only of OR-ed from: terms, else None."""
+    accounts = []
+    for term in value.split(" OR "):
+        match = _FROM_TERM.match(term.strip())
+        if not match:
+            return None
+        accounts.append(match.group(1))
+    return accounts
+
+
+class StreamRuleManager:
+    """
+    Keeps the account rules of a StreamingClient in sync with a set of
+    usernames. Rules the manager cannot parse as account rules are left alone.
+    """
+
+    def __init__(self, stream, max_rule_length=MAX_RULE_LENGTH, max_rules=MAX_RULES):
+        self.stream = stream
+        self.max_rule_length = max_rule_length
+        self.max_rules = max_rules
+        self._rules = None   # rule id -> list of accounts, for managed live rules
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Reload the live rules from the API."""
+        response = self.stream.get_rules()
+        rules = {}
+        for rule in response.data or []:
+            accounts = parse_rule_accounts(rule.value)
+            if accounts is not None:
+                rules[rule.id] = accounts
+        self._rules = rules
+        return rules
+
+    def live_accounts(self):
+        with self._lock:
+            if self._rules is None:
+                self.refresh()
+            return {account.lower() for accounts in self._rules.values() for account in accounts}
+
+    def sync(self, accounts):
+        """
+        Make the live rules match `accounts`. Only rules containing a removed
+        account are deleted; their still-wanted accounts are re-packed together
+        with newly added ones. Returns (rules added, rules deleted).
+        """
+        with self._lock:
+            if self._rules is None:
+                self.refresh()
+            try:
+                return self._sync(accounts)
+            except Exception:
+                # Our view of the live rules may now be wrong; reload next time.
+                self._rules = None
+                raise
+
+    def _sync(self, accounts):
+        desired = {}
+        for account in accounts:
+            desired.setdefault(account.lower(), account)
+
+        live = {}
+        stale_rule_ids = []
+        for rule_id, rule_accounts in self._rules.items():
+            keys = [account.lower() for account in rule_accounts]
+            # A rule is obsolete if any of its accounts is no longer wanted or
+            # is already covered by another rule.
+            if any(key not in desired or key in live for key in keys):
+                stale_rule_ids.append(rule_id)
+            else:
+                for key in keys:
+                    live[key] = rule_id
+
+        to_add = [account for key, account in desired.items() if key not in live]
+        new_values = pack_accounts(to_add, self.max_rule_length)
+
+        # Adding one small rule per track call fragments the rule set; once it
+        # grows well past the packed minimum, repack everything.
+        ideal = len(pack_accounts(desired.values(), self.max_rule_length))
+        kept = len(self._rules) - len(stale_rule_ids)
+        if kept + len(new_values) > ideal + COMPACT_SLACK:
+            stale_rule_ids = list(self._rules)
+            new_values = pack_accounts(desired.values(), self.max_rule_length)
+
+        # A live rule with exactly the accounts of a new one stays as it is.
+        stale = {tuple(account.lower() for account in self._rules[rule_id]): rule_id
+                 for rule_id in stale_rule_ids}
+        unchanged = set()
+        added_values = []
+        for value in new_values:
+            rule_id = stale.pop(tuple(account.lower() for account in parse_rule_accounts(value)), None)
+            if rule_id is None:
+                added_values.append(value)
+            else:
+                unchanged.add(rule_id)
+        stale_rule_ids = [rule_id for rule_id in stale_rule_ids if rule_id not in unchanged]
+        new_values = added_values
+
+        # Add before deleting, so re-packed accounts are never unwatched;
+        # delete up front only what adding would push over the rule cap.
+        overflow = len(self._rules) + len(new_values) - self.max_rules
+        if overflow > 0:
+            self._delete(stale_rule_ids[:overflow])
+        if new_values:
+            from tweepy import StreamRule
+            response = self.stream.add_rules([StreamRule(value=value, tag=RULE_TAG)
+                                              for value in new_values])
+            if response.errors:
+                raise RuntimeError(f"Adding stream rules failed: {response.errors}")
+            for rule in response.data or []:
+                self._rules[rule.id] = parse_rule_accounts(rule.value) or []
+        self._delete(stale_rule_ids[max(overflow, 0):])
+
+        if new_values or stale_rule_ids:
+            logging.info(f"Stream rules synced: +{len(new_values)} / -{len(stale_rule_ids)} rules "
+                         f"({len(desired)} accounts in {len(self._rules)} rules)")
+        return len(new_values), len(stale_rule_ids)
+
+    def _delete(self, rule_ids):
+        if not rule_ids:
+            return
+        response = self.stream.delete_rules(rule_ids)
+        if response.errors:
+            raise RuntimeError(f"Deleting stream rules failed: {response.errors}")
+        for rule_id in rule_ids:
+            self._rules.pop(rule_id, None)
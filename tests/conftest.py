@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# The modules live at the repository root.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Keep integrated_bot's state files out of the repository, and offline.
+_state = tempfile.mkdtemp(prefix="bot-tests-")
+os.environ.setdefault("SETTINGS_PATH", os.path.join(_state, "settings.json"))
+os.environ.setdefault("TRADE_JOURNAL_PATH", "")
+os.environ.setdefault("PRICE_FEED", "none")
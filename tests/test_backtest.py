@@ -0,0 +1,67 @@
+import logging
+
+import pytest
+
+import backtest
+from backtest import generate_ticks, load_ticks, run_backtest, save_ticks, sweep, trade_parameters
+
+
+def _signal(ts, tweet_id, token="MINT", author="alice"):
+    return (ts, tweet_id, author, token, {"token_address": token, "should_trade": True})
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    logging.disable(logging.WARNING)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def test_signals_without_a_price_or_inside_the_cooldown_are_skipped():
+    signals = [_signal(5, "1", token="UNPRICED"), _signal(10, "2"), _signal(11, "2"),
+               _signal(12, "3", author="bob")]
+    result = run_backtest(signals, [(0, "MINT", 1.0)], trade_parameters())
+    assert (result["entries"], result["no_price"], result["suppressed"]) == (1, 1, 1)
+    assert result["open"] == 1 and result["closed"] == 0
+
+
+def test_a_stop_out_is_a_realized_loss_and_a_drawdown():
+    params = trade_parameters(stop_loss=10, moonbag=0)
+    ticks = [(0, "MINT", 1.0), (20, "MINT", 0.5)]
+    result = run_backtest([_signal(10, "1")], ticks, params)
+    assert result["closed"] == 1 and result["hit_rate"] == 0.0
+    assert result["realized_pnl"] < 0
+    assert result["max_drawdown"] == -result["realized_pnl"]
+    assert result["total_pnl"] == result["realized_pnl"]
+
+
+def test_runs_are_reproducible_for_a_seed():
+    signals = [_signal(100 + n, str(n), author=f"a{n}", token=f"T{n % 3}") for n in range(9)]
+    ticks = generate_ticks(signals, seed=3, horizon=60)
+    params = trade_parameters(take_profit=1.2, stop_loss=5)
+    assert run_backtest(signals, ticks, params, seed=1) == run_backtest(signals, ticks, params, seed=1)
+
+
+def test_generated_ticks_cover_every_signal_and_round_trip(tmp_path):
+    signals = [_signal(100, "1", token="A"), _signal(130, "2", token="B")]
+    ticks = generate_ticks(signals, interval=10, lead=20, horizon=30)
+    assert ticks == generate_ticks(signals, interval=10, lead=20, horizon=30)
+    assert {token for _, token, _ in ticks} == {"A", "B"}
+    assert min(ts for ts, token, _ in ticks if token == "B") == 110
+    path = str(tmp_path / "ticks.csv")
+    save_ticks(ticks, path)
+    assert load_ticks(path) == ticks
+
+
+def test_trade_parameters_maps_sweep_names():
+    params = trade_parameters(take_profit=3, moonbag=0, stop_loss=20)
+    assert (params.take_profit_multiplier, params.moonbag_percentage, params.stop_loss_percent) == (3, 0, 20)
+
+
+def test_sweep_runs_every_combination_best_first():
+    signals = [_signal(10, "1")]
+    ticks = [(0, "MINT", 1.0), (20, "MINT", 0.5), (30, "MINT", 4.0)]
+    results = sweep(signals, ticks, {"stop_loss": [10, 90], "take_profit": [2]}, workers=1)
+    assert [result["stop_loss"] for result in results] == [90, 10]
+    assert results[0]["total_pnl"] > results[1]["total_pnl"]
+    assert backtest._worker_data is None
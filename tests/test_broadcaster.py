@@ -0,0 +1,72 @@
+import pytest
+
+from broadcaster import ALL_CLIENTS, Broadcaster
+
+
+class _SocketIO:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, frame, to=None):
+        self.emitted.append((event, [item["data"] for item in frame["events"]], to))
+
+
+@pytest.fixture
+def broadcaster():
+    return Broadcaster(_SocketIO(), max_client_rate=1000, max_client_queue=3)
+
+
+def test_clients_with_the_same_selection_share_one_emit(broadcaster):
+    broadcaster.register("a", rooms=["prices"])
+    broadcaster.register("b", rooms=["prices"])
+    broadcaster.register("c", rooms=["whales"])
+    broadcaster.publish("price_update", 1, room="prices")
+    broadcaster.publish("new_whale_activity", 2, room="whales")
+    broadcaster.flush()
+    emitted = sorted(broadcaster.socketio.emitted, key=lambda emit: emit[1])
+    assert emitted == [("batch", [1], ["a", "b"]), ("batch", [2], ["c"])]
+
+
+def test_an_event_reaches_a_client_once_across_its_rooms(broadcaster):
+    broadcaster.register("a", rooms=["whales", "whales:min:10"])
+    broadcaster.publish("new_whale_activity", 1, room=["whales", "whales:min:10"])
+    broadcaster.publish("status", 2, room=ALL_CLIENTS)
+    broadcaster.flush()
+    assert broadcaster.socketio.emitted == [("batch", [1, 2], ["a"])]
+
+
+def test_same_key_inside_a_window_keeps_the_newest(broadcaster):
+    broadcaster.register("a")
+    for price in (1, 2, 3):
+        broadcaster.publish("price_update", price, key="BONK")
+    broadcaster.flush()
+    assert broadcaster.socketio.emitted == [("batch", [3], ["a"])]
+
+
+def test_throttled_client_gets_a_bounded_outbox():
+    broadcaster = Broadcaster(_SocketIO(), max_client_rate=1, max_client_queue=3)
+    broadcaster.register("a")
+    broadcaster.publish("tweet", 0)
+    broadcaster.flush()
+    for n in range(1, 6):
+        broadcaster.publish("tweet", n)
+        broadcaster.publish("price_update", n, key="BONK")
+        broadcaster.flush()
+    stats = broadcaster.stats()["clients"]["a"]
+    assert stats["queue_depth"] == 3
+    assert stats["events_merged"] == 4
+    assert stats["events_dropped"] == 3
+    assert broadcaster.socketio.emitted == [("batch", [0], ["a"])]
+
+    broadcaster._clients["a"].tokens = 1
+    broadcaster.flush()
+    assert broadcaster.socketio.emitted[-1] == ("batch", [4, 5, 5], "a")
+
+
+def test_unregister_empties_its_rooms(broadcaster):
+    broadcaster.register("a", rooms=["prices"])
+    broadcaster.join("a", "whales")
+    assert broadcaster.room_size("whales") == 1
+    broadcaster.unregister("a")
+    assert broadcaster.rooms() == set()
+    assert not broadcaster.join("a", "prices")
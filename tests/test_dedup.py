@@ -0,0 +1,98 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import integrated_bot as bot
+from dedup import (ACCEPT, AUTHOR_COOLDOWN_ACTIVE, DUPLICATE_TWEET, MINT_COOLDOWN_ACTIVE,
+                   RELEASED, SignalDeduplicator)
+
+
+def test_redelivered_tweets_are_dropped_within_the_window():
+    dedup = SignalDeduplicator(tweet_window=10)
+    assert dedup.seen_tweet("1", now=0) is False
+    assert dedup.seen_tweet("1", now=5) is True
+    assert dedup.seen_tweet("1", now=11) is False
+    assert dedup.counts[DUPLICATE_TWEET] == 1
+
+
+def test_check_trade_starts_no_cooldown():
+    dedup = SignalDeduplicator(mint_cooldown=60, author_cooldown=10)
+    assert dedup.check_trade("MINT", "alice", now=0) == ACCEPT
+    assert dedup.check_trade("MINT", "bob", now=1) == ACCEPT
+
+
+def test_claimed_trades_start_the_mint_and_author_cooldowns():
+    dedup = SignalDeduplicator(mint_cooldown=60, author_cooldown=10)
+    assert dedup.claim_trade("MINT", "alice", now=0) == ACCEPT
+    assert dedup.claim_trade("OTHER", "alice", now=5) == AUTHOR_COOLDOWN_ACTIVE
+    assert dedup.claim_trade("OTHER", "alice", now=10) == ACCEPT
+    assert dedup.check_trade("MINT", "bob", now=30) == MINT_COOLDOWN_ACTIVE
+    assert dedup.claim_trade("MINT", "bob", now=60) == ACCEPT
+
+
+def test_released_claims_do_not_block_the_next_signal():
+    dedup = SignalDeduplicator(mint_cooldown=60, author_cooldown=10)
+    assert dedup.claim_trade("MINT", "alice", now=0) == ACCEPT
+    dedup.release_trade("MINT", "alice", now=0)
+    assert dedup.claim_trade("MINT", "alice", now=1) == ACCEPT
+    assert dedup.counts[RELEASED] == 1
+
+
+def test_indexes_are_capped():
+    dedup = SignalDeduplicator(max_entries=3)
+    for i in range(10):
+        dedup.seen_tweet(str(i), now=0)
+    assert len(dedup.tweets) == 3
+
+
+# ----------------------------------------------------------------------
+# Pipeline: cooldowns only start for trades that are placed
+# ----------------------------------------------------------------------
+class _Manager:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def execute_trade(self, signals, trade_params=None):
+        self.calls += 1
+        return self.result
+
+
+def _event(manager, author="alice", tweet_id="1"):
+    tweet = SimpleNamespace(id=tweet_id, author_id=author, text="", created_at=None)
+    return {"tweet": tweet, "received_at": time.time(), "trade_manager": manager,
+            "execute": True, "stamps": [],
+            "signals": {"should_trade": True, "token_address": "MINT"}}
+
+
+@pytest.fixture
+def dedup(monkeypatch):
+    dedup = SignalDeduplicator(mint_cooldown=300, author_cooldown=30)
+    monkeypatch.setattr(bot, "signal_deduplicator", dedup)
+    monkeypatch.setattr(bot, "topic_router", SimpleNamespace(publish_fill=lambda fill: None))
+    return dedup
+
+
+def test_a_vetoed_trade_does_not_start_the_cooldowns(dedup):
+    # Regression: the dedupe stage used to start the mint/author cooldowns
+    # before sizing and risk checks, so a vetoed signal blocked the mint.
+    refused = _Manager(None)
+    event = bot._dedupe_stage(_event(refused))
+    assert event["signals"]["should_trade"]
+    bot._execute_stage(event)
+    assert refused.calls == 1
+    assert dedup.check_trade("MINT", "alice") == ACCEPT
+
+
+def test_a_placed_trade_blocks_a_second_signal_for_the_mint(dedup):
+    placed = _Manager({"position_id": "p1"})
+    first = bot._dedupe_stage(_event(placed, author="alice", tweet_id="1"))
+    second = bot._dedupe_stage(_event(placed, author="bob", tweet_id="2"))
+    # Both pass the dedupe stage before either is executed...
+    assert first["signals"]["should_trade"] and second["signals"]["should_trade"]
+    bot._execute_stage(first)
+    bot._execute_stage(second)
+    # ...but only the first is placed.
+    assert placed.calls == 1
+    assert second["signals"]["suppressed"] == MINT_COOLDOWN_ACTIVE
@@ -0,0 +1,60 @@
+import integrated_bot as bot
+from fill_simulator import FillSimulator, Pool
+from price_feed import PriceCache, SimulatedPriceFeed
+from trading import default_trade_parameters
+
+POOL = Pool(sol_reserve=80.0, token_reserve=2.4e7)
+
+
+def simulator():
+    return FillSimulator(scenarios=2000, seed=7)
+
+
+def test_bigger_trades_move_the_price_more():
+    estimates = simulator().simulate_sizes([0.1, 0.5, 1.0, 5.0], POOL, (1, 3), 0.01)
+    prices = [estimate.expected_price for estimate in estimates]
+    assert prices == sorted(prices)
+    assert all(estimate.fill_rate == 1.0 for estimate in estimates)
+
+
+def test_tail_losses_are_ordered():
+    estimate = simulator().simulate(0.5, POOL, (1, 3), 0.01)
+    assert estimate.loss_p50 <= estimate.loss_p95 <= estimate.loss_p99
+
+
+def test_failed_scenarios_cost_only_the_fee():
+    estimate = simulator().simulate(0.5, POOL, (1, 30), 0.01, max_slippage=10)
+    assert 0 < estimate.fill_rate < 1
+    assert estimate.loss_p50 <= estimate.loss_p95 <= estimate.loss_p99
+
+
+def test_negative_expected_profit_is_never_sized():
+    # Selling below the price paid loses at every size.
+    assert simulator().optimal_size(POOL, POOL.mid_price, (15, 25), 0.01) is None
+    best = simulator().optimal_size(POOL, POOL.mid_price * 1.5, (15, 25), 0.01)
+    assert best is not None and best.expected_profit > 0
+
+
+def _event(token):
+    return {"signals": {"token_address": token, "should_trade": True}, "execute": True,
+            "trade_manager": bot.trade_manager}
+
+
+def test_unpriceable_mint_is_vetoed(monkeypatch):
+    monkeypatch.setattr(bot, "price_cache", PriceCache())
+    monkeypatch.setattr(bot, "price_feed", None)
+    event = _event("NEWMINT")
+    bot._size_trade(event)
+    assert event["execute"] is False
+    assert event["signals"]["suppressed"] == "no_pool"
+
+
+def test_new_mint_is_sized_against_its_fetched_pool(monkeypatch):
+    monkeypatch.setattr(bot, "price_cache", PriceCache())
+    monkeypatch.setattr(bot, "price_feed", SimulatedPriceFeed(bot.price_cache, tokens=list))
+    monkeypatch.setattr(bot.trade_manager, "trade_params", default_trade_parameters())
+    event = _event("NEWMINT")
+    bot._size_trade(event)
+    assert event["execute"] is True
+    assert event["signals"]["fill_estimate"]["expected_profit"] > 0
+    assert event["trade_params"].trade_amount == event["signals"]["fill_estimate"]["amount"]
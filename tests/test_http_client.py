@@ -0,0 +1,86 @@
+import logging
+
+import pytest
+import requests
+
+import http_client
+from http_client import HttpClient, retry_after_seconds
+
+
+class _Response:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+class _Session:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls.append((method, url, timeout))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+    logging.disable(logging.WARNING)
+    yield lambda outcomes, **kwargs: _with_session(HttpClient(redirects={}, **kwargs), outcomes)
+    logging.disable(logging.NOTSET)
+
+
+def _with_session(client, outcomes):
+    session = _Session(outcomes)
+    client._new_session = lambda: session
+    return client, session
+
+
+def test_retry_after_delta_and_rate_limit_reset():
+    assert retry_after_seconds(_Response(headers={"Retry-After": "2.5"})) == 2.5
+    reset = _Response(headers={"x-rate-limit-reset": "110", "x-rate-limit-remaining": "0"})
+    assert retry_after_seconds(reset, now=100) == 10
+    assert retry_after_seconds(_Response(headers={"x-rate-limit-reset": "110",
+                                                  "x-rate-limit-remaining": "5"}), now=100) is None
+    assert retry_after_seconds(_Response()) is None
+
+
+def test_retries_5xx_then_returns_the_success(client):
+    http, session = client([_Response(503), requests.ConnectionError("reset"), _Response(200)])
+    assert http.get("https://example.com/a").status_code == 200
+    assert len(session.calls) == 3
+    stats = http.stats()["example.com"]
+    assert stats["count"] == 3 and stats["errors"] == 1
+
+
+def test_post_is_never_retried(client):
+    http, session = client([_Response(503), _Response(200)])
+    assert http.post("https://example.com/a").status_code == 503
+    assert len(session.calls) == 1
+
+
+def test_long_rate_limit_is_returned_not_slept(client):
+    http, session = client([_Response(429, {"Retry-After": "600"}), _Response(200)])
+    assert http.get("https://example.com/a").status_code == 429
+    assert len(session.calls) == 1
+
+
+def test_exhausted_retries_raise_the_last_error(client):
+    http, session = client([requests.Timeout("slow")] * 3, max_retries=2)
+    with pytest.raises(requests.Timeout):
+        http.get("https://example.com/a")
+    assert len(session.calls) == 3
+
+
+def test_one_session_per_host():
+    http = HttpClient(redirects={})
+    assert http.session_for("a.example") is http.session_for("a.example")
+    assert http.session_for("a.example") is not http.session_for("b.example")
+    http.close()
@@ -0,0 +1,70 @@
+import time
+from types import SimpleNamespace
+
+import integrated_bot as bot
+from dedup import SignalDeduplicator
+from metrics import GEOMETRIC_BUCKETS_MS, Histogram, Registry
+
+
+def test_percentile_is_the_upper_bound_of_its_bucket():
+    histogram = Histogram(buckets=(1, 10, 100))
+    for value in (0.5, 0.5, 5, 50):
+        histogram.observe(value)
+    histogram.observe(500)
+    assert histogram.percentile(0.4) == 1
+    assert histogram.percentile(0.6) == 10
+    assert histogram.percentile(1.0) == 500
+    stats = histogram.as_dict()
+    assert stats["count"] == 5 and stats["max_ms"] == 500
+    assert stats["buckets"] == {"1": 2, "10": 1, "100": 1, "+Inf": 1}
+
+
+def test_geometric_buckets_stay_within_a_quarter():
+    assert GEOMETRIC_BUCKETS_MS[0] == 0.01 and GEOMETRIC_BUCKETS_MS[-1] >= 10000
+    for lower, upper in zip(GEOMETRIC_BUCKETS_MS, GEOMETRIC_BUCKETS_MS[1:]):
+        assert upper / lower <= 1.2501
+
+
+def test_render_is_cumulative_and_in_seconds():
+    registry = Registry()
+    histogram = registry.histogram("stage_seconds", "Stage latency.", buckets=(1, 10), stage='a"b')
+    histogram.observe(0.5)
+    histogram.observe(5, count=2)
+    histogram.observe(50)
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP stage_seconds Stage latency.", "# TYPE stage_seconds histogram"]
+    assert 'stage_seconds_bucket{stage="a\\"b",le="0.001"} 1' in lines
+    assert 'stage_seconds_bucket{stage="a\\"b",le="0.01"} 3' in lines
+    assert 'stage_seconds_bucket{stage="a\\"b",le="+Inf"} 4' in lines
+    assert 'stage_seconds_sum{stage="a\\"b"} 0.0605' in lines
+    assert 'stage_seconds_count{stage="a\\"b"} 4' in lines
+
+
+def test_collectors_add_series_at_render_time():
+    registry = Registry()
+    owned = Histogram(buckets=(1,))
+    owned.observe(2)
+
+    @registry.collector
+    def hosts():
+        yield ("http_seconds", "HTTP latency.", {"host": "example.com"}, owned)
+    assert 'http_seconds_count{host="example.com"} 1' in registry.render().splitlines()
+
+
+class _FilledEarlier:
+    def execute_trade(self, signals, trade_params=None):
+        # Filled a quarter second before execute_trade returned.
+        return {"position_id": 1, "filled_at": time.time() - 0.25}
+
+
+def test_the_fill_is_stamped_when_the_order_filled(monkeypatch):
+    monkeypatch.setattr(bot, "signal_deduplicator", SignalDeduplicator())
+    monkeypatch.setattr(bot, "topic_router", SimpleNamespace(publish_fill=lambda fill: None))
+    tweet = SimpleNamespace(id="1", author_id="alice", text="", created_at=None)
+    event = {"tweet": tweet, "received_at": time.time(), "trade_manager": _FilledEarlier(),
+             "execute": True, "stamps": [],
+             "signals": {"should_trade": True, "token_address": "MINT"}}
+    bot._execute_stage(event)
+    name, filled = event["stamps"][-1]
+    assert name == "filled"
+    assert 0.2 < time.perf_counter() - filled < 1.0
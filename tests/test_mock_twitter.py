@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from mock_twitter import MockTwitter, create_app, user_id_for
+
+AUTH = {"Authorization": "Bearer test"}
+
+
+@pytest.fixture
+def mock():
+    return MockTwitter(seed=1, max_connections=1, buffer=3)
+
+
+@pytest.fixture
+def client(mock):
+    return create_app(mock).test_client()
+
+
+def _lines(connection):
+    lines = []
+    while not connection.lines.empty():
+        lines.append(connection.lines.get_nowait())
+    return lines
+
+
+def test_requests_need_a_bearer_token(client):
+    assert client.get("/2/tweets/search/stream/rules").status_code == 401
+
+
+def test_duplicate_rules_are_rejected(client):
+    body = {"add": [{"value": "from:alice", "tag": "t"}]}
+    first = client.post("/2/tweets/search/stream/rules", json=body, headers=AUTH).get_json()
+    second = client.post("/2/tweets/search/stream/rules", json=body, headers=AUTH).get_json()
+    assert first["meta"]["summary"]["created"] == 1
+    assert second["errors"][0]["title"] == "DuplicateRule"
+
+    rule_id = first["data"][0]["id"]
+    deleted = client.post("/2/tweets/search/stream/rules", json={"delete": {"ids": [rule_id]}},
+                          headers=AUTH).get_json()
+    assert deleted["meta"]["summary"]["deleted"] == 1
+    assert "data" not in client.get("/2/tweets/search/stream/rules", headers=AUTH).get_json()
+
+
+def test_stream_only_carries_ruled_accounts(mock):
+    assert mock.emit(5) == 0
+    mock.add_rules([{"value": "from:alice OR from:bob"}])
+    connection = mock.open_connection({"author_id"})
+    assert mock.emit(2) == 2
+    authors = {json.loads(line)["data"]["author_id"] for line in _lines(connection)}
+    assert authors <= {user_id_for("alice"), user_id_for("bob")}
+
+
+def test_connection_limit_and_slow_consumer_disconnect(mock):
+    mock.add_rules([{"value": "from:alice"}])
+    connection = mock.open_connection(set())
+    assert mock.open_connection(set()) is None
+    mock.emit(4)
+    assert _lines(connection) == [None]
+    stats = mock.stats()
+    assert stats["slow_disconnects"] == 1 and stats["connections_refused"] == 1
+
+
+def test_disconnect_reaches_a_full_queue(mock):
+    mock.add_rules([{"value": "from:alice"}])
+    connection = mock.open_connection(set())
+    mock.emit(3)
+    assert connection.lines.full()
+    assert mock.disconnect(operational=True) == 1
+    lines = _lines(connection)
+    assert len(lines) == 3 and lines[-1] is None
+    assert json.loads(lines[-2])["errors"][0]["title"] == "operational-disconnect"
+
+
+def test_injected_faults(client, mock):
+    mock.add_rules([{"value": "from:alice"}])
+    connection = mock.open_connection(set())
+    mock.inject_malformed(1, "garbage")
+    mock.emit(2)
+    lines = _lines(connection)
+    assert lines[0].startswith("<html>")
+    assert "text" in json.loads(lines[1])["data"]
+
+    mock.inject_rate_limit(1, reset=15, path="/2/users")
+    limited = client.get("/2/users/by?usernames=alice", headers=AUTH)
+    assert limited.status_code == 429 and limited.headers["x-rate-limit-remaining"] == "0"
+    found = client.get("/2/users/by?usernames=alice,missing1", headers=AUTH).get_json()
+    assert [user["id"] for user in found["data"]] == [user_id_for("alice")]
+    assert found["errors"][0]["value"] == "missing1"
@@ -0,0 +1,51 @@
+import pytest
+
+from pipeline import Pipeline, Stage, per_item
+
+
+def test_items_flow_through_every_stage_and_none_is_filtered():
+    out = []
+    pipeline = Pipeline([
+        Stage("double", per_item(lambda x: x * 2), batch_size=8),
+        Stage("odd", per_item(lambda x: None if x % 4 else x)),
+        Stage("sink", lambda batch: out.extend(batch) or []),
+    ]).start()
+    try:
+        for value in range(10):
+            pipeline.submit(value)
+        assert pipeline.join(timeout=5)
+    finally:
+        pipeline.stop()
+    assert sorted(out) == [0, 4, 8, 12, 16]
+    assert pipeline.stats()["odd"]["processed"] == 10
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_oldest", [2, 3]), ("drop_newest", [0, 1])])
+def test_full_queues_drop_by_policy(policy, kept):
+    stage = Stage("s", per_item(lambda x: x), maxsize=2, policy=policy)
+    accepted = [stage.put(value) for value in range(4)]
+    assert [payload for _, payload in list(stage.queue.queue)] == kept
+    assert stage.stats.dropped == 2
+    assert accepted == ([True] * 4 if policy == "drop_oldest" else [True, True, False, False])
+
+
+def test_a_failing_batch_is_counted_and_the_stage_keeps_going():
+    out = []
+
+    def flaky(batch):
+        if 0 in batch:
+            raise ValueError("boom")
+        return batch
+    pipeline = Pipeline([Stage("flaky", flaky), Stage("sink", lambda b: out.extend(b) or [])]).start()
+    try:
+        for value in range(3):
+            pipeline.submit(value)
+        assert pipeline.join(timeout=5)
+    finally:
+        pipeline.stop()
+    assert out == [1, 2] and pipeline.stats()["flaky"]["errors"] == 1
+
+
+def test_unknown_policies_are_rejected():
+    with pytest.raises(ValueError):
+        Stage("s", per_item(str), policy="drop_random")
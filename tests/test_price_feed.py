@@ -0,0 +1,66 @@
+import logging
+import time
+
+from price_feed import DexscreenerPriceFeed, PriceCache, PriceTick, ReplayPriceFeed, read_ticks
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+def test_cache_keeps_the_newest_tick_and_ages_it_out():
+    cache = PriceCache(max_age=60)
+    now = time.time()
+    cache.publish([PriceTick("A", 2.0, ts=now), PriceTick("A", 1.0, ts=now - 5)])
+    assert cache.price("A") == 2.0
+    cache.publish([PriceTick("B", 3.0, ts=now - 120)])
+    assert cache.price("B") is None
+    assert cache.price("B", max_age=300) == 3.0
+    assert set(cache.snapshot(["A", "missing"])) == {"A"}
+
+
+def test_a_failing_subscriber_does_not_starve_the_others():
+    cache = PriceCache()
+    received = []
+
+    def broken(ticks):
+        raise ValueError("boom")
+    cache.subscribe(broken)
+    cache.subscribe(received.append)
+    logging.disable(logging.ERROR)
+    try:
+        cache.publish([PriceTick("A", 1.0)])
+    finally:
+        logging.disable(logging.NOTSET)
+    assert len(received) == 1
+    assert cache.stats()["subscriber_errors"] == 1
+
+
+def _pair(quote, usd, price, token=MINT):
+    return {"baseToken": {"address": token}, "quoteToken": {"symbol": quote},
+            "liquidity": {"usd": usd, "quote": 10, "base": 20}, "priceNative": price}
+
+
+def test_dexscreener_prices_off_the_deepest_sol_pool():
+    feed = DexscreenerPriceFeed(PriceCache(), tokens=list)
+    data = {"pairs": [_pair("SOL", 1000, "0.5"), _pair("WSOL", 5000, "0.6"),
+                      _pair("USDC", 99999, "90"), _pair("SOL", 10**6, "1", token="other")]}
+    [tick] = feed._parse(data, {MINT})
+    assert (tick.token, tick.price, tick.sol_reserve) == (MINT, 0.6, 10)
+
+
+def test_replay_batches_ticks_by_timestamp(tmp_path):
+    path = tmp_path / "ticks.csv"
+    path.write_text("ts,token,price,volume,sol_reserve\n"
+                    "2024-01-01T00:00:00Z,A,1.0,5,80\n"
+                    "1704067200,B,2.0,,\n"
+                    "1704067201,A,1.5,1,\n")
+    ticks = list(read_ticks(str(path)))
+    assert [tick.ts for tick in ticks] == [1704067200.0, 1704067200.0, 1704067201.0]
+    assert (ticks[0].sol_reserve, ticks[1].volume, ticks[1].sol_reserve) == (80.0, 0.0, None)
+
+    cache = PriceCache()
+    batches = []
+    cache.subscribe(lambda batch: batches.append([tick.token for tick in batch]))
+    feed = ReplayPriceFeed(cache, str(path), speed=0).start()
+    assert feed.finished.wait(5)
+    assert batches == [["A", "B"], ["A"]]
+    assert cache.price("A") == 1.5
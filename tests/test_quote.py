@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+import integrated_bot as bot
+from price_feed import DexscreenerPriceFeed, PriceCache, SimulatedPriceFeed
+
+MINT = "So11111111111111111111111111111111111111112"
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    monkeypatch.setattr(bot, "price_cache", PriceCache())
+
+    def use(feed):
+        monkeypatch.setattr(bot, "price_feed", feed)
+        return feed
+    return use
+
+
+def test_no_feed_means_no_quote(feed):
+    feed(None)
+    assert bot.quote(MINT) is None
+
+
+def test_cache_miss_is_fetched_from_the_feed(feed):
+    feed(SimulatedPriceFeed(bot.price_cache, tokens=list))
+    price = bot.quote("NEWMINT")
+    assert price == bot.price_cache.price("NEWMINT")
+
+
+def test_dexscreener_never_prices_a_cashtag(feed, monkeypatch):
+    dexscreener = feed(DexscreenerPriceFeed(bot.price_cache, tokens=list))
+    monkeypatch.setattr(dexscreener, "_parse", lambda data, wanted: pytest.fail("fetched a cashtag"))
+    assert bot.quote("BONK") is None
+
+
+def test_failed_fetch_skips_the_trade(feed, monkeypatch):
+    dexscreener = feed(DexscreenerPriceFeed(bot.price_cache, tokens=list))
+
+    def down(tokens):
+        raise ConnectionError("dexscreener is down")
+    monkeypatch.setattr(dexscreener, "fetch", down)
+    logging.disable(logging.WARNING)
+    try:
+        assert bot.quote(MINT) is None
+        assert bot.trade_manager.execute_trade({"token_address": MINT, "should_trade": True}) is None
+    finally:
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,65 @@
+import json
+
+import integrated_bot as bot
+from dedup import SignalDeduplicator
+from metrics import GEOMETRIC_BUCKETS_MS, Histogram
+from replay import BASELINE_PATH, BENCHMARKS, compare, generate_corpus, replay
+from sentiment import SentimentScorer
+
+
+class _Analyzer:
+    def polarity_scores(self, text):
+        return {"compound": 0.5}
+
+
+def _run(lexicon=True, **normalized):
+    return {"sentiment_lexicon": lexicon,
+            "results": {name: {"tweets_per_sec": 1000.0 * value, "normalized": value}
+                        for name, value in normalized.items()}}
+
+
+def test_corpus_is_a_pure_function_of_count_and_seed():
+    assert generate_corpus(200, seed=3) == generate_corpus(200, seed=3)
+    assert generate_corpus(200, seed=3) != generate_corpus(200, seed=4)
+
+
+def test_every_benchmark_is_compared_with_the_baseline():
+    baseline = _run(extract=5000.0, pipeline=100.0)
+    assert compare(_run(extract=4000.0, pipeline=90.0), baseline) == []
+    # A regression in extraction itself is caught too.
+    regressions = compare(_run(extract=3000.0, pipeline=100.0), baseline)
+    assert len(regressions) == 1 and regressions[0].startswith("extract")
+    assert len(compare(_run(extract=5000.0, pipeline=60.0), baseline)) == 1
+
+
+def test_a_missing_or_mismatched_baseline_fails():
+    baseline = _run(extract=5000.0)
+    assert compare(_run(extract=5000.0, pipeline=100.0), baseline) == ["pipeline: no baseline"]
+    assert len(compare(_run(lexicon=False, extract=5000.0), baseline)) == 1
+
+
+def test_the_checked_in_baseline_covers_every_benchmark():
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    assert set(baseline["results"]) == set(BENCHMARKS)
+    assert all(result["normalized"] > 0 for result in baseline["results"].values())
+
+
+def test_end_to_end_percentiles_are_not_snapped_to_coarse_bounds():
+    histogram = Histogram(GEOMETRIC_BUCKETS_MS)
+    for _ in range(100):
+        histogram.observe(267.0)
+    assert 267.0 <= histogram.percentile(0.5) < 267.0 * 1.25
+
+
+def test_replay_opens_and_broadcasts_positions(monkeypatch):
+    monkeypatch.setattr(bot, "sentiment_scorer", SentimentScorer(analyzer_factory=_Analyzer))
+    monkeypatch.setattr(bot, "signal_deduplicator", SignalDeduplicator())
+    fills = []
+    monkeypatch.setattr(bot.topic_router, "publish_fill", fills.append)
+
+    report = replay(generate_corpus(300, seed=1), queue_size=301)
+    assert report["drained"]
+    assert report["trades"]["open_positions"] + report["trades"]["closed_positions"] >= 1
+    assert report["segments"]["decided_to_filled"]["count"] >= 1
+    assert len(fills) >= report["trades"]["open_positions"]
@@ -0,0 +1,74 @@
+import logging
+
+import pytest
+
+from risk_engine import (APPROVE, DAILY_LOSS, MAX_OPEN_POSITIONS, MAX_RISK, MAX_TOKEN_EXPOSURE,
+                         MAX_TOTAL_EXPOSURE, NO_STOP_LOSS, RISK_REWARD, RiskEngine, RiskLimits)
+from trading import TradeManager, TradeParameters
+
+DAY = 86400
+
+
+def _params(amount=0.5, stop_loss=10, take_profit=2, max_risk=2, risk_reward=3):
+    return TradeParameters(trade_amount=amount, slippage_tolerance=(0, 0),
+                           take_profit_multiplier=take_profit, moonbag_percentage=0,
+                           priority_fee=0.0, stop_loss_percent=stop_loss,
+                           max_risk_percent=max_risk, risk_reward_ratio=risk_reward)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr("trading.random.uniform", lambda low, high: 0.0)
+    logging.disable(logging.INFO)
+    engine = RiskEngine(RiskLimits(capital=10, max_total_exposure=1.5, max_token_exposure=1.0,
+                                   max_open_positions=3, max_daily_loss=0.3))
+    yield TradeManager(_params(), risk_engine=engine)
+    logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("params, verdict", [
+    (_params(stop_loss=0), NO_STOP_LOSS),
+    (_params(amount=5, stop_loss=10), MAX_RISK),
+    (_params(take_profit=1.2, stop_loss=10), RISK_REWARD),
+    (_params(), APPROVE),
+])
+def test_order_level_checks(params, verdict):
+    engine = RiskEngine(RiskLimits(capital=10))
+    assert engine.check("MINT", params) == verdict
+    assert engine.counts[verdict] == 1
+
+
+def test_exposure_limits_follow_entries_and_exits(manager):
+    engine = manager.risk_engine
+    first = manager.place_trade("A", 1.0, _params(amount=0.5))
+    manager.place_trade("A", 1.0, _params(amount=0.5))
+    assert engine.token_exposure("A") == 1.0
+    assert manager.place_trade("A", 1.0, _params(amount=0.25)) is None
+    assert engine.counts[MAX_TOKEN_EXPOSURE] == 1
+
+    manager.place_trade("B", 1.0, _params(amount=0.25))
+    assert manager.place_trade("C", 1.0, _params(amount=0.125)) is None
+    assert engine.counts[MAX_OPEN_POSITIONS] == 1
+
+    manager.close_position(first["position_id"], 1.0)
+    assert engine.open_positions == 2 and engine.total_exposure == 0.75
+    assert manager.place_trade("C", 1.0, _params(amount=1.0)) is None
+    assert engine.counts[MAX_TOTAL_EXPOSURE] == 1
+
+
+def test_realized_losses_stop_trading_for_the_day(manager):
+    engine = manager.risk_engine
+    trade = manager.place_trade("A", 1.0, _params(amount=0.5))
+    manager.close_position(trade["position_id"], 0.2)
+    assert engine.realized_today == pytest.approx(-0.4)
+    assert engine.open_positions == 0 and engine.total_exposure == 0.0
+    assert manager.place_trade("A", 1.0, _params(amount=0.1)) is None
+    assert engine.counts[DAILY_LOSS] == 1
+    assert engine.check("A", _params(amount=0.1), now=(engine._day + 1) * DAY) == APPROVE
+
+
+def test_limits_are_swapped_whole():
+    engine = RiskEngine(RiskLimits(max_open_positions=5))
+    engine.update_limits(RiskLimits.from_settings({"max_open_positions": 0, "unknown": 1}))
+    assert engine.check("A", _params()) == MAX_OPEN_POSITIONS
+    assert engine.stats()["limits"]["max_open_positions"] == 0
@@ -0,0 +1,78 @@
+import logging
+
+import pytest
+
+from scalping import ScalpingEngine, ScalpParameters
+from trading import TradeManager, default_trade_parameters
+
+# Falls for a while, then turns up: the fast EMA crosses above the slow one.
+DIP_AND_RALLY = [1.0, 0.99, 0.98, 0.97, 0.96, 0.95, 0.94, 0.95, 0.97, 0.975]
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr("trading.random.uniform", lambda low, high: 0.0)
+    logging.disable(logging.INFO)
+    yield TradeManager(default_trade_parameters())
+    logging.disable(logging.NOTSET)
+
+
+def _engine(manager, **params):
+    params = dict(dict(fast_span=2, slow_span=6, vwap_span=4, warmup=5, min_volatility=0.0,
+                       stop_loss_sigmas=10, cooldown_seconds=30), **params)
+    events = []
+    return ScalpingEngine(manager, ScalpParameters(**params), on_event=events.append), events
+
+
+def _feed(engine, prices, start=0.0):
+    events = []
+    for offset, price in enumerate(prices):
+        events.extend(engine.on_tick("MINT", price, ts=start + offset))
+    return events
+
+
+def test_ema_cross_enters_a_volatility_scaled_scalp(manager):
+    engine, seen = _engine(manager)
+    events = _feed(engine, DIP_AND_RALLY)
+    entries = [event for event in events if event.get("reason") == "scalp_entry"]
+    assert len(entries) == 1 and seen == events
+    position = manager.get_position(entries[0]["position_id"])
+    assert position is not None
+    assert engine.indicators("MINT")["position_id"] == position.id
+    assert engine.stats()["open_scalps"] == 1
+
+
+def test_no_entry_before_warmup(manager):
+    engine, _ = _engine(manager, warmup=len(DIP_AND_RALLY) + 1)
+    assert _feed(engine, DIP_AND_RALLY) == []
+
+
+def test_cross_back_exits_and_cools_down(manager):
+    engine, _ = _engine(manager)
+    _feed(engine, DIP_AND_RALLY)
+    exits = _feed(engine, [0.985, 0.97, 0.96], start=len(DIP_AND_RALLY))
+    assert [event["reason"] for event in exits] == ["scalp_exit"]
+    assert engine.indicators("MINT")["position_id"] is None
+
+    # Another dip and rally inside the cooldown does not re-enter.
+    again = _feed(engine, DIP_AND_RALLY, start=len(DIP_AND_RALLY) + 3)
+    assert not [event for event in again if event.get("reason") == "scalp_entry"]
+    assert engine.stats()["entries"] == 1
+
+
+def test_volatility_outside_the_band_is_not_traded(manager):
+    engine, _ = _engine(manager, max_volatility=0.001)
+    assert _feed(engine, DIP_AND_RALLY) == []
+
+
+def test_indicators_and_token_cap(manager):
+    engine = ScalpingEngine(manager, max_tokens=1)
+    engine.on_tick("MINT", 2.0, volume=1.0)
+    engine.on_tick("MINT", 4.0, volume=3.0)
+    assert engine.on_tick("MINT", 0) == []
+    assert engine.on_tick("OTHER", 1.0) == []
+    indicators = engine.indicators("MINT")
+    assert indicators["ticks"] == 2 and indicators["price"] == 4.0
+    assert 2.0 < indicators["vwap"] < 4.0
+    assert engine.indicators("OTHER") is None
+    assert engine.stats()["rejected_tokens"] == 1
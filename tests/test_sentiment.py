@@ -0,0 +1,59 @@
+import logging
+
+from sentiment import SentimentScorer, normalize_text
+
+
+class _Analyzer:
+    def __init__(self):
+        self.calls = []
+
+    def polarity_scores(self, text):
+        self.calls.append(text)
+        return {"compound": -0.5 if "rug" in text else 0.5}
+
+
+def _scorer():
+    analyzer = _Analyzer()
+    return SentimentScorer(analyzer_factory=lambda: analyzer, max_workers=2), analyzer
+
+
+def test_retweets_and_links_share_a_cache_key():
+    assert normalize_text("RT @alice:  moon   soon https://t.co/x") == "moon soon"
+
+
+def test_each_distinct_text_is_scored_once():
+    scorer, analyzer = _scorer()
+    texts = ["moon soon", "RT @a: moon soon", "rug pull", "moon soon https://t.co/1"]
+    assert scorer.score_many(texts) == [0.5, 0.5, -0.5, 0.5]
+    assert scorer.score("rug pull") == -0.5
+    assert sorted(analyzer.calls) == ["moon soon", "rug pull"]
+    scorer.shutdown()
+
+
+def test_a_missing_lexicon_refuses_every_trade(caplog):
+    def missing():
+        raise LookupError("vader_lexicon not found")
+    scorer = SentimentScorer(analyzer_factory=missing)
+    with caplog.at_level(logging.ERROR):
+        assert scorer.warm_up() is False
+        assert scorer.score_many(["moon", "rug"]) == [0.0, 0.0]
+    assert len([r for r in caplog.records if "VADER" in r.getMessage()]) == 1
+    # Neutral scores clear the default threshold; the gate must still close.
+    assert not scorer.passes(0.0) and not scorer.passes(1.0)
+    scorer.shutdown()
+
+
+def test_cache_hits_skip_the_worker_pool(monkeypatch):
+    scorer, analyzer = _scorer()
+    scorer.score("moon soon")
+    pooled = []
+    monkeypatch.setattr(scorer, "_run_in_pool", lambda keys: pooled.append(keys) or [0.5] * len(keys))
+    assert scorer.score_many(["moon soon", "RT @a: moon soon", "gm", "gn"]) == [0.5, 0.5, 0.5, 0.5]
+    assert pooled == [["gm", "gn"]]
+    assert scorer.cache_stats()["hits"] == 1
+
+
+def test_threshold_gates_trades():
+    scorer, _ = _scorer()
+    # VADER counts compound <= -0.05 as negative: the threshold itself fails.
+    assert scorer.passes(scorer.threshold + 0.01) and not scorer.passes(scorer.threshold)
@@ -0,0 +1,89 @@
+import json
+import threading
+
+import pytest
+
+from settings_store import SettingsStore
+
+DEFAULTS = {"trade_amount": 0.5, "max_open_positions": 20, "enabled": True, "label": "x"}
+BOUNDS = {"trade_amount": (0.001, 10.0), "max_open_positions": (0, 100)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SettingsStore(DEFAULTS, str(tmp_path / "settings.json"), BOUNDS)
+
+
+def test_updates_are_coerced_versioned_and_persisted(store):
+    snapshot = store.update({"trade_amount": "1.5", "max_open_positions": 7.0, "enabled": "off"})
+    assert (snapshot.version, snapshot["trade_amount"], snapshot["max_open_positions"],
+            snapshot["enabled"]) == (1, 1.5, 7, False)
+    assert store.update({"trade_amount": 1.5}) is snapshot
+    reopened = SettingsStore(DEFAULTS, store.path, BOUNDS)
+    assert reopened.snapshot.version == 1 and reopened.snapshot["trade_amount"] == 1.5
+
+
+@pytest.mark.parametrize("key, value", [
+    ("trade_amount", float("nan")), ("trade_amount", "inf"), ("trade_amount", -1.0),
+    ("trade_amount", 11.0), ("max_open_positions", "-inf"), ("max_open_positions", 101),
+    ("trade_amount", "lots"),
+])
+def test_invalid_values_are_rejected_and_nothing_is_applied(store, key, value):
+    with pytest.raises(ValueError):
+        store.update({"max_open_positions": 5, key: value})
+    assert store.version == 0 and store.snapshot["max_open_positions"] == 20
+
+
+def test_unknown_keys_are_rejected(store):
+    with pytest.raises(KeyError):
+        store.update({"leverage": 100})
+
+
+def test_invalid_saved_values_fall_back_to_the_defaults(store):
+    with open(store.path, "w") as f:
+        f.write(json.dumps({"version": 3, "settings": {"trade_amount": 500.0, "max_open_positions": 9}})
+                .replace("500.0", "NaN"))
+    reopened = SettingsStore(DEFAULTS, store.path, BOUNDS)
+    assert reopened.snapshot["trade_amount"] == 0.5 and reopened.snapshot["max_open_positions"] == 9
+
+
+def test_subscribers_run_after_the_writer_lock_is_released(store):
+    held = []
+    store.subscribe(lambda snapshot: held.append(store._lock.locked()))
+    store.update({"trade_amount": 1.0})
+    assert held == [False]
+
+
+def test_a_slow_subscriber_does_not_hold_up_updates(store):
+    entered, release = threading.Event(), threading.Event()
+    seen = []
+
+    @store.subscribe
+    def slow(snapshot):
+        seen.append(snapshot.version)
+        entered.set()
+        release.wait(5)
+
+    first = threading.Thread(target=store.update, args=({"trade_amount": 1.0},))
+    first.start()
+    assert entered.wait(5)
+    # Applied while the subscriber is still busy with version 1...
+    assert store.update({"trade_amount": 2.0}).version == 2
+    assert store.update({"trade_amount": 3.0}).version == 3
+    release.set()
+    first.join(5)
+    # ...and handed over, newest only, once it is done.
+    assert seen == [1, 3]
+
+
+def test_a_subscriber_may_update(store):
+    seen = []
+
+    @store.subscribe
+    def clamp(snapshot):
+        seen.append(snapshot["trade_amount"])
+        if snapshot["trade_amount"] > 5:
+            store.update({"trade_amount": 5.0})
+
+    store.update({"trade_amount": 8.0})
+    assert seen == [8.0, 5.0] and store.snapshot["trade_amount"] == 5.0
@@ -0,0 +1,32 @@
+from signal_extractor import SignalExtractor, addresses, cashtags, is_valid_mint
+
+WSOL = "So11111111111111111111111111111111111111112"
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def test_only_32_byte_base58_strings_are_mints():
+    assert is_valid_mint(WSOL) and is_valid_mint(USDC)
+    assert not is_valid_mint("1" * 44)              # decodes to 44 zero bytes
+    assert not is_valid_mint(WSOL[:-1] + "0")       # 0 isn't base58
+    assert not is_valid_mint("z" * 44)              # too large for 32 bytes
+
+
+def test_mints_and_cashtags_are_found_with_positions():
+    text = f"aping $BONK and {WSOL}, not $100"
+    mentions = SignalExtractor().extract(text)
+    assert [(m.kind, m.value) for m in mentions] == [("cashtag", "BONK"), ("address", WSOL)]
+    assert all(text[m.start:m.end].lstrip("$") == m.value for m in mentions)
+
+
+def test_links_are_skipped_unless_asked_for():
+    text = f"chart https://dexscreener.com/solana/{USDC}"
+    assert SignalExtractor().extract(text) == []
+    assert addresses(SignalExtractor(scan_urls=True).extract(text)) == [USDC]
+
+
+def test_a_batch_matches_per_text_extraction():
+    texts = [f"$WIF {WSOL}", "", None, f"{USDC} $wif {USDC}", "gm"]
+    extractor = SignalExtractor()
+    batch = extractor.extract_many(texts)
+    assert batch == [extractor.extract(text) for text in texts]
+    assert addresses(batch[3]) == [USDC] and cashtags(batch[3]) == ["wif"]
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+import integrated_bot as bot
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+_PROBE = """
+import json, sys
+import integrated_bot
+print(json.dumps({"loaded": [name for name in ("tweepy", "nltk", "eventlet") if name in sys.modules],
+                  "timings": integrated_bot.startup_timings}))
+"""
+
+
+def test_import_defers_heavy_dependencies():
+    output = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, capture_output=True,
+                            text=True, check=True, timeout=60).stdout
+    probe = json.loads(output.strip().splitlines()[-1])
+    assert probe["loaded"] == []
+    assert set(probe["timings"]) == {"import"}
+
+
+def test_startup_phases_are_timed_and_served():
+    with bot.startup_phase("test_phase"):
+        pass
+    try:
+        timings = bot.app.test_client().get("/api/startup").get_json()
+        assert timings["test_phase"] >= 0 and "import" in timings
+    finally:
+        bot.startup_timings.pop("test_phase", None)
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+from stream_rules import StreamRuleManager, pack_accounts, parse_rule_accounts
+
+
+class _Stream:
+    """Just enough of tweepy.StreamingClient's rule API, with a rule cap."""
+
+    def __init__(self, values=(), max_rules=5):
+        self.rules = {}
+        self.max_rules = max_rules
+        self.calls = []
+        self._next_id = 1
+        for value in values:
+            self._add(value)
+
+    def _add(self, value):
+        rule = SimpleNamespace(id=str(self._next_id), value=value)
+        self._next_id += 1
+        self.rules[rule.id] = rule
+        return rule
+
+    def get_rules(self):
+        return SimpleNamespace(data=list(self.rules.values()), errors=[])
+
+    def add_rules(self, rules):
+        self.calls.append(("add", [rule.value for rule in rules]))
+        live = {rule.value for rule in self.rules.values()}
+        if len(self.rules) + len(rules) > self.max_rules or any(r.value in live for r in rules):
+            return SimpleNamespace(data=None, errors=[{"title": "RuleCapExceeded or DuplicateRule"}])
+        return SimpleNamespace(data=[self._add(rule.value) for rule in rules], errors=[])
+
+    def delete_rules(self, ids):
+        self.calls.append(("delete", list(ids)))
+        for rule_id in ids:
+            self.rules.pop(rule_id)
+        return SimpleNamespace(data=None, errors=[])
+
+    def accounts(self):
+        return sorted(a for rule in self.rules.values() for a in parse_rule_accounts(rule.value))
+
+
+def test_accounts_pack_into_rules_within_the_length_limit():
+    rules = pack_accounts([f"user{i}" for i in range(40)], max_length=100)
+    assert all(len(rule) <= 100 for rule in rules)
+    assert sum(len(parse_rule_accounts(rule)) for rule in rules) == 40
+
+
+def test_only_new_accounts_are_added():
+    stream = _Stream(["from:a OR from:b"])
+    assert StreamRuleManager(stream).sync(["a", "b", "c"]) == (1, 0)
+    assert stream.calls == [("add", ["from:c"])]
+
+
+def test_new_rules_are_added_before_removed_ones_are_deleted():
+    stream = _Stream(["from:a OR from:b"])
+    StreamRuleManager(stream, max_rules=5).sync(["b", "c"])
+    assert stream.calls == [("add", ["from:b OR from:c"]), ("delete", ["1"])]
+    assert stream.accounts() == ["b", "c"]
+
+
+def test_only_the_overflow_is_deleted_first_at_the_rule_cap():
+    # At the rule cap: adding everything first would be rejected.
+    stream = _Stream(["from:a", "from:b", "from:x"], max_rules=3)
+    StreamRuleManager(stream, max_rule_length=6, max_rules=3).sync(["c", "d"])
+    assert stream.calls == [("delete", ["1", "2"]), ("add", ["from:c", "from:d"]), ("delete", ["3"])]
+    assert stream.accounts() == ["c", "d"]
+
+
+def test_a_repack_keeps_rules_it_would_recreate_verbatim(monkeypatch):
+    monkeypatch.setattr("stream_rules.COMPACT_SLACK", 0)
+    stream = _Stream(["from:a OR from:b", "from:c", "from:d", "from:e", "from:f"], max_rules=8)
+    manager = StreamRuleManager(stream, max_rule_length=17, max_rules=8)
+    assert manager.sync(["a", "b", "c", "d", "e", "f", "g"]) == (3, 4)
+    assert stream.calls == [("add", ["from:c OR from:d", "from:e OR from:f", "from:g"]),
+                            ("delete", ["2", "3", "4", "5"])]
+    assert "1" in stream.rules
+    assert stream.accounts() == ["a", "b", "c", "d", "e", "f", "g"]
@@ -0,0 +1,101 @@
+import logging
+import threading
+
+from top_traders import StaleWhileRevalidateCache
+
+
+def test_fresh_value_is_served_from_memory():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return ["a"]
+    cache = StaleWhileRevalidateCache(fetch, ttl=60, max_stale=600)
+    assert cache.get() == ["a"]
+    assert cache.get() == ["a"]
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 1
+
+
+def test_stale_value_is_served_while_refreshing():
+    values = iter([["old"], ["new"]])
+    refreshed = threading.Event()
+
+    def fetch():
+        value = next(values)
+        if value == ["new"]:
+            refreshed.set()
+        return value
+    cache = StaleWhileRevalidateCache(fetch, ttl=0, max_stale=600)
+    assert cache.get() == ["old"]
+    assert cache.get() == ["old"]
+    assert refreshed.wait(5)
+    for _ in range(100):
+        if not cache.stats()["refreshing"]:
+            break
+        threading.Event().wait(0.01)
+    assert cache.stats()["stale_hits"] >= 1
+    assert cache._value == ["new"]
+
+
+def test_concurrent_misses_share_one_fetch():
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return ["a"]
+    cache = StaleWhileRevalidateCache(fetch, ttl=60, max_stale=600)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["misses"] < 4:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [["a"]] * 4
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 3
+
+
+def test_fallback_only_on_a_cold_failure():
+    fail = [True]
+
+    def fetch():
+        if fail[0]:
+            raise ConnectionError("down")
+        return ["live"]
+    cache = StaleWhileRevalidateCache(fetch, ttl=0, max_stale=0, fallback=["dummy"],
+                                      error_ttl=0)
+    logging.disable(logging.ERROR)
+    try:
+        assert cache.get() == ["dummy"]
+        fail[0] = False
+        assert cache.get() == ["live"]
+        fail[0] = True
+        assert cache.get() == ["live"]
+    finally:
+        logging.disable(logging.NOTSET)
+    stats = cache.stats()
+    assert stats["fallbacks"] == 1 and stats["refresh_failures"] == 2
+
+
+def test_a_failed_fetch_is_not_retried_within_the_error_ttl():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise ConnectionError("down")
+    cache = StaleWhileRevalidateCache(fetch, ttl=60, max_stale=600, fallback=["dummy"],
+                                      error_ttl=60)
+    logging.disable(logging.ERROR)
+    try:
+        assert [cache.get() for _ in range(5)] == [["dummy"]] * 5
+    finally:
+        logging.disable(logging.NOTSET)
+    assert len(calls) == 1
+    assert cache.stats()["negative_hits"] == 4
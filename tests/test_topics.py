@@ -0,0 +1,63 @@
+import pytest
+
+import topics
+from broadcaster import Broadcaster
+from topics import TopicRouter, normalize_topic
+
+
+class _Recorder(Broadcaster):
+    def __init__(self):
+        super().__init__(socketio=None)
+        self.published = []
+
+    def publish(self, event, data, room=None, key=None):
+        self.published.append((event, room))
+
+
+@pytest.fixture
+def router():
+    return TopicRouter(_Recorder())
+
+
+@pytest.mark.parametrize("topic", ["whales:min:nan", "whales:min:inf", "whales:min:-1",
+                                   "whales:min:abc", "tweets:author:", "nope"])
+def test_invalid_topics_are_rejected(topic):
+    assert normalize_topic(topic) is None
+
+
+def test_equivalent_thresholds_share_a_room():
+    assert normalize_topic(" whales:min:100.0 ") == normalize_topic("whales:min:100") == "whales:min:100"
+
+
+def test_whale_events_go_to_the_matching_threshold_rooms(router):
+    router.connect("a", ["whales:min:10", "whales:min:100"])
+    router.publish_whale({"amount": 50})
+    assert router.broadcaster.published == [("new_whale_activity", ["whales", "whales:min:10"])]
+
+
+def test_thresholds_are_dropped_with_their_last_subscriber(router):
+    router.connect("a", ["whales:min:10"])
+    router.connect("b", ["whales:min:10", "whales:min:20"])
+    router.unsubscribe("b", ["whales:min:20"])
+    assert router.whale_thresholds() == [10.0]
+    router.disconnect("a")
+    assert router.whale_thresholds() == [10.0]
+    router.subscribe("b", ["tweets"], replace=True)
+    assert router.whale_thresholds() == []
+
+
+def test_distinct_thresholds_are_capped(router, monkeypatch):
+    monkeypatch.setattr(topics, "MAX_WHALE_THRESHOLDS", 2)
+    router.connect("a", ["whales:min:1", "whales:min:2"])
+    assert router.subscribe("b", ["whales:min:3", "whales:min:2"]) == []
+    router.connect("b")
+    assert router.subscribe("b", ["whales:min:3", "whales:min:2"]) == ["tweets", "whales", "whales:min:2"]
+    assert router.whale_thresholds() == [1.0, 2.0]
+    router.disconnect("a")
+    assert router.subscribe("b", ["whales:min:3"])[-1] == "whales:min:3"
+    assert router.whale_thresholds() == [2.0, 3.0]
+
+
+def test_clients_naming_no_topics_get_the_defaults(router):
+    router.connect("a")
+    assert router.topics_of("a") == set(topics.DEFAULT_TOPICS)
@@ -0,0 +1,42 @@
+import queue
+
+import pytest
+
+from topology import SETTINGS, ProcessTopology
+
+
+@pytest.fixture
+def topology():
+    topology = ProcessTopology(on_tweet=None, on_fill=None, shards=1)
+    topology._decision_queue = queue.Queue(1)
+    return topology
+
+
+def test_settings_never_block_on_a_full_decision_queue(topology):
+    topology._decision_queue.put("tweets")
+    topology.update_settings({"trade_amount": 1.0})
+    topology.update_settings({"trade_amount": 2.0})
+    assert topology._decision_queue.get_nowait() == "tweets"
+    # The relay thread retries; only the newest settings are sent.
+    topology._send_settings()
+    assert topology._decision_queue.get_nowait() == (SETTINGS, {"trade_amount": 2.0})
+    topology._send_settings()
+    assert topology._decision_queue.empty()
+
+
+def test_price_ticks_are_coalesced_while_the_relay_is_full():
+    from price_feed import PriceTick
+    from topology import PRICES, _RelayPublisher
+
+    relay = queue.Queue(1)
+    publisher = _RelayPublisher(relay)
+    relay.put("stats")
+    publisher.publish_prices([PriceTick("A", 1.0), PriceTick("B", 5.0)])
+    publisher.publish_prices([PriceTick("A", 2.0)])
+    assert publisher.stats() == {"prices_pending": 2, "prices_coalesced": 1}
+    relay.get_nowait()
+    publisher.publish_prices([PriceTick("C", 3.0)])
+    kind, ticks = relay.get_nowait()
+    assert kind == PRICES
+    assert {tick.token: tick.price for tick in ticks} == {"A": 2.0, "B": 5.0, "C": 3.0}
+    assert publisher.stats()["prices_pending"] == 0
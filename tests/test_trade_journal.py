@@ -0,0 +1,107 @@
+import struct
+
+import pytest
+
+import trade_journal
+from trade_journal import TradeJournal
+from trading import CLOSED, MOONBAG, Position, TradeManager
+
+
+def _position(id, token="MINT", tokens=100.0):
+    return Position(id=id, token=token, entry_price=0.01, effective_price=0.0101, tokens=tokens,
+                    target_price=0.02, stop_price=0.009, moonbag_ratio=0.2, cost=1.0,
+                    opened_at=1000.0 + id)
+
+
+def _sell(position, tokens, price, state, reason="take_profit"):
+    position.remaining -= tokens
+    position.state = state
+    return {"reason": reason, "price": price, "tokens_sold": tokens, "proceeds": tokens * price}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.bin")
+
+
+def test_records_round_trip_and_rebuild_the_book(path):
+    journal = TradeJournal(path)
+    first, second = _position(1), _position(2, token="OTHER")
+    journal.record_entry(first)
+    journal.record_entry(second)
+    journal.record_exit(first, _sell(first, 80.0, 0.02, MOONBAG))
+    journal.record_exit(second, _sell(second, 100.0, 0.008, CLOSED, reason="stop_loss"))
+    journal.close()
+
+    journal = TradeJournal(path)
+    try:
+        assert [(r.kind, r.position_id, r.reason) for r in journal.records()] == [
+            ("entry", 1, ""), ("entry", 2, ""), ("exit", 1, "take_profit"), ("exit", 2, "stop_loss")]
+        manager = TradeManager()
+        assert manager.recover(journal) == 4
+        [held] = manager.open_positions()
+        assert (held.id, held.remaining, held.state) == (1, 20.0, MOONBAG)
+        assert manager.get_position(2) is None
+        assert manager.summary()["closed_positions"] == 1
+    finally:
+        journal.close()
+
+
+def test_commit_writes_the_committed_count_to_the_header(path):
+    journal = TradeJournal(path, commit_interval=60)
+    journal.record_entry(_position(1))
+    assert journal.commit() == 1
+    with open(path, "rb") as f:
+        assert struct.unpack("<8sHxxxxxxQ", f.read(24))[2] == 1
+    journal.close()
+
+
+def test_a_torn_tail_is_discarded_on_open(path):
+    journal = TradeJournal(path, commit_interval=60)
+    for id in range(1, 4):
+        journal.record_entry(_position(id))
+    journal.close()
+    # Tear the last record and roll the header back, as after a crash.
+    with open(path, "r+b") as f:
+        f.seek(16)
+        f.write(struct.pack("<Q", 1))
+        f.seek(64 + 2 * 136 + 20)
+        f.write(b"\xff\xff")
+
+    journal = TradeJournal(path)
+    try:
+        assert journal.recovered_torn == 1
+        assert [r.position_id for r in journal.records()] == [1, 2]
+        journal.record_entry(_position(4))
+        assert [r.position_id for r in journal.records()] == [1, 2, 4]
+    finally:
+        journal.close()
+
+
+def test_the_file_grows_past_its_first_chunk(path, monkeypatch):
+    monkeypatch.setattr(trade_journal, "_GROW_RECORDS", 16)
+    monkeypatch.setattr(trade_journal, "_GROW_AHEAD", 4)
+    journal = TradeJournal(path, commit_interval=60)
+    try:
+        for id in range(1, 41):
+            journal.record_entry(_position(id))
+        assert journal.capacity >= 40
+        journal.commit()
+        journal._grow_ahead()
+        assert journal.capacity - journal.count >= 4
+        assert [r.position_id for r in journal.records()] == list(range(1, 41))
+    finally:
+        journal.close()
+
+    journal = TradeJournal(path)
+    try:
+        assert journal.count == 40
+    finally:
+        journal.close()
+
+
+def test_a_closed_journal_refuses_records(path):
+    journal = TradeJournal(path)
+    journal.close()
+    with pytest.raises(ValueError):
+        journal.record_entry(_position(1))
@@ -0,0 +1,61 @@
+import logging
+
+import pytest
+
+from risk_engine import RiskEngine, RiskLimits
+from trading import CLOSED, MOONBAG, OPEN, TradeManager, default_trade_parameters
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    # No slippage: the effective price is the entry price.
+    monkeypatch.setattr("trading.random.uniform", lambda low, high: 0.0)
+    return TradeManager(default_trade_parameters())
+
+
+def test_on_prices_takes_profit_then_stops_out_the_moonbag(manager):
+    trade = manager.place_trade("MINT", 1.0, manager.trade_params)
+    position = manager.get_position(trade["position_id"])
+    assert manager.on_prices({"MINT": 1.0, "OTHER": 50.0}) == []
+
+    [take_profit] = manager.on_prices([("MINT", trade["target_price"])])
+    assert take_profit["reason"] == "take_profit"
+    assert position.state == MOONBAG and position.stop_price == position.effective_price
+
+    [moonbag_exit] = manager.on_prices({"MINT": position.effective_price * 0.99})
+    assert moonbag_exit["reason"] == "moonbag_exit"
+    assert position.state == CLOSED and manager.get_position(position.id) is None
+
+
+def test_on_prices_stops_out_only_the_crossed_positions(manager):
+    low = manager.place_trade("MINT", 1.0, manager.trade_params)
+    high = manager.place_trade("MINT", 2.0, manager.trade_params)
+    exits = manager.on_prices({"MINT": high["stop_price"]})
+    assert [(e["position_id"], e["reason"]) for e in exits] == [(high["position_id"], "stop_loss")]
+    assert manager.get_position(low["position_id"]).state == OPEN
+
+
+class _LockProbe(logging.Handler):
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+        self.held = []
+
+    def emit(self, record):
+        self.held.append(self.manager._lock._is_owned())
+
+
+def test_place_trade_logs_outside_the_book_lock(manager):
+    manager.risk_engine = RiskEngine(RiskLimits(max_open_positions=1))
+    probe = _LockProbe(manager)
+    logger = logging.getLogger()
+    logger.addHandler(probe)
+    level = logger.level
+    logger.setLevel(logging.INFO)
+    try:
+        assert manager.place_trade("MINT", 1.0, manager.trade_params)
+        assert manager.place_trade("MINT", 1.0, manager.trade_params) is None
+    finally:
+        logger.removeHandler(probe)
+        logger.setLevel(level)
+    assert probe.held and not any(probe.held)
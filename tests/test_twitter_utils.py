@@ -0,0 +1,51 @@
+import os
+import time
+
+import pytest
+
+import twitter_utils
+from twitter_utils import TwitterAPI, UserCache, is_valid_username
+
+
+@pytest.mark.parametrize("username, valid", [
+    ("solana", True), ("raydium_io", True), ("A" * 15, True), ("", False), ("A" * 16, False),
+    ("@solana", False), ("sol ana", False), ("sol,ana", False), (None, False),
+])
+def test_usernames_are_validated(username, valid):
+    assert is_valid_username(username) is valid
+
+
+def test_user_cache_is_anchored_to_the_module_directory():
+    if "TWITTER_USER_CACHE_PATH" in os.environ:
+        pytest.skip("cache path overridden")
+    assert twitter_utils.USER_CACHE_PATH == os.path.join(
+        os.path.dirname(os.path.abspath(twitter_utils.__file__)), ".cache", "twitter_users.json")
+
+
+def test_malformed_usernames_never_reach_the_lookup(tmp_path):
+    api = TwitterAPI.__new__(TwitterAPI)
+    batches = []
+
+    def lookup_users(chunk):
+        batches.append(chunk)
+        return {"data": [{"id": "1", "username": "Solana"}]}
+    api.lookup_users = lookup_users
+
+    results = api.validate_accounts_bulk(["solana", "bad,name", "x" * 20],
+                                         cache=UserCache(str(tmp_path / "users.json")))
+    assert batches == [["solana"]]
+    assert [(r["username"], r["valid"]) for r in results] == [
+        ("solana", True), ("bad,name", False), ("x" * 20, False)]
+    assert results[1]["error"] == "Invalid username"
+
+
+def test_cached_accounts_keep_their_original_timestamp(tmp_path):
+    api = TwitterAPI.__new__(TwitterAPI)
+    api.lookup_users = lambda chunk: {"data": [{"id": "2", "username": "Bonk"}]}
+    cache = UserCache(str(tmp_path / "users.json"))
+    cache.put_many([{"username": "solana", "id": "1", "valid": True}])
+    cache._entries["solana"]["fetched_at"] -= 3600
+
+    api.validate_accounts_bulk(["solana", "bonk"], cache=cache)
+    assert time.time() - cache._entries["solana"]["fetched_at"] >= 3600
+    assert time.time() - cache._entries["bonk"]["fetched_at"] < 60
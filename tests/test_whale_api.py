@@ -0,0 +1,47 @@
+import pytest
+
+import integrated_bot as bot
+from whale_store import WhaleEventStore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = WhaleEventStore(capacity=4)
+    monkeypatch.setattr(bot, "whale_store", store)
+    return store, bot.app.test_client()
+
+
+def test_since_returns_only_newer_events(client):
+    store, http = client
+    for amount in (100, 200, 300):
+        store.append("w", amount, "buy", timestamp=0)
+    page = http.get("/api/whale-activity?since=1").get_json()
+    assert [event["seq"] for event in page["activities"]] == [2, 3]
+    assert (page["cursor"], page["gap"]) == (3, False)
+    assert http.get("/api/whale-activity?since=3").get_json()["activities"] == []
+
+
+def test_a_cursor_older_than_the_buffer_reports_a_gap(client):
+    store, http = client
+    for amount in range(6):
+        store.append("w", amount, "sell", timestamp=0)
+    page = http.get("/api/whale-activity?since=1").get_json()
+    assert page["gap"] and page["oldest"] == 3
+    assert [event["seq"] for event in page["activities"]] == [3, 4, 5, 6]
+
+
+def test_limit_and_before_page_backwards(client):
+    store, http = client
+    for amount in range(4):
+        store.append("w", amount, "buy", timestamp=0)
+    page = http.get("/api/whale-activity?limit=2&before=4").get_json()
+    assert [event["seq"] for event in page["activities"]] == [2, 3]
+    assert len(http.get("/api/whale-activity?limit=1000").get_json()["activities"]) == 4
+
+
+def test_a_cursor_from_before_a_restart_comes_back_lower(client):
+    store, http = client
+    store.append("w", 1, "buy", timestamp=0)
+    page = http.get("/api/whale-activity?since=500").get_json()
+    assert page["activities"] == [] and page["cursor"] == 1 < 500
+    assert page["epoch"] == store.epoch
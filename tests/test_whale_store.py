@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from whale_store import BUY, WhaleEventStore
+
+
+def filled(capacity, count):
+    store = WhaleEventStore(capacity)
+    for i in range(1, count + 1):
+        store.append(f"w{i}", float(i), "buy" if i % 2 else "sell", timestamp=1000.0 + i)
+    return store
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        WhaleEventStore(0)
+
+
+def test_wraparound_keeps_the_newest_capacity_events():
+    store = filled(4, 10)
+    assert store.head == 10 and store.oldest == 7 and len(store) == 4
+    assert [event["seq"] for event in store.snapshot()] == [7, 8, 9, 10]
+    assert [event["wallet"] for event in store.snapshot()] == ["w7", "w8", "w9", "w10"]
+    assert store.get(6) is None and store.get(7)["amount"] == 7.0
+
+
+def test_since_reports_a_gap_after_wraparound():
+    store = filled(4, 10)
+    page = store.page(since=2)
+    assert page["gap"] is True
+    assert [event["seq"] for event in page["activities"]] == [7, 8, 9, 10]
+    assert store.page(since=10) == {"activities": [], "cursor": 10, "oldest": 7, "gap": False,
+                                    "epoch": store.epoch}
+
+
+def test_latest_pages_backwards():
+    store = filled(8, 8)
+    assert [event["seq"] for event in store.latest(3)] == [6, 7, 8]
+    assert [event["seq"] for event in store.latest(3, before=6)] == [3, 4, 5]
+
+
+def _start_append_without_publishing(store, wallet, amount):
+    # What a writer has done halfway through append(): the next slot is
+    # partly written and the head isn't published yet.
+    slot = (store.head + 1) % store._slots
+    store._wallets[slot] = wallet
+    store._amounts[slot] = amount
+
+
+def test_readers_never_see_the_slot_being_written():
+    # Regression: the in-flight slot used to belong to the oldest readable
+    # event, so a reader could return it half overwritten.
+    store = filled(4, 10)
+    _start_append_without_publishing(store, "torn", 999.0)
+    events = store.snapshot() + store.since(0) + [store.get(store.oldest)]
+    assert all(event["wallet"] == f"w{event['seq']}" for event in events)
+    assert all(event["amount"] == float(event["seq"]) for event in events)
+    assert "torn" not in store.net_flow(1e9, now=2000.0)
+
+
+def test_net_flow_sums_signed_amounts_inside_the_window():
+    store = WhaleEventStore(16)
+    store.append("a", 10.0, BUY, timestamp=100.0)
+    store.append("a", 4.0, "sell", timestamp=200.0)
+    store.append("b", 7.0, "buy", timestamp=250.0)
+    assert store.net_flow(60, now=260.0) == {"a": -4.0, "b": 7.0}
+    assert store.net_flow(1000, now=260.0) == {"a": 6.0, "b": 7.0}
+
+
+def test_page_json_is_cached_until_the_next_append():
+    store = filled(4, 3)
+    first = store.page_json(since=0)
+    assert store.page_json(since=0) is first
+    store.append("w4", 4.0, "buy")
+    assert json.loads(store.page_json(since=0))["cursor"] == 4
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+top_traders.py
+
+Shared cache for the Dexscreener top-traders endpoint used by the dashboards.
+
+  - Fresh entries (younger than `ttl`) are served straight from memory.
+  - Stale entries are still served immediately while one background thread
+    refreshes them (stale-while-revalidate).
+  - Concurrent misses are coalesced: only one upstream request is in flight,
+    every other caller waits for its result.
+  - The fallback dummy data is only used when the cache is cold and the
+    upstream call fails; after that the last good data is kept.
+  - A failed fetch is remembered for `error_ttl` seconds, during which no
+    new upstream call is made, so an outage isn't hammered once per request.
+"""
+
+import os
+import time
+import logging
+import threading
+
+from http_client import http
+
+# Hypothetical Dexscreener API endpoint for top traders
+DEXSCREENER_TOP_TRADERS_API_URL = "https://api.dexscreener.com/latest/traders"
+
+TOP_TRADERS_TTL = float(os.getenv("TOP_TRADERS_TTL", "30"))
+TOP_TRADERS_MAX_STALE = float(os.getenv("TOP_TRADERS_MAX_STALE", "600"))
+TOP_TRADERS_ERROR_TTL = float(os.getenv("TOP_TRADERS_ERROR_TTL", "5"))
+
+# Fallback dummy data if the API call fails on a cold cache.
+FALLBACK_TRADERS = [
+    {"wallet": "7Tz...dummy1", "volume": 1200},
+    {"wallet": "9Xf...dummy2", "volume": 950},
+    {"wallet": "3Ab...dummy3", "volume": 870}
+]
+
+
+def fetch_top_traders():
+    response = http.get(DEXSCREENER_TOP_TRADERS_API_URL)
+    response.raise_for_status()
+    data = response.json()
+    # Assuming the API returns a JSON object with a key "traders" containing a list.
+    traders = data.get("traders", [])
+    logging.info("Fetched top traders data from Dexscreener.")
+    return traders
+
+
+class StaleWhileRevalidateCache:
+    """Single-value TTL cache with request coalescing and background refresh."""
+
+    def __init__(self, fetch, ttl=TOP_TRADERS_TTL, max_stale=TOP_TRADERS_MAX_STALE,
+                 fallback=None, name="cache", error_ttl=TOP_TRADERS_ERROR_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.error_ttl = error_ttl
+        self.fallback = fallback
+        self.name = name
+        self._value = None
+        self._fetched_at = None
+        self._failed_at = None   # monotonic time of the last failed fetch
+        self._lock = threading.Lock()
+        self._inflight = None    # threading.Event while an upstream call runs
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "fallbacks": 0,
+            "negative_hits": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "refresh_ms_last": 0.0,
+            "refresh_ms_total": 0.0,
+        }
+
+    def get(self):
+        """Return the cached value, refreshing or fetching it as needed."""
+        with self._lock:
+            age = self._age()
+            if age is not None and age < self.ttl:
+                self._stats["hits"] += 1
+                return self._value
+            if age is not None and age < self.max_stale:
+                self._stats["stale_hits"] += 1
+                if self._inflight is None and not self._backing_off():
+                    self._start_refresh(background=True)
+                return self._value
+            if self._inflight is None and self._backing_off():
+                # The last fetch failed moments ago; don't call upstream again yet.
+                self._stats["negative_hits"] += 1
+                if self._value is not None:
+                    return self._value
+                self._stats["fallbacks"] += 1
+                return self.fallback
+            self._stats["misses"] += 1
+            if self._inflight is None:
+                inflight = self._start_refresh(background=False)
+                leader = True
+            else:
+                inflight = self._inflight
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if leader:
+            self._refresh(inflight)
+        else:
+            inflight.wait(timeout=15)
+
+        with self._lock:
+            if self._value is not None:
+                return self._value
+            self._stats["fallbacks"] += 1
+            return self.fallback
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            refreshes = stats.pop("refresh_ms_total")
+            stats["refresh_ms_avg"] = round(refreshes / stats["refreshes"], 3) if stats["refreshes"] else 0.0
+            stats["refresh_ms_last"] = round(stats["refresh_ms_last"], 3)
+            stats["age_seconds"] = self._age()
+            stats["ttl_seconds"] = self.ttl
+            stats["refreshing"] = self._inflight is not None
+            return stats
+
+    def _age(self):
+        return None if self._fetched_at is None else time.monotonic() - self._fetched_at
+
+    def _backing_off(self):
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.error_ttl
+
+    def _start_refresh(self, background):
+        # Must be called with self._lock held.
+        inflight = self._inflight = threading.Event()
+        if background:
+            threading.Thread(target=self._refresh, args=(inflight,),
+                             name=f"{self.name}-refresh", daemon=True).start()
+        return inflight
+
+    def _refresh(self, inflight):
+        started = time.perf_counter()
+        try:
+            value = self.fetch()
+        except Exception as e:
+            logging.error(f"Error refreshing {self.name}: {e}")
+            with self._lock:
+                self._failed_at = time.monotonic()
+                self._stats["refresh_failures"] += 1
+        else:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._value = value
+                self._fetched_at = time.monotonic()
+                self._failed_at = None
+                self._stats["refreshes"] += 1
+                self._stats["refresh_ms_last"] = elapsed_ms
+                self._stats["refresh_ms_total"] += elapsed_ms
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight.set()
+
+
+top_traders_cache = StaleWhileRevalidateCache(fetch_top_traders, fallback=FALLBACK_TRADERS,
+                                              name="top-traders")
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+topics.py
+
+Topic subscriptions on top of the Broadcaster.
+
+Each topic is a broadcaster room. Clients pick the topics they render, either
+when connecting (`io(url, {auth: {topics: [...]}})`) or later with a
+"subscribe" / "unsubscribe" message carrying `{"topics": [...]}`; "subscribe"
+also takes `"replace": true` to swap the whole set. A client that names no
+topics gets DEFAULT_TOPICS, which is everything the dashboards used to get.
+
+  tweets                    every tweet
+  tweets:signals            only tweets that would trigger a trade
+  tweets:author:<id>        tweets by one author
+  whales                    every whale event
+  whales:min:<sol>          whale events of at least <sol> SOL
+  fills                     trade entries and exits
+  prices                    latest price per token (merged per window)
+
+The server works out the matching topics before anything is serialized, so a
+client only ever receives (and pays for) the events it subscribed to.
+
+Every whale event is compared against each whales:min threshold that has a
+subscriber. A threshold is dropped when its last subscriber leaves or
+disconnects, and at most MAX_WHALE_THRESHOLDS distinct ones are held; a
+subscription to a new threshold beyond that is refused.
+"""
+
+import math
+import logging
+import threading
+
+from flask import request
+
+TWEETS = "tweets"
+TWEET_SIGNALS = "tweets:signals"
+TWEET_AUTHOR_PREFIX = "tweets:author:"
+WHALES = "whales"
+WHALE_MIN_PREFIX = "whales:min:"
+FILLS = "fills"
+PRICES = "prices"
+
+DEFAULT_TOPICS = (TWEETS, WHALES)
+MAX_TOPICS_PER_CLIENT = 50
+MAX_WHALE_THRESHOLDS = 64
+
+
+def normalize_topic(topic):
+    """Return the canonical form of a topic name, or None if it is not one."""
+    if not isinstance(topic, str):
+        return None
+    topic = topic.strip()
+    if topic in (TWEETS, TWEET_SIGNALS, WHALES, FILLS, PRICES):
+        return topic
+    if topic.startswith(TWEET_AUTHOR_PREFIX):
+        author = topic[len(TWEET_AUTHOR_PREFIX):]
+        return topic if author else None
+    if topic.startswith(WHALE_MIN_PREFIX):
+        try:
+            threshold = float(topic[len(WHALE_MIN_PREFIX):])
+        except ValueError:
+            return None
+        if not math.isfinite(threshold) or threshold < 0:
+            return None
+        # "whales:min:100" and "whales:min:100.0" share one room.
+        return f"{WHALE_MIN_PREFIX}{threshold:g}"
+    return None
+
+
+def tweet_topics(tweet):
+    """Topics a broadcast tweet payload belongs to."""
+    topics = [TWEETS, f"{TWEET_AUTHOR_PREFIX}{tweet.get('author')}"]
+    if (tweet.get("signals") or {}).get("should_trade"):
+        topics.append(TWEET_SIGNALS)
+    return topics
+
+
+class TopicRouter:
+    """Maps client subscriptions onto broadcaster rooms and routes events."""
+
+    def __init__(self, broadcaster, default_topics=DEFAULT_TOPICS):
+        self.broadcaster = broadcaster
+        self.default_topics = tuple(default_topics)
+        # threshold -> room, for every whales:min:<sol> room with a member
+        self._whale_thresholds = {}
+        # Serializes membership changes with the threshold bookkeeping.
+        self._lock = threading.Lock()
+
+    def attach(self):
+        """Register the socket handlers and start the broadcaster."""
+        socketio = self.broadcaster.socketio
+        socketio.on_event("connect", self._on_connect)
+        socketio.on_event("disconnect", self._on_disconnect)
+        socketio.on_event("subscribe", self._on_subscribe)
+        socketio.on_event("unsubscribe", self._on_unsubscribe)
+        return self.broadcaster.start()
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+    def _on_connect(self, auth=None):
+        self.connect(request.sid, auth.get("topics") if isinstance(auth, dict) else None)
+
+    def _on_disconnect(self, *args):
+        self.disconnect(request.sid)
+
+    def _on_subscribe(self, message):
+        message = message if isinstance(message, dict) else {}
+        topics = self.subscribe(request.sid, message.get("topics"), replace=bool(message.get("replace")))
+        return {"topics": topics}
+
+    def _on_unsubscribe(self, message):
+        message = message if isinstance(message, dict) else {}
+        return {"topics": self.unsubscribe(request.sid, message.get("topics"))}
+
+    def connect(self, sid, topics=None):
+        """Register a client with its topics (DEFAULT_TOPICS if it names none)."""
+        topics = self._parse(topics)
+        with self._lock:
+            admitted = [topic for topic in topics[:MAX_TOPICS_PER_CLIENT] if self._admit(topic)]
+            self.broadcaster.register(sid, admitted if topics else self.default_topics)
+
+    def disconnect(self, sid):
+        with self._lock:
+            topics = self.topics_of(sid)
+            self.broadcaster.unregister(sid)
+            self._release(topics)
+
+    def subscribe(self, sid, topics, replace=False):
+        """Add (or with replace=True, set) a client's topics. Returns its topics."""
+        topics = self._parse(topics)
+        with self._lock:
+            current = self.topics_of(sid)
+            dropped = ()
+            if replace:
+                dropped = current - set(topics)
+                for topic in dropped:
+                    self.broadcaster.leave(sid, topic)
+                current = current & set(topics)
+            for topic in topics:
+                if topic not in current and len(current) < MAX_TOPICS_PER_CLIENT and self._admit(topic):
+                    if self.broadcaster.join(sid, topic):
+                        current.add(topic)
+                    else:
+                        self._release((topic,))
+            self._release(dropped)
+        return sorted(current)
+
+    def unsubscribe(self, sid, topics):
+        topics = self._parse(topics)
+        with self._lock:
+            for topic in topics:
+                self.broadcaster.leave(sid, topic)
+            self._release(topics)
+        return sorted(self.topics_of(sid))
+
+    def topics_of(self, sid):
+        return self.broadcaster.rooms_of(sid)
+
+    def _parse(self, topics):
+        if isinstance(topics, str):
+            topics = [topics]
+        if not isinstance(topics, (list, tuple)):
+            return []
+        parsed = []
+        for topic in topics:
+            normalized = normalize_topic(topic)
+            if normalized is None:
+                logging.warning(f"Ignoring unknown topic: {topic!r}")
+            elif normalized not in parsed:
+                parsed.append(normalized)
+        return parsed
+
+    def _admit(self, topic):
+        """Start tracking a whale threshold topic about to be joined; False if full."""
+        if not topic.startswith(WHALE_MIN_PREFIX):
+            return True
+        threshold = float(topic[len(WHALE_MIN_PREFIX):])
+        if threshold not in self._whale_thresholds:
+            if len(self._whale_thresholds) >= MAX_WHALE_THRESHOLDS:
+                logging.warning(f"Refusing topic {topic}: {MAX_WHALE_THRESHOLDS} whale thresholds in use")
+                return False
+            self._whale_thresholds[threshold] = topic
+        return True
+
+    def _release(self, topics):
+        """Stop tracking whale thresholds whose room has no members left."""
+        for topic in topics:
+            if topic.startswith(WHALE_MIN_PREFIX) and not self.broadcaster.room_size(topic):
+                self._whale_thresholds.pop(float(topic[len(WHALE_MIN_PREFIX):]), None)
+
+    def whale_thresholds(self):
+        return sorted(self._whale_thresholds)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish_tweet(self, tweet):
+        self.broadcaster.publish("new_tweet", tweet, room=tweet_topics(tweet))
+
+    def publish_whale(self, event):
+        amount = event.get("amount") or 0
+        topics = [WHALES]
+        topics.extend(room for threshold, room in list(self._whale_thresholds.items())
+                      if amount >= threshold)
+        self.broadcaster.publish("new_whale_activity", event, room=topics)
+
+    def publish_fill(self, fill):
+        self.broadcaster.publish("trade_fill", fill, room=FILLS)
+
+    def publish_prices(self, ticks):
+        # Keyed per token, so a client gets only the newest price per frame.
+        for tick in ticks:
+            self.broadcaster.publish("price", tick.as_dict(), room=PRICES, key=("price", tick.token))
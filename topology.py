@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+topology.py
+
+Multi-process mode for the tweet-to-trade pipeline (BOT_TOPOLOGY=multiprocess).
+
+In the default single-process mode, Flask, Socket.IO, the stream reader and
+every pipeline stage share one interpreter, so CPU-bound parsing and
+sentiment scoring compete with web serving for the GIL. ProcessTopology
+splits that work across processes:
+
+  web (this process)    Flask, Socket.IO, the broadcaster and the stream
+                        reader. Tweets go to a shard; results come back on
+                        the relay queue and are broadcast from here.
+  shard-<n> (N procs)   parse -> score. Tweets are assigned by author, so one
+                        account's tweets stay in order on one shard.
+  decision (1 proc)     dedupe -> decide -> execute, plus the scalping engine.
+                        It is the only process holding a TradeManager and a
+                        SignalDeduplicator, so however many shards there are,
+                        a mint is bought once. Settings saved in the web
+                        process reach it as control messages on its queue.
+
+    stream -> shard queues -> shard-n -> decision queue -> decision
+                                 \\                            |
+                                  stats                 relay queue -> web
+
+The channels are bounded multiprocessing queues and events cross them in
+batches of up to 64, so pickling is paid per batch. A full shard queue drops
+its oldest tweet, like the in-process ingress stage; the stream reader never
+blocks. Workers build their stages from the same functions as the in-process
+pipeline (see ingest_stages() / decision_stages() in integrated_bot.py) and
+report their stage stats (and the decision process its positions) every
+STATS_INTERVAL seconds. Latency stamps are perf_counter values, which on Linux
+come from one system-wide monotonic clock, so segments stay comparable across
+processes.
+"""
+
+import os
+import time
+import zlib
+import queue
+import logging
+import threading
+import importlib
+import multiprocessing
+
+from pipeline import Pipeline, Stage
+
+INGEST_SHARDS = int(os.getenv("INGEST_SHARDS", str(max(1, (os.cpu_count() or 1) - 2))))
+SHARD_QUEUE_SIZE = int(os.getenv("SHARD_QUEUE_SIZE", "5000"))
+DECISION_QUEUE_SIZE = int(os.getenv("DECISION_QUEUE_SIZE", "1000"))
+RELAY_QUEUE_SIZE = int(os.getenv("RELAY_QUEUE_SIZE", "1000"))
+STATS_INTERVAL = float(os.getenv("TOPOLOGY_STATS_INTERVAL", "2"))
+
+IPC_BATCH_SIZE = 64
+_POLL_INTERVAL = 0.5
+
+# Relay message kinds (worker -> web)
+TWEETS = "tweets"
+FILL = "fill"
+PRICES = "prices"
+STATS = "stats"
+STOPPED = "stopped"
+
+# Control message kinds (web -> decision)
+SETTINGS = "settings"
+
+# Set in each worker before it imports the app, so the app knows its role.
+PROCESS_ROLE_ENV = "BOT_PROCESS_ROLE"
+DECISION_ROLE = "decision"
+
+
+def shard_for(key, shards):
+    """Stable shard index for an author id (the same in every process and run)."""
+    return zlib.crc32(str(key).encode()) % shards
+
+
+class RelayedTweet:
+    """The fields of a tweepy Tweet the pipeline uses, cheap to pickle."""
+
+    __slots__ = ("id", "text", "author_id", "created_at")
+
+    def __init__(self, id, text, author_id, created_at):
+        self.id = id
+        self.text = text
+        self.author_id = author_id
+        self.created_at = created_at
+
+    @classmethod
+    def from_tweet(cls, tweet):
+        return cls(tweet.id, tweet.text, getattr(tweet, "author_id", None),
+                   getattr(tweet, "created_at", None))
+
+
+def _offer(channel, item):
+    """Put without blocking, evicting the oldest item if full. Returns 1 if anything was dropped."""
+    try:
+        channel.put_nowait(item)
+        return 0
+    except queue.Full:
+        pass
+    try:
+        channel.get_nowait()
+    except queue.Empty:
+        pass
+    try:
+        channel.put_nowait(item)
+    except queue.Full:
+        pass
+    return 1
+
+
+def _depth(channel):
+    try:
+        return channel.qsize()
+    except NotImplementedError:   # macOS has no sem_getvalue
+        return None
+
+
+class ProcessTopology:
+    """
+    Starts and feeds the shard and decision processes, and relays their
+    output back into this process. submit() has the Pipeline.submit contract,
+    so it can stand in for the in-process pipeline as the stream's ingress.
+    """
+
+    def __init__(self, on_tweet, on_fill, on_prices=None, shards=INGEST_SHARDS,
+                 app_module="integrated_bot"):
+        if shards < 1:
+            raise ValueError("A process topology needs at least one shard")
+        self.on_tweet = on_tweet
+        self.on_fill = on_fill
+        self.on_prices = on_prices
+        self.shards = shards
+        self.app_module = app_module
+        # spawn, not fork: the web process already runs threads (and maybe
+        # an eventlet hub) that must not be duplicated into the workers.
+        self._context = multiprocessing.get_context("spawn")
+        self._shard_queues = [self._context.Queue(SHARD_QUEUE_SIZE) for _ in range(shards)]
+        self._decision_queue = self._context.Queue(DECISION_QUEUE_SIZE)
+        self._relay_queue = self._context.Queue(RELAY_QUEUE_SIZE)
+        self._processes = {}
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._relay_thread = None
+        self.submitted = 0
+        self.dropped = 0
+        self.relay_errors = 0
+        self.worker_stats = {}   # role -> last stats report
+        self._pending_settings = None   # newest settings not yet on the decision queue
+
+    def start(self):
+        if self._running.is_set():
+            return self
+        parent = os.getpid()
+        for index, inbox in enumerate(self._shard_queues):
+            self._spawn(f"shard-{index}", _shard_main,
+                        (self.app_module, inbox, self._decision_queue, self._relay_queue, parent))
+        self._spawn(DECISION_ROLE, _decision_main,
+                    (self.app_module, self._decision_queue, self._relay_queue, parent))
+        self._running.set()
+        self._relay_thread = threading.Thread(target=self._relay, name="topology-relay", daemon=True)
+        self._relay_thread.start()
+        logging.info(f"Process topology started: {self.shards} ingest shard(s) and a decision process")
+        return self
+
+    def _spawn(self, role, target, args):
+        process = self._context.Process(target=target, args=(role,) + args,
+                                        name=f"bot-{role}", daemon=True)
+        process.start()
+        self._processes[role] = process
+
+    def stop(self, timeout=5.0):
+        """Ask every worker to finish what it has queued and exit."""
+        self._running.clear()
+        for inbox in self._shard_queues:
+            inbox.put(None)
+        deadline = time.monotonic() + timeout
+        for role, process in self._processes.items():
+            if role == DECISION_ROLE:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+        # The shards are done, so nothing more will reach the decision queue.
+        self._decision_queue.put(None)
+        for process in self._processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        if self._relay_thread is not None:
+            self._relay_thread.join(max(0.0, deadline - time.monotonic()))
+
+    def update_settings(self, settings):
+        """
+        Hand new settings to the decision process (see apply_settings in the
+        app). Never blocks: if its queue is full, the newest settings are kept
+        and retried from the relay thread until they fit, replacing any older
+        ones still waiting.
+        """
+        with self._lock:
+            self._pending_settings = dict(settings)
+        self._send_settings()
+
+    def _send_settings(self):
+        with self._lock:
+            settings = self._pending_settings
+            if settings is None:
+                return
+            try:
+                self._decision_queue.put_nowait((SETTINGS, settings))
+            except queue.Full:
+                return
+            self._pending_settings = None
+
+    # ------------------------------------------------------------------
+    # Ingress (stream reader thread)
+    # ------------------------------------------------------------------
+    def submit(self, event):
+        tweet = RelayedTweet.from_tweet(event["tweet"])
+        message = {"tweet": tweet, "received_at": event["received_at"], "stamps": event["stamps"]}
+        dropped = _offer(self._shard_queues[shard_for(tweet.author_id, self.shards)], message)
+        with self._lock:
+            self.submitted += 1
+            if dropped:
+                self.dropped += dropped
+                if self.dropped % 100 == 1:
+                    logging.warning(f"Ingest shards are dropping tweets ({self.dropped} dropped so far)")
+        return dropped == 0
+
+    # ------------------------------------------------------------------
+    # Relay (worker output -> this process)
+    # ------------------------------------------------------------------
+    def _relay(self):
+        decision = self._processes[DECISION_ROLE]
+        while True:
+            if self._pending_settings is not None:
+                self._send_settings()
+            try:
+                kind, *payload = self._relay_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if not self._running.is_set() and not decision.is_alive():
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            if kind == STOPPED:
+                return
+            try:
+                if kind == TWEETS:
+                    for event in payload[0]:
+                        self.on_tweet(event)
+                elif kind == FILL:
+                    self.on_fill(payload[0])
+                elif kind == PRICES:
+                    if self.on_prices is not None:
+                        self.on_prices(payload[0])
+                elif kind == STATS:
+                    role, stats = payload
+                    self.worker_stats[role] = dict(stats, reported_at=time.time())
+            except Exception as e:
+                self.relay_errors += 1
+                logging.error(f"Topology relay failed on a '{kind}' message: {e}")
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def decision_snapshot(self):
+        """Last positions report from the decision process (it owns the book)."""
+        return self.worker_stats.get(DECISION_ROLE, {})
+
+    def stats(self):
+        with self._lock:
+            ingress = {"submitted": self.submitted, "dropped": self.dropped}
+        return {
+            "mode": "multiprocess",
+            "shards": self.shards,
+            "ingress": dict(ingress, depths=[_depth(inbox) for inbox in self._shard_queues]),
+            "decision_depth": _depth(self._decision_queue),
+            "relay_depth": _depth(self._relay_queue),
+            "relay_errors": self.relay_errors,
+            "processes": {
+                role: {"pid": process.pid, "alive": process.is_alive()}
+                for role, process in self._processes.items()
+            },
+            "workers": {
+                role: {key: value for key, value in stats.items() if key not in ("positions", "prices")}
+                for role, stats in list(self.worker_stats.items())
+            },
+        }
+
+
+# ----------------------------------------------------------------------
+# Worker processes
+# ----------------------------------------------------------------------
+class _RelayPublisher:
+    """
+    Stands in for the TopicRouter in the decision process. Fills are never
+    dropped. Price ticks never block the caller (the price feed, whose ticks
+    also drive exits): while the relay is full they are merged into the
+    newest tick per token and go out with the next batch that fits.
+    """
+
+    def __init__(self, relay):
+        self.relay = relay
+        self._pending_prices = {}    # token -> newest tick not yet relayed
+        self._lock = threading.Lock()
+        self.prices_coalesced = 0
+
+    def publish_fill(self, fill):
+        self.relay.put((FILL, fill))
+
+    def publish_prices(self, ticks):
+        with self._lock:
+            pending = self._pending_prices
+            for tick in ticks:
+                if tick.token in pending:
+                    self.prices_coalesced += 1
+                pending[tick.token] = tick
+            try:
+                self.relay.put_nowait((PRICES, list(pending.values())))
+            except queue.Full:
+                return
+            self._pending_prices = {}
+
+    def stats(self):
+        with self._lock:
+            return {"prices_pending": len(self._pending_prices),
+                    "prices_coalesced": self.prices_coalesced}
+
+
+def _forward_stage(channel, kind=None):
+    """A last stage that ships each batch to another process in one message."""
+    def forward(events):
+        for event in events:
+            event.pop("trade_manager", None)
+        channel.put(events if kind is None else (kind, events))
+        return []
+    return forward
+
+
+def _feed(role, inbox, pipeline, parent, prepare=None, batches=False, control=None):
+    """
+    Move items from an inter-process queue into this process's pipeline.
+    (kind, payload) tuples are control messages for `control` instead.
+    """
+    while True:
+        try:
+            item = inbox.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            if os.getppid() != parent:
+                logging.warning(f"[{role}] Web process is gone, exiting")
+                return
+            continue
+        if item is None:
+            return
+        if isinstance(item, tuple):
+            try:
+                control(item)
+            except Exception as e:
+                logging.error(f"[{role}] Control message {item[0]} failed: {e}")
+            continue
+        for event in item if batches else (item,):
+            if prepare is not None:
+                prepare(event)
+            pipeline.submit(event)
+
+
+def _report(role, relay, collect):
+    while True:
+        time.sleep(STATS_INTERVAL)
+        try:
+            relay.put((STATS, role, dict(collect(), pid=os.getpid())))
+        except Exception as e:
+            logging.error(f"[{role}] Stats report failed: {e}")
+
+
+def _start_reporting(role, relay, collect):
+    threading.Thread(target=_report, args=(role, relay, collect),
+                     name=f"{role}-stats", daemon=True).start()
+
+
+def _shard_main(role, app_module, inbox, decision, relay, parent):
+    os.environ[PROCESS_ROLE_ENV] = role
+    bot = importlib.import_module(app_module)
+    bot.sentiment_scorer.warm_up()
+    pipeline = Pipeline(bot.ingest_stages(SHARD_QUEUE_SIZE) + [
+        Stage("forward", _forward_stage(decision), batch_size=IPC_BATCH_SIZE),
+    ]).start()
+    _start_reporting(role, relay, lambda: {"stages": pipeline.stats()})
+    _feed(role, inbox, pipeline, parent)
+    pipeline.join(timeout=5.0)
+    pipeline.stop()
+
+
+def _decision_main(role, app_module, inbox, relay, parent):
+    os.environ[PROCESS_ROLE_ENV] = DECISION_ROLE
+    bot = importlib.import_module(app_module)
+    # Fills go back to the web process rather than into a local broadcaster.
+    publisher = bot.topic_router = _RelayPublisher(relay)
+    trade_manager = bot.trade_manager
+    pipeline = Pipeline(bot.decision_stages() + [
+        Stage("forward", _forward_stage(relay, TWEETS), batch_size=IPC_BATCH_SIZE),
+    ]).start()
+
+    def collect():
+        return {
+            "stages": pipeline.stats(),
+            "dedup": bot.signal_deduplicator.stats(),
+            "summary": trade_manager.summary(),
+            "positions": [position.as_dict() for position in trade_manager.open_positions()],
+            "scalping": bot.scalping_engine.stats(),
+            "prices": bot.price_cache.snapshot(),
+            "journal": bot.trade_journal.stats() if bot.trade_journal else None,
+            "risk": bot.risk_engine.stats(),
+            "relay": publisher.stats(),
+        }
+
+    def prepare(event):
+        event["trade_manager"] = trade_manager
+
+    def control(message):
+        kind, payload = message
+        if kind == SETTINGS:
+            bot.apply_settings(payload)
+
+    _start_reporting(role, relay, collect)
+    bot.start_trading_tasks()
+    _feed(role, inbox, pipeline, parent, prepare=prepare, batches=True, control=control)
+    pipeline.join(timeout=5.0)
+    pipeline.stop()
+    if bot.trade_journal is not None:
+        bot.trade_journal.commit()
+    relay.put((STOPPED, role))
+    # Let the queue's feeder thread flush the last results before exiting.
+    relay.close()
+    relay.join_thread()
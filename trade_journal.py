@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+trade_journal.py
+
+Append-only journal of every position entry (the order and its fill) and
+every exit, so the TradeManager's book survives a crash or restart.
+
+Records are fixed-size (136 bytes) little-endian structs, each with a CRC32,
+appended to a memory-mapped file that grows in chunks. Appending is a
+struct pack and a copy into the map under a lock - no syscall - so the trade
+path never waits on the disk. A background thread group-commits: it waits
+`commit_interval` after the first unflushed record, then msyncs every record
+written since the last commit in one call. commit() forces that from any
+thread; close() does it before unmapping. The same thread extends the file
+while there is still room left, so the trade path normally never waits for
+the map to grow either.
+
+After each commit the header records how many records are on disk, and is
+msynced right away. On open
+only the records past that count are checked: the journal ends at the first
+empty slot, or at a record whose CRC does not match (a torn write from a
+crash), which is cleared so new records follow the last good one.
+TradeManager.recover(journal) replays the records into an empty book.
+
+    python trade_journal.py stats data/trade_journal.bin
+    python trade_journal.py export data/trade_journal.bin trades.csv
+    python trade_journal.py export data/trade_journal.bin trades.parquet   # needs pyarrow
+"""
+
+import os
+import sys
+import csv
+import mmap
+import time
+import zlib
+import struct
+import logging
+import argparse
+import threading
+
+from trading import OPEN, MOONBAG, CLOSED
+
+TRADE_JOURNAL_PATH = os.getenv("TRADE_JOURNAL_PATH", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "trade_journal.bin"))
+JOURNAL_COMMIT_INTERVAL = float(os.getenv("JOURNAL_COMMIT_INTERVAL_MS", "5")) / 1000
+
+ENTRY = "entry"
+EXIT = "exit"
+
+_MAGIC = b"TJRN0001"
+_HEADER_SIZE = 64
+_HEADER = struct.Struct("<8sHxxxxxxQ")    # magic, record size, records committed
+# kind, reason, state, (pad), position_id, ts, price, effective_price, tokens,
+# remaining, target_price, stop_price, moonbag_ratio, amount, token; then a
+# CRC32 of all of that.
+_BODY = struct.Struct("<BBBxQ9d48s")
+_CRC = struct.Struct("<I")
+_RECORD_SIZE = _BODY.size + _CRC.size      # 136 bytes
+_RECORD = struct.Struct(_BODY.format + "I")   # for reading: the body fields, then the CRC
+_GROW_RECORDS = 8192                       # ~1 MiB per growth step
+_GROW_AHEAD = _GROW_RECORDS // 4           # the flusher grows once fewer slots are free
+
+_ENTRY_CODE = 1
+_EXIT_CODE = 2
+_REASONS = {"": 0, "take_profit": 1, "stop_loss": 2, "moonbag_exit": 3,
+            "scalp_exit": 4, "manual_exit": 5}
+_STATES = {OPEN: 1, MOONBAG: 2, CLOSED: 3}
+_KIND_NAMES = {_ENTRY_CODE: ENTRY, _EXIT_CODE: EXIT}
+_REASON_NAMES = {code: name for name, code in _REASONS.items()}
+_STATE_NAMES = {code: name for name, code in _STATES.items()}
+
+FIELDS = ("kind", "reason", "state", "position_id", "ts", "price", "effective_price",
+          "tokens", "remaining", "target_price", "stop_price", "moonbag_ratio",
+          "amount", "token")
+
+
+class JournalRecord:
+    """
+    One decoded record. For an entry, `price` is the quote, `tokens` what was
+    bought and `amount` the SOL spent; for an exit, `price` is the sale price,
+    `tokens` what was sold, `amount` the proceeds, and `remaining`,
+    `stop_price` and `state` are the position's after the exit.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, kind, reason, state, position_id, ts, price, effective_price, tokens,
+                 remaining, target_price, stop_price, moonbag_ratio, amount, token):
+        self.kind = kind
+        self.reason = reason
+        self.state = state
+        self.position_id = position_id
+        self.ts = ts
+        self.price = price
+        self.effective_price = effective_price
+        self.tokens = tokens
+        self.remaining = remaining
+        self.target_price = target_price
+        self.stop_price = stop_price
+        self.moonbag_ratio = moonbag_ratio
+        self.amount = amount
+        self.token = token
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+def _decode(fields):
+    (kind, reason, state, position_id, ts, price, effective_price, tokens, remaining,
+     target_price, stop_price, moonbag_ratio, amount, token) = fields
+    return JournalRecord(_KIND_NAMES[kind], _REASON_NAMES.get(reason, "other"),
+                         _STATE_NAMES[state], position_id, ts, price, effective_price, tokens,
+                         remaining, target_price, stop_price, moonbag_ratio, amount,
+                         token.rstrip(b"\0").decode())
+
+
+class TradeJournal:
+    def __init__(self, path=TRADE_JOURNAL_PATH, commit_interval=JOURNAL_COMMIT_INTERVAL):
+        self.path = path
+        self.commit_interval = commit_interval
+        self._lock = threading.Lock()          # appends
+        self._flush_lock = threading.Lock()    # msync and remapping
+        self._dirty = threading.Event()
+        self._closed = False
+        self.count = 0                         # records written
+        self.committed = 0                     # records known to be on disk
+        self.commits = 0
+        self.commit_ms_last = 0.0
+        self.recovered_torn = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _HEADER_SIZE:
+            self._file.truncate(_HEADER_SIZE + _GROW_RECORDS * _RECORD_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if size < _HEADER_SIZE:
+            _HEADER.pack_into(self._map, 0, _MAGIC, _RECORD_SIZE, 0)
+        magic, record_size, committed = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or record_size != _RECORD_SIZE:
+            raise ValueError(f"{path} is not a trade journal of this version")
+        self.capacity = (len(self._map) - _HEADER_SIZE) // _RECORD_SIZE
+        self.count = self.committed = self._scan(committed)
+
+        self._thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Writing (trade path)
+    # ------------------------------------------------------------------
+    def record_entry(self, position):
+        self._append(_BODY.pack(
+            _ENTRY_CODE, 0, _STATES[position.state], position.id, position.opened_at,
+            position.entry_price, position.effective_price, position.tokens, position.remaining,
+            position.target_price, position.stop_price, position.moonbag_ratio, position.cost,
+            position.token.encode()[:48]))
+
+    def record_exit(self, position, event):
+        self._append(_BODY.pack(
+            _EXIT_CODE, _REASONS.get(event["reason"], 255), _STATES[position.state], position.id,
+            time.time(), event["price"], position.effective_price, event["tokens_sold"],
+            position.remaining, position.target_price, position.stop_price,
+            position.moonbag_ratio, event["proceeds"], position.token.encode()[:48]))
+
+    def _append(self, body):
+        record = body + _CRC.pack(zlib.crc32(body))
+        with self._lock:
+            if self._closed:
+                raise ValueError("Trade journal is closed")
+            if self.count == self.capacity:
+                self._grow()
+            offset = _HEADER_SIZE + self.count * _RECORD_SIZE
+            self._map[offset:offset + _RECORD_SIZE] = record
+            self.count += 1
+        if not self._dirty.is_set():
+            self._dirty.set()
+
+    def _grow(self):
+        # Called with self._lock held; waits out any msync in progress.
+        # Written pages stay in the page cache across the remap, so there is
+        # nothing to flush first.
+        with self._flush_lock:
+            size = _HEADER_SIZE + (self.capacity + _GROW_RECORDS) * _RECORD_SIZE
+            try:
+                self._map.resize(size)      # mremap where the platform has it
+            except (SystemError, OSError):
+                self._map.close()
+                self._file.truncate(size)
+                self._map = mmap.mmap(self._file.fileno(), 0)
+            self.capacity += _GROW_RECORDS
+
+    def _grow_ahead(self):
+        if self.capacity - self.count >= _GROW_AHEAD:
+            return
+        with self._lock:
+            if not self._closed and self.capacity - self.count < _GROW_AHEAD:
+                self._grow()
+
+    # ------------------------------------------------------------------
+    # Group commit
+    # ------------------------------------------------------------------
+    def commit(self):
+        """msync every record written so far. Returns the number now on disk."""
+        with self._lock:
+            start, end = self.committed, self.count
+        if end == start:
+            return end
+        started = time.perf_counter()
+        with self._flush_lock:
+            if not self._closed:
+                first = _HEADER_SIZE + start * _RECORD_SIZE
+                aligned = first - first % mmap.PAGESIZE
+                self._map.flush(aligned, _HEADER_SIZE + end * _RECORD_SIZE - aligned)
+                # Only now may the header vouch for them. Until it is on disk
+                # too, reopening just checks their CRCs.
+                _HEADER.pack_into(self._map, 0, _MAGIC, _RECORD_SIZE, end)
+                self._map.flush(0, mmap.PAGESIZE)
+            self.committed = max(self.committed, end)
+        self.commits += 1
+        self.commit_ms_last = (time.perf_counter() - started) * 1000
+        return end
+
+    def _run(self):
+        while not self._closed:
+            self._dirty.wait()
+            if self._closed:
+                return
+            # Let a burst of trades land, then make them all durable at once.
+            time.sleep(self.commit_interval)
+            self._dirty.clear()
+            try:
+                self.commit()
+                self._grow_ahead()
+            except Exception as e:
+                logging.error(f"Trade journal commit failed: {e}")
+
+    def close(self):
+        self.commit()
+        with self._lock, self._flush_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._map.flush(0, mmap.PAGESIZE)
+            self._map.close()
+            self._file.close()
+        self._dirty.set()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def _scan(self, committed):
+        """
+        Number of valid records. The first `committed` were on disk when the
+        header said so; past them, stop at the first empty slot, or at a torn
+        record (CRC mismatch), which is cleared along with anything after it.
+        """
+        view = memoryview(self._map)
+        try:
+            for index in range(min(committed, self.capacity), self.capacity):
+                offset = _HEADER_SIZE + index * _RECORD_SIZE
+                if view[offset] == 0:
+                    return index
+                crc_offset = offset + _BODY.size
+                if zlib.crc32(view[offset:crc_offset]) != _CRC.unpack_from(view, crc_offset)[0]:
+                    logging.warning(f"Trade journal {self.path}: record {index} is torn; "
+                                    f"discarding it and anything after it")
+                    self.recovered_torn += 1
+                    end = _HEADER_SIZE + self.capacity * _RECORD_SIZE
+                    view[offset:end] = bytes(end - offset)
+                    return index
+            return self.capacity
+        finally:
+            view.release()
+
+    def records(self):
+        """Decoded records in write order."""
+        with self._lock:
+            raw = self._map[_HEADER_SIZE:_HEADER_SIZE + self.count * _RECORD_SIZE]
+        return [_decode(fields[:-1]) for fields in _RECORD.iter_unpack(raw)]
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "records": self.count,
+            "committed": self.committed,
+            "capacity": self.capacity,
+            "commits": self.commits,
+            "commit_ms_last": round(self.commit_ms_last, 3),
+            "torn_records_discarded": self.recovered_torn,
+        }
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def export_csv(self, path):
+        records = self.records()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for record in records:
+                writer.writerow([getattr(record, field) for field in FIELDS])
+        return len(records)
+
+    def export_parquet(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Exporting to Parquet needs pyarrow (pip install pyarrow)")
+        records = self.records()
+        columns = {field: [getattr(record, field) for record in records] for field in FIELDS}
+        pq.write_table(pa.table(columns), path)
+        return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or export the trade journal.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("stats", help="record counts and recovery time")
+    stats.add_argument("journal", nargs="?", default=TRADE_JOURNAL_PATH)
+    export = commands.add_parser("export", help="write the journal as .csv or .parquet")
+    export.add_argument("journal")
+    export.add_argument("path")
+    args = parser.parse_args(argv)
+
+    journal = TradeJournal(args.journal)
+    try:
+        if args.command == "export":
+            export = journal.export_parquet if args.path.endswith(".parquet") else journal.export_csv
+            print(f"Wrote {export(args.path)} records to {args.path}")
+            return 0
+        from trading import TradeManager
+        started = time.perf_counter()
+        manager = TradeManager()
+        manager.recover(journal)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(dict(journal.stats(), recovery_ms=round(elapsed_ms, 3), **manager.summary()))
+        return 0
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
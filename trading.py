@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+trading.py
+
+Trade simulation module (integrated with Raydium) and the long-lived
+TradeManager that owns the in-memory position book.
+
+Open positions are compact __slots__ records indexed by token mint. Each
+mint keeps the lowest take-profit price and the highest stop price of its
+open positions, so a price tick that crosses neither threshold is rejected
+in O(1) without looking at individual positions. on_prices() applies a whole
+batch of ticks in one pass over the book.
+
+With a journal attached (see trade_journal.py and TradeManager.recover)
+every entry and exit is appended to it under the book's lock, so the journal
+holds them in the order they happened. With a risk engine attached (see
+risk_engine.py) every order is checked before it is placed, under the same
+lock, and the engine's aggregates follow every entry and exit.
+"""
+
+import time
+import random
+import logging
+import threading
+from itertools import count
+
+from risk_engine import APPROVE as RISK_APPROVE
+
+# Position states
+OPEN = "open"
+MOONBAG = "moonbag"
+CLOSED = "closed"
+
+
+class TradeParameters:
+    def __init__(self, trade_amount, slippage_tolerance, take_profit_multiplier,
+                 moonbag_percentage, priority_fee, stop_loss_percent=5,
+                 max_risk_percent=2, risk_reward_ratio=3):
+        self.trade_amount = trade_amount                # e.g., 0.5 SOL (0.1 to 1 SOL range)
+        self.slippage_tolerance = slippage_tolerance      # e.g., (15, 25) %
+        self.take_profit_multiplier = take_profit_multiplier  # e.g., 10x
+        self.moonbag_percentage = moonbag_percentage      # e.g., 15%
+        self.priority_fee = priority_fee                  # e.g., 0.01 SOL
+        # New risk management parameters
+        self.stop_loss_percent = stop_loss_percent
+        self.max_risk_percent = max_risk_percent
+        self.risk_reward_ratio = risk_reward_ratio
+
+
+def default_trade_parameters():
+    """The parameters the bot has always traded with."""
+    return TradeParameters(
+        trade_amount=0.5,              # between 0.1 and 1 SOL
+        slippage_tolerance=(15, 25),   # 15-25% slippage
+        take_profit_multiplier=10,     # 10x target
+        moonbag_percentage=15,         # keep 15% as moonbag
+        priority_fee=0.01              # example priority fee in SOL
+    )
+
+
+class TradeOrder:
+    def __init__(self, token_symbol, entry_price, trade_params: TradeParameters):
+        self.token_symbol = token_symbol
+        self.entry_price = entry_price
+        self.trade_params = trade_params
+        self.target_price = entry_price * trade_params.take_profit_multiplier
+
+    def fill(self):
+        """Draw a simulated fill: (tokens acquired, effective price, applied slippage)."""
+        applied_slippage = random.uniform(*self.trade_params.slippage_tolerance)
+        effective_price = self.entry_price * (1 + applied_slippage / 100)
+        tokens_acquired = self.trade_params.trade_amount / effective_price
+        return tokens_acquired, effective_price, applied_slippage
+
+    def simulate_trade_execution(self):
+        tokens_acquired, effective_price, applied_slippage = self.fill()
+        logging.info(f"[{self.token_symbol}] Trade executed at effective price {effective_price:.4f} SOL "
+                     f"(entry {self.entry_price:.4f} SOL, slippage: {applied_slippage:.2f}%). "
+                     f"Tokens acquired: {tokens_acquired:.4f}")
+        return tokens_acquired, effective_price, applied_slippage
+
+
+class Position:
+    """One position in the book. Prices are in SOL per token."""
+
+    __slots__ = ("id", "token", "entry_price", "effective_price", "tokens",
+                 "remaining", "target_price", "stop_price", "moonbag_ratio",
+                 "cost", "proceeds", "state", "opened_at", "closed_at")
+
+    def __init__(self, id, token, entry_price, effective_price, tokens, target_price,
+                 stop_price, moonbag_ratio, cost, opened_at):
+        self.id = id
+        self.token = token
+        self.entry_price = entry_price
+        self.effective_price = effective_price
+        self.tokens = tokens
+        self.remaining = tokens
+        self.target_price = target_price
+        self.stop_price = stop_price
+        self.moonbag_ratio = moonbag_ratio
+        self.cost = cost
+        self.proceeds = 0.0
+        self.state = OPEN
+        self.opened_at = opened_at
+        self.closed_at = None
+
+    @property
+    def realized_pnl(self):
+        return self.proceeds - self.cost if self.state == CLOSED else None
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class _MintBook:
+    """Open positions for one mint plus the thresholds that can trigger them."""
+
+    __slots__ = ("positions", "min_target", "max_stop")
+
+    def __init__(self):
+        self.positions = []
+        self.min_target = float("inf")
+        self.max_stop = float("-inf")
+
+    def refresh(self):
+        self.min_target = float("inf")
+        self.max_stop = float("-inf")
+        for position in self.positions:
+            if position.state == OPEN and position.target_price < self.min_target:
+                self.min_target = position.target_price
+            if position.stop_price > self.max_stop:
+                self.max_stop = position.stop_price
+
+
+def simulated_quote(token):
+    """Placeholder quote used until a real price source is wired in."""
+    return 1.0 * random.uniform(0.95, 1.05)
+
+
+class TradeManager:
+    """
+    Long-lived trade manager that owns the position book.
+
+    price_source(token) -> price|None is used by execute_trade() to find an
+    entry price when the signals don't carry one. journal, if given, gets
+    record_entry(position) and record_exit(position, event) calls.
+    risk_engine, if given, approves every order (place_trade() returns None
+    for a rejected one).
+    """
+
+    def __init__(self, trade_params: TradeParameters = None, price_source=simulated_quote,
+                 journal=None, risk_engine=None):
+        self.trade_params = trade_params or default_trade_parameters()
+        self.price_source = price_source
+        self.journal = journal
+        self.risk_engine = risk_engine
+        self._book = {}          # token -> _MintBook (open and moonbag positions)
+        self._positions = {}     # position id -> live Position
+        self._closed_count = 0
+        self._realized_pnl = 0.0
+        self._ids = count(1)
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+    def execute_trade(self, signals, trade_params: TradeParameters = None):
+        """Open a position from parsed tweet signals. Returns trade details or None."""
+        token = signals.get('token_address') or signals.get('token_symbol')
+        if not token:
+            logging.warning("Trade signal without a token address or symbol, skipping.")
+            return None
+        entry_price = signals.get('price') or self.price_source(token)
+        if not entry_price:
+            logging.warning(f"[{token}] No price available, skipping trade.")
+            return None
+        return self.place_trade(token, entry_price, trade_params or self.trade_params)
+
+    def place_trade(self, token_symbol, entry_price, trade_params: TradeParameters):
+        with self._lock:
+            # Checked and booked under one lock, so concurrent orders can't
+            # both fit under a limit that only one of them fits under.
+            verdict = RISK_APPROVE
+            if self.risk_engine is not None:
+                verdict = self.risk_engine.check(token_symbol, trade_params)
+            trade_details = None
+            if verdict == RISK_APPROVE:
+                trade_details = self._place_trade(token_symbol, entry_price, trade_params)
+        # Logged after releasing the lock, so price ticks never wait on it.
+        if trade_details is None:
+            logging.info(f"[{token_symbol}] Trade rejected by risk engine: {verdict}")
+            return None
+        logging.info(f"Placed trade for {token_symbol}: Entry price = {entry_price} SOL, "
+                     f"Trade amount = {trade_params.trade_amount} SOL, Priority fee = {trade_params.priority_fee} SOL.")
+        logging.info(f"[{token_symbol}] Trade executed at effective price {trade_details['effective_price']:.4f} SOL "
+                     f"(entry {entry_price:.4f} SOL, slippage: {trade_details['applied_slippage']:.2f}%). "
+                     f"Tokens acquired: {trade_details['tokens_acquired']:.4f}")
+        logging.info(f"Trade details: {trade_details}")
+        return trade_details
+
+    def _place_trade(self, token_symbol, entry_price, trade_params):
+        order = TradeOrder(token_symbol, entry_price, trade_params)
+        tokens_acquired, effective_price, applied_slippage = order.fill()
+        filled_at = time.time()
+        position = Position(
+            id=next(self._ids),
+            token=token_symbol,
+            entry_price=entry_price,
+            effective_price=effective_price,
+            tokens=tokens_acquired,
+            target_price=order.target_price,
+            stop_price=effective_price * (1 - trade_params.stop_loss_percent / 100),
+            moonbag_ratio=trade_params.moonbag_percentage / 100,
+            cost=trade_params.trade_amount + trade_params.priority_fee,
+            opened_at=filled_at
+        )
+        self._add_position(position)
+        trade_details = {
+            "position_id": position.id,
+            "token": token_symbol,
+            "entry_price": entry_price,
+            "effective_price": effective_price,
+            "tokens_acquired": tokens_acquired,
+            "applied_slippage": applied_slippage,
+            "target_price": order.target_price,
+            "stop_price": position.stop_price,
+            "trade_amount": trade_params.trade_amount,
+            "priority_fee": trade_params.priority_fee,
+            "moonbag_percentage": trade_params.moonbag_percentage,
+            "filled_at": filled_at
+        }
+        return trade_details
+
+    # ------------------------------------------------------------------
+    # Exits
+    # ------------------------------------------------------------------
+    def on_price(self, token, price):
+        """Apply one price tick to every open position in token. Returns exit events."""
+        with self._lock:
+            return self._apply_price(token, price)
+
+    def on_prices(self, batch):
+        """
+        Apply a batch of price ticks ({token: price} or (token, price) pairs) in
+        one pass. Tokens with no open positions, or whose price crosses neither
+        the lowest take-profit nor the highest stop, cost a dict lookup and two
+        comparisons. Returns all exit events.
+
+        This is deliberately not a NumPy pass over price/threshold arrays: the
+        per-mint thresholds already reject almost every tick before any
+        position is looked at, ticks arrive as small per-window batches of
+        distinct mints, and the book changes on every entry and exit, so
+        keeping parallel arrays in sync would cost more than the check.
+        """
+        items = batch.items() if isinstance(batch, dict) else batch
+        exits = []
+        with self._lock:
+            book = self._book
+            for token, price in items:
+                mint_book = book.get(token)
+                if mint_book is None:
+                    continue
+                if price < mint_book.min_target and price > mint_book.max_stop:
+                    continue
+                exits.extend(self._apply_price(token, price))
+        return exits
+
+    def monitor_trade(self, trade_details, current_price):
+        target_price = trade_details["target_price"]
+        token = trade_details["token"]
+        exits = [event for event in self.on_price(token, current_price)
+                 if event["position_id"] == trade_details.get("position_id")]
+        take_profit = next((event for event in exits if event["reason"] == "take_profit"), None)
+        if take_profit:
+            return {
+                "take_profit_executed": True,
+                "tokens_sold": take_profit["tokens_sold"],
+                "moonbag": take_profit["tokens_remaining"],
+                "current_price": current_price,
+                "target_price": target_price
+            }
+        logging.info(f"[{token}] Trade active: Current price {current_price:.4f} SOL is below target {target_price:.4f} SOL.")
+        return {"take_profit_executed": False}
+
+    def _apply_price(self, token, price):
+        mint_book = self._book.get(token)
+        if mint_book is None:
+            return []
+        exits = []
+        for position in mint_book.positions:
+            if position.state == OPEN and price >= position.target_price:
+                # Take profit, keeping the moonbag with a break-even stop.
+                tokens_to_sell = position.remaining * (1 - position.moonbag_ratio)
+                exits.append(self._sell(position, tokens_to_sell, price, "take_profit"))
+                if position.remaining <= 0:
+                    # No moonbag kept (e.g. scalps): the position is done.
+                    position.state = CLOSED
+                    position.closed_at = time.time()
+                    continue
+                position.state = MOONBAG
+                position.stop_price = position.effective_price
+                logging.info(f"[{token}] Target reached: Current price {price:.4f} SOL >= Target price "
+                             f"{position.target_price:.4f} SOL. Sold {tokens_to_sell:.4f} tokens, "
+                             f"retaining {position.remaining:.4f} tokens as moonbag.")
+            elif price <= position.stop_price:
+                reason = "stop_loss" if position.state == OPEN else "moonbag_exit"
+                exits.append(self._sell(position, position.remaining, price, reason))
+                position.state = CLOSED
+                position.closed_at = time.time()
+                logging.info(f"[{token}] {reason.replace('_', ' ').title()}: price {price:.4f} SOL "
+                             f"<= stop {position.stop_price:.4f} SOL. Position {position.id} closed.")
+        if exits:
+            # At most one exit per position per tick, so its state is the one to record.
+            for event in exits:
+                self._record_exit(self._positions[event["position_id"]], event)
+            self._settle(token, mint_book)
+        return exits
+
+    def close_position(self, position_id, price, reason="manual_exit"):
+        """Sell everything left in a position at price. Returns the exit event or None."""
+        with self._lock:
+            position = self._positions.get(position_id)
+            if position is None:
+                return None
+            event = self._sell(position, position.remaining, price, reason)
+            position.state = CLOSED
+            position.closed_at = time.time()
+            self._record_exit(position, event)
+            self._settle(position.token, self._book[position.token])
+            logging.info(f"[{position.token}] {reason.replace('_', ' ').title()}: sold at "
+                         f"{price:.4f} SOL. Position {position.id} closed.")
+            return event
+
+    def _settle(self, token, mint_book):
+        # Retire closed positions and recompute the mint's thresholds.
+        for position in mint_book.positions:
+            if position.state == CLOSED:
+                del self._positions[position.id]
+                self._closed_count += 1
+                self._realized_pnl += position.realized_pnl
+        mint_book.positions = [p for p in mint_book.positions if p.state != CLOSED]
+        if mint_book.positions:
+            mint_book.refresh()
+        else:
+            del self._book[token]
+
+    def _sell(self, position, tokens, price, reason):
+        proceeds = tokens * price
+        position.remaining -= tokens
+        position.proceeds += proceeds
+        return {
+            "position_id": position.id,
+            "token": position.token,
+            "reason": reason,
+            "price": price,
+            "tokens_sold": tokens,
+            "tokens_remaining": position.remaining,
+            "proceeds": proceeds
+        }
+
+    # ------------------------------------------------------------------
+    # Book
+    # ------------------------------------------------------------------
+    def _add_position(self, position):
+        with self._lock:
+            self._positions[position.id] = position
+            mint_book = self._book.get(position.token)
+            if mint_book is None:
+                mint_book = self._book[position.token] = _MintBook()
+            mint_book.positions.append(position)
+            mint_book.refresh()
+            if self.risk_engine is not None:
+                self.risk_engine.on_entry(position)
+            if self.journal is not None:
+                self.journal.record_entry(position)
+
+    def _record_exit(self, position, event):
+        if self.risk_engine is not None:
+            self.risk_engine.on_exit(position, event["tokens_sold"], event["proceeds"],
+                                     position.state == CLOSED)
+        if self.journal is not None:
+            self.journal.record_exit(position, event)
+
+    def recover(self, journal):
+        """
+        Rebuild the book from journal's records, then journal to it from here
+        on. Only for a manager that hasn't traded yet. Returns the number of
+        records replayed.
+        """
+        records = journal.records()
+        with self._lock:
+            if self._positions or self._closed_count:
+                raise RuntimeError("Can only recover into a TradeManager that hasn't traded")
+            # Fold the records per position first, so the book is built once.
+            live = {}
+            last_id = 0
+            for record in records:
+                if record.kind == "entry":
+                    live[record.position_id] = Position(
+                        id=record.position_id,
+                        token=record.token,
+                        entry_price=record.price,
+                        effective_price=record.effective_price,
+                        tokens=record.tokens,
+                        target_price=record.target_price,
+                        stop_price=record.stop_price,
+                        moonbag_ratio=record.moonbag_ratio,
+                        cost=record.amount,
+                        opened_at=record.ts
+                    )
+                    if self.risk_engine is not None:
+                        self.risk_engine.on_entry(live[record.position_id])
+                    last_id = max(last_id, record.position_id)
+                    continue
+                position = live.get(record.position_id)
+                if position is None:
+                    continue
+                position.remaining = record.remaining
+                position.proceeds += record.amount
+                position.stop_price = record.stop_price
+                position.state = record.state
+                if self.risk_engine is not None:
+                    self.risk_engine.on_exit(position, record.tokens, record.amount,
+                                             record.state == CLOSED, now=record.ts)
+                if record.state == CLOSED:
+                    del live[position.id]
+                    self._closed_count += 1
+                    self._realized_pnl += position.proceeds - position.cost
+            for position in live.values():
+                self._positions[position.id] = position
+                mint_book = self._book.get(position.token)
+                if mint_book is None:
+                    mint_book = self._book[position.token] = _MintBook()
+                mint_book.positions.append(position)
+            for mint_book in self._book.values():
+                mint_book.refresh()
+            self._ids = count(last_id + 1)
+            self.journal = journal
+        return len(records)
+
+    def open_positions(self, token=None):
+        with self._lock:
+            if token is not None:
+                mint_book = self._book.get(token)
+                return list(mint_book.positions) if mint_book else []
+            return [p for mint_book in self._book.values() for p in mint_book.positions]
+
+    def get_position(self, position_id):
+        return self._positions.get(position_id)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "open_positions": len(self._positions),
+                "tokens": len(self._book),
+                "closed_positions": self._closed_count,
+                "realized_pnl": self._realized_pnl
+            }
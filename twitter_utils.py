@@ -6,10 +6,14 @@ Utility script for Twitter API operations like user lookup and validation.
 """
 
 import os
+import re
 import json
+import time
 import logging
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from http_client import http
 
 # Configure logging
 logging.basicConfig(
@@ -17,6 +21,89 @@ logging.basicConfig(
     format='%(asctime)s [%(levelname)s] %(message)s'
 )
 
+# The v2 multi-user lookup accepts at most 100 usernames per call.
+USERS_LOOKUP_BATCH_SIZE = 100
+USER_FIELDS = "description,public_metrics,verified"
+# Twitter handles: 1-15 letters, digits or underscores. Anything else would
+# fail the whole 100-name lookup it is batched into.
+USERNAME_PATTERN = re.compile(r"^[A-Za-z0-9_]{1,15}$")
+
+# username -> id results are cached on disk between restarts, next to this
+# module whatever the working directory.
+USER_CACHE_PATH = os.getenv("TWITTER_USER_CACHE_PATH", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "twitter_users.json"))
+USER_CACHE_TTL = float(os.getenv("TWITTER_USER_CACHE_TTL", str(24 * 3600)))
+
+def is_valid_username(username):
+    return isinstance(username, str) and USERNAME_PATTERN.match(username) is not None
+
+def _invalid_username(username):
+    return {'username': username, 'valid': False, 'error': 'Invalid username'}
+
+class UserCache:
+    """JSON-file cache of validated accounts, keyed by lower-cased username."""
+
+    def __init__(self, path=USER_CACHE_PATH, ttl=USER_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, username):
+        entry = self._entries.get(username.lower())
+        if entry and time.time() - entry["fetched_at"] < self.ttl:
+            return entry["result"]
+        return None
+
+    def put_many(self, results):
+        now = time.time()
+        with self._lock:
+            for result in results:
+                if result.get("valid"):
+                    self._entries[result["username"].lower()] = {"fetched_at": now, "result": result}
+
+    def save(self):
+        with self._lock:
+            entries = dict(self._entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable user cache {self.path}: {e}")
+            self._entries = {}
+
+class RateLimiter:
+    """Allows at most `calls` acquisitions per `period` seconds across threads."""
+
+    def __init__(self, calls, period):
+        self.calls = calls
+        self.period = period
+        self._timestamps = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._timestamps = [t for t in self._timestamps if now - t < self.period]
+                if len(self._timestamps) < self.calls:
+                    self._timestamps.append(now)
+                    return
+                wait = self.period - (now - self._timestamps[0])
+            time.sleep(wait)
+
 class TwitterAPI:
     def __init__(self):
         load_dotenv()
@@ -37,17 +124,19 @@ class TwitterAPI:
             "Authorization": f"Bearer {self.bearer_token}",
             "User-Agent": "v2UserLookupPython"
         }
+        # App-auth limit for GET /2/users/by is 300 requests per 15 minutes.
+        self.lookup_rate_limiter = RateLimiter(calls=300, period=15 * 60)
 
     def lookup_user(self, username):
         """Look up a Twitter user by username."""
         url = f"https://api.twitter.com/2/users/by/username/{username}"
         
         try:
-            response = requests.get(
+            response = http.get(
                 url,
                 headers=self.headers,
                 params={
-                    "user.fields": "description,public_metrics,verified"
+                    "user.fields": USER_FIELDS
                 }
             )
             
@@ -65,6 +154,9 @@ class TwitterAPI:
         """Validate a list of Twitter usernames."""
         results = []
         for username in usernames:
+            if not is_valid_username(username):
+                results.append(_invalid_username(username))
+                continue
             data = self.lookup_user(username)
             if data and 'data' in data:
                 user = data['data']
@@ -83,6 +175,96 @@ class TwitterAPI:
                 })
         return results
 
+    def lookup_users(self, usernames):
+        """Look up up to 100 Twitter users in one v2 multi-user request."""
+        self.lookup_rate_limiter.acquire()
+        try:
+            response = http.get(
+                "https://api.twitter.com/2/users/by",
+                headers=self.headers,
+                params={
+                    "usernames": ",".join(usernames),
+                    "user.fields": USER_FIELDS
+                }
+            )
+            if response.status_code == 200:
+                return response.json()
+            logging.error(f"Error {response.status_code}: {response.text}")
+            return None
+        except Exception as e:
+            logging.error(f"Request failed: {str(e)}")
+            return None
+
+    def validate_accounts_bulk(self, usernames, max_workers=4, cache=None):
+        """
+        Validate many usernames using the v2 multi-user lookup. Usernames are
+        chunked 100 per request and chunks run concurrently within the rate
+        limit. Valid accounts are cached on disk so restarts skip them.
+        Malformed usernames are reported invalid without a request.
+        Returns results in the same shape and order as validate_accounts().
+        """
+        cache = cache if cache is not None else UserCache()
+        resolved = {}
+        invalid = {}
+        pending = []
+        for username in dict.fromkeys(usernames):
+            if not is_valid_username(username):
+                invalid[username] = _invalid_username(username)
+                continue
+            cached = cache.get(username)
+            if cached is not None:
+                resolved[username.lower()] = cached
+            else:
+                pending.append(username)
+
+        chunks = [pending[i:i + USERS_LOOKUP_BATCH_SIZE]
+                  for i in range(0, len(pending), USERS_LOOKUP_BATCH_SIZE)]
+        if chunks:
+            logging.info(f"Validating {len(pending)} accounts in {len(chunks)} requests "
+                         f"({len(resolved)} served from cache)")
+            fetched = []
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for chunk, data in zip(chunks, executor.map(self.lookup_users, chunks)):
+                    fetched.extend(self._chunk_results(chunk, data))
+            for result in fetched:
+                resolved[result['username'].lower()] = result
+            # Only what was looked up now: re-stamping cached entries would
+            # keep extending their TTL.
+            cache.put_many(fetched)
+            try:
+                cache.save()
+            except OSError as e:
+                logging.warning(f"Could not save user cache: {e}")
+
+        return [invalid[username] if username in invalid
+                else dict(resolved[username.lower()], username=username)
+                for username in usernames]
+
+    @staticmethod
+    def _chunk_results(chunk, data):
+        users = {}
+        if data:
+            for user in data.get('data', []):
+                users[user['username'].lower()] = user
+        results = []
+        for username in chunk:
+            user = users.get(username.lower())
+            if user:
+                results.append({
+                    'username': username,
+                    'id': user['id'],
+                    'valid': True,
+                    'verified': user.get('verified', False),
+                    'metrics': user.get('public_metrics', {})
+                })
+            else:
+                results.append({
+                    'username': username,
+                    'valid': False,
+                    'error': 'User not found or private' if data else 'Lookup request failed'
+                })
+        return results
+
 def main():
     # Example target accounts
     target_accounts = [
@@ -97,7 +279,7 @@ def main():
         
         # Validate all target accounts
         print("\nValidating target accounts...")
-        results = api.validate_accounts(target_accounts)
+        results = api.validate_accounts_bulk(target_accounts)
         
         # Display results in a formatted way
         print("\nValidation Results:")
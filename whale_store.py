@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+whale_store.py
+
+Fixed-capacity ring buffer for whale activity events.
+
+Events are stored column-wise (time, wallet, amount, side) in preallocated
+arrays and addressed by a monotonically increasing sequence number; slot =
+seq % (capacity + 1). Appends are O(1) and never shift or reallocate anything.
+
+Only writers take the lock. A writer fills the slot for head + 1 before it
+publishes the new head, so that slot is mid-write while readers may be
+looking; the one spare slot means it only ever holds an event that has
+already dropped out of the `capacity` readable ones. Readers copy the slots
+they need without locking and then check, seqlock-style, whether a writer
+lapped them while they were copying; any slot that was overwritten or being
+written is trimmed from the result. Readers therefore never block the
+producer thread and never see a torn event.
+"""
+
+import os
+import json
+import time
+import threading
+from array import array
+from datetime import datetime, timezone
+
+WHALE_STORE_CAPACITY = int(os.getenv("WHALE_STORE_CAPACITY", "10000"))
+
+BUY = 1
+SELL = -1
+_SIDE_NAMES = {BUY: "buy", SELL: "sell"}
+_SIDE_CODES = {"buy": BUY, "sell": SELL}
+
+
+class WhaleEventStore:
+    """Ring buffer of whale events with sequence-number cursors."""
+
+    def __init__(self, capacity=WHALE_STORE_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        # One spare slot for the event being written (see the module docstring).
+        self._slots = slots = capacity + 1
+        self._times = array("d", bytes(8 * slots))
+        self._amounts = array("d", bytes(8 * slots))
+        self._sides = array("b", bytes(slots))
+        self._wallets = [None] * slots
+        # Sequence number of the newest event; 0 means empty. Published last.
+        self._head = 0
+        # Sequence numbers start over with every store (i.e. server restart);
+        # clients compare epochs to know when their cursor no longer applies.
+        self.epoch = time.time_ns() // 1_000_000
+        self._write_lock = threading.Lock()
+        # Serialized API pages for the current head; many dashboards polling
+        # the same cursor share one json.dumps.
+        self._page_cache = {}
+        self._page_cache_head = 0
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def append(self, wallet, amount, side, timestamp=None):
+        """Append one event and return its sequence number."""
+        timestamp = time.time() if timestamp is None else timestamp
+        side_code = _SIDE_CODES[side] if isinstance(side, str) else side
+        with self._write_lock:
+            seq = self._head + 1
+            slot = seq % self._slots
+            self._times[slot] = timestamp
+            self._amounts[slot] = amount
+            self._sides[slot] = side_code
+            self._wallets[slot] = wallet
+            self._head = seq
+        return seq
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    @property
+    def head(self):
+        """Sequence number of the newest event (the cursor for since())."""
+        return self._head
+
+    @property
+    def oldest(self):
+        """Sequence number of the oldest event still held, or 0 if empty."""
+        head = self._head
+        return max(1, head - self.capacity + 1) if head else 0
+
+    def __len__(self):
+        return min(self._head, self.capacity)
+
+    def get(self, seq):
+        """The event with sequence number seq, or None if it has been overwritten."""
+        events = self._read(seq, seq) if self.oldest <= seq <= self._head else []
+        return events[0] if events else None
+
+    def since(self, cursor, limit=None):
+        """
+        Events with seq > cursor, oldest first. If `cursor` is older than the
+        buffer, returns everything still held (check `oldest` to detect a gap).
+        """
+        head = self._head
+        start = max(cursor + 1, head - self.capacity + 1, 1)
+        if limit is not None:
+            start = max(start, head - limit + 1)
+        return self._read(start, head)
+
+    def latest(self, limit=50, before=None):
+        """Up to `limit` newest events (older than seq `before`), oldest first."""
+        head = self._head if before is None else min(self._head, before - 1)
+        return self._read(max(head - limit + 1, 1), head)
+
+    def page(self, since=None, limit=50, before=None):
+        """
+        The API payload: with `since`, events newer than that cursor (at most
+        `limit`, newest kept); otherwise the newest `limit` events before
+        `before`. `cursor` is the seq to pass as `since` next time (never
+        above the head, so a cursor from before a restart shows up as one
+        that went backwards), `gap` is True if events after `since` have
+        already been dropped, and `epoch` identifies this store.
+        """
+        head = self._head
+        if since is not None:
+            events = self.since(since, limit=limit)
+            gap = bool(events) and events[0]["seq"] > since + 1
+        else:
+            events = self.latest(limit, before=before)
+            gap = False
+        return {
+            "activities": events,
+            "cursor": events[-1]["seq"] if events else head,
+            "oldest": self.oldest,
+            "gap": gap,
+            "epoch": self.epoch
+        }
+
+    def page_json(self, since=None, limit=50, before=None):
+        """page() serialized to JSON, cached until the next append."""
+        head = self._head
+        key = (since, limit, before)
+        cache = self._page_cache
+        if self._page_cache_head != head:
+            cache = self._page_cache = {}
+            self._page_cache_head = head
+        body = cache.get(key)
+        if body is None:
+            body = json.dumps(self.page(since, limit, before), separators=(",", ":"))
+            if len(cache) < 256:
+                cache[key] = body
+        return body
+
+    def snapshot(self):
+        return self.latest(self.capacity)
+
+    def net_flow(self, window_seconds, now=None):
+        """
+        Net SOL flow per wallet (buys positive, sells negative) over the last
+        `window_seconds`. Scans back from the newest event only as far as the
+        window reaches.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - window_seconds
+        flows = {}
+        head = self._head
+        floor = max(head - self.capacity + 1, 1)
+        seq = head
+        while seq >= floor:
+            slot = seq % self._slots
+            timestamp = self._times[slot]
+            wallet = self._wallets[slot]
+            signed = self._amounts[slot] * self._sides[slot]
+            if self._head - seq >= self.capacity:
+                break    # overwritten, or being written, while scanning
+            if timestamp < cutoff:
+                break
+            flows[wallet] = flows.get(wallet, 0.0) + signed
+            seq -= 1
+        return flows
+
+    def _read(self, start, end):
+        if end < start:
+            return []
+        slots = self._slots
+        rows = []
+        for seq in range(start, end + 1):
+            slot = seq % slots
+            rows.append((seq, self._times[slot], self._wallets[slot],
+                         self._amounts[slot], self._sides[slot]))
+        # Drop any slots a writer overwrote, or started writing, while we
+        # were copying: everything below the readable window of the head now.
+        overwritten_below = self._head - self.capacity + 1
+        if rows and rows[0][0] < overwritten_below:
+            rows = [row for row in rows if row[0] >= overwritten_below]
+        return [self._as_event(*row) for row in rows]
+
+    @staticmethod
+    def _as_event(seq, timestamp, wallet, amount, side):
+        return {
+            "seq": seq,
+            "time": datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            "wallet": wallet,
+            "amount": amount,
+            "type": _SIDE_NAMES.get(side, "unknown")
+        }